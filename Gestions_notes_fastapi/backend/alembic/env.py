@@ -12,6 +12,9 @@ from database.database import Base
 from models.utilisateurs import Utilisateur
 from models.notes import Note  # Importez tous vos modèles ici
 from models.partage_note import PartageNote  # Si vous avez d'autres modèles
+from models.tag import Tag
+from models.user_tag_stats import UserTagStats
+from models.user_note_revision import UserNoteRevision
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,34 @@
+"""Backfill notes.date_modification for cursor pagination
+
+Revision ID: 4d7e2b9c1a05
+Revises: c3a91f0d2b47
+Create Date: 2026-10-18 10:02:31.540917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d7e2b9c1a05'
+down_revision: Union[str, Sequence[str], None] = 'c3a91f0d2b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Les notes jamais modifiées avaient date_modification à NULL ;
+    # la pagination par curseur trie sur (date_modification, id).
+    op.execute(
+        "UPDATE notes SET date_modification = COALESCE(date_creation, CURRENT_TIMESTAMP) "
+        "WHERE date_modification IS NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Données uniquement : rien à annuler
+    pass
@@ -0,0 +1,44 @@
+"""Add user_tag_stats usage counters
+
+Revision ID: 5e1c9a7f3b20
+Revises: 8b2f5e0c7d13
+Create Date: 2026-10-18 14:02:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1c9a7f3b20'
+down_revision: Union[str, Sequence[str], None] = '8b2f5e0c7d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'user_tag_stats',
+        sa.Column('utilisateur_id', sa.Integer(), sa.ForeignKey('utilisateurs.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('tag_id', sa.Integer(), sa.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('last_used', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index('ix_user_tag_stats_user_count', 'user_tag_stats', ['utilisateur_id', 'count', 'tag_id'])
+
+    # Compteurs initiaux à partir des tags déjà posés sur les notes
+    op.execute(
+        "INSERT INTO user_tag_stats (utilisateur_id, tag_id, count, last_used) "
+        "SELECT notes.owner_id, note_tags.tag_id, COUNT(*), MAX(COALESCE(notes.date_modification, notes.date_creation)) "
+        "FROM notes JOIN note_tags ON note_tags.note_id = notes.id "
+        "GROUP BY notes.owner_id, note_tags.tag_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_user_tag_stats_user_count', table_name='user_tag_stats')
+    op.drop_table('user_tag_stats')
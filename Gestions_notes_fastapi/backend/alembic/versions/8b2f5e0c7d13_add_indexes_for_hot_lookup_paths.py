@@ -0,0 +1,104 @@
+"""Add indexes for hot lookup paths and a primary key on note_tags
+
+Revision ID: 8b2f5e0c7d13
+Revises: 4d7e2b9c1a05
+Create Date: 2026-10-18 11:26:05.774130
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2f5e0c7d13'
+down_revision: Union[str, Sequence[str], None] = '4d7e2b9c1a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """
+    Upgrade schema.
+
+    Sous SQLite le DDL n'est pas transactionnel : chaque étape tolère un passage précédent
+    interrompu (index déjà créés, note_tags déjà reconstruite ou à moitié), pour que
+    `alembic upgrade` puisse être relancé.
+    """
+    bind = op.get_bind()
+
+    # Les anciens tokens à 6 chiffres ont pu entrer en collision : on garde le plus ancien
+    # et on régénère les autres avant de poser l'index unique.
+    duplicated_tokens = bind.execute(sa.text(
+        "SELECT token_publique FROM notes WHERE token_publique IS NOT NULL "
+        "GROUP BY token_publique HAVING COUNT(*) > 1"
+    )).scalars().all()
+    for token in duplicated_tokens:
+        note_ids = bind.execute(
+            sa.text("SELECT id FROM notes WHERE token_publique = :token ORDER BY id"),
+            {"token": token}
+        ).scalars().all()
+        for note_id in note_ids[1:]:
+            bind.execute(
+                sa.text("UPDATE notes SET token_publique = :token WHERE id = :id"),
+                {"token": str(uuid.uuid4()), "id": note_id}
+            )
+
+    op.create_index('ix_notes_owner_date', 'notes', ['owner_id', 'date_modification', 'id'], if_not_exists=True)
+    op.create_index('ix_notes_owner_visibilite_date', 'notes', ['owner_id', 'visibilite', 'date_modification'], if_not_exists=True)
+    op.create_index('ux_notes_token_publique', 'notes', ['token_publique'], unique=True, if_not_exists=True)
+
+    # Doublons de partage (même note, même destinataire) : on conserve le premier
+    op.execute(
+        "DELETE FROM partage_notes WHERE id NOT IN ("
+        "SELECT MIN(id) FROM partage_notes GROUP BY note_id, partage_avec_utilisateur_id)"
+    )
+    op.create_index('ux_partage_notes_note_recipient', 'partage_notes', ['note_id', 'partage_avec_utilisateur_id'], unique=True, if_not_exists=True)
+    op.create_index('ix_partage_notes_recipient', 'partage_notes', ['partage_avec_utilisateur_id', 'note_id'], if_not_exists=True)
+
+    # note_tags n'avait pas de clé primaire : reconstruction dédoublonnée
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    if 'note_tags' not in tables:
+        # Interrompu entre la suppression de l'ancienne table et le renommage : la copie est complète
+        op.rename_table('note_tags_new', 'note_tags')
+    elif not inspector.get_pk_constraint('note_tags')['constrained_columns']:
+        if 'note_tags_new' in tables:
+            # Copie interrompue : on la refait depuis l'ancienne table, intacte
+            op.drop_table('note_tags_new')
+        op.create_table(
+            'note_tags_new',
+            sa.Column('note_id', sa.Integer(), sa.ForeignKey('notes.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('tag_id', sa.Integer(), sa.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+        )
+        op.execute(
+            "INSERT INTO note_tags_new (note_id, tag_id) "
+            "SELECT DISTINCT note_id, tag_id FROM note_tags WHERE note_id IS NOT NULL AND tag_id IS NOT NULL"
+        )
+        op.drop_table('note_tags')
+        op.rename_table('note_tags_new', 'note_tags')
+    op.create_index('ix_note_tags_tag', 'note_tags', ['tag_id', 'note_id'], if_not_exists=True)
+
+    # La révision bbe903b55e1a supprime ix_tags_nom alors que le modèle le déclare
+    op.create_index('ix_tags_nom', 'tags', ['nom'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_note_tags_tag', table_name='note_tags', if_exists=True)
+    op.create_table(
+        'note_tags_old',
+        sa.Column('note_id', sa.Integer(), sa.ForeignKey('notes.id', ondelete='CASCADE')),
+        sa.Column('tag_id', sa.Integer(), sa.ForeignKey('tags.id', ondelete='CASCADE')),
+    )
+    op.execute("INSERT INTO note_tags_old (note_id, tag_id) SELECT note_id, tag_id FROM note_tags")
+    op.drop_table('note_tags')
+    op.rename_table('note_tags_old', 'note_tags')
+
+    op.drop_index('ix_partage_notes_recipient', table_name='partage_notes', if_exists=True)
+    op.drop_index('ux_partage_notes_note_recipient', table_name='partage_notes', if_exists=True)
+    op.drop_index('ux_notes_token_publique', table_name='notes', if_exists=True)
+    op.drop_index('ix_notes_owner_visibilite_date', table_name='notes', if_exists=True)
+    op.drop_index('ix_notes_owner_date', table_name='notes', if_exists=True)
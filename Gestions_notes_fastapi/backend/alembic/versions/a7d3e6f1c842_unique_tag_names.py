@@ -0,0 +1,58 @@
+"""Merge duplicate tags and make tags.nom unique
+
+Revision ID: a7d3e6f1c842
+Revises: 5e1c9a7f3b20
+Create Date: 2026-10-18 15:37:12.904513
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e6f1c842'
+down_revision: Union[str, Sequence[str], None] = '5e1c9a7f3b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+
+    # Fusionner les tags de même nom sur le plus ancien avant de poser l'index unique
+    duplicates = bind.execute(sa.text(
+        "SELECT nom, MIN(id) FROM tags GROUP BY nom HAVING COUNT(*) > 1"
+    )).all()
+    for nom, kept_id in duplicates:
+        params = {"nom": nom, "kept_id": kept_id}
+        merged = "SELECT id FROM tags WHERE nom = :nom AND id != :kept_id"
+        bind.execute(sa.text(
+            "INSERT OR IGNORE INTO note_tags (note_id, tag_id) "
+            f"SELECT note_id, :kept_id FROM note_tags WHERE tag_id IN ({merged})"
+        ), params)
+        bind.execute(sa.text(f"DELETE FROM note_tags WHERE tag_id IN ({merged})"), params)
+        bind.execute(sa.text(f"DELETE FROM tags WHERE id IN ({merged})"), params)
+
+    if duplicates:
+        # Les compteurs des tags fusionnés sont recalculés
+        op.execute("DELETE FROM user_tag_stats")
+        op.execute(
+            "INSERT INTO user_tag_stats (utilisateur_id, tag_id, count, last_used) "
+            "SELECT notes.owner_id, note_tags.tag_id, COUNT(*), MAX(COALESCE(notes.date_modification, notes.date_creation)) "
+            "FROM notes JOIN note_tags ON note_tags.note_id = notes.id "
+            "GROUP BY notes.owner_id, note_tags.tag_id"
+        )
+
+    tags_indexes = {index['name'] for index in sa.inspect(bind).get_indexes('tags')}
+    if 'ix_tags_nom' in tags_indexes:
+        op.drop_index('ix_tags_nom', table_name='tags')
+    op.create_index('ix_tags_nom', 'tags', ['nom'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tags_nom', table_name='tags')
+    op.create_index('ix_tags_nom', 'tags', ['nom'], unique=False)
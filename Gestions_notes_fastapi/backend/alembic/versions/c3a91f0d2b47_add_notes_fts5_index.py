@@ -0,0 +1,32 @@
+"""Add FTS5 full-text index on notes
+
+Revision ID: c3a91f0d2b47
+Revises: bbe903b55e1a
+Create Date: 2026-10-18 09:12:44.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from database.fts import create_notes_fts, drop_notes_fts
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a91f0d2b47'
+down_revision: Union[str, Sequence[str], None] = 'bbe903b55e1a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Crée la table virtuelle + triggers et indexe les notes existantes (backfill).
+    # Sans FTS5, rien n'est créé et la recherche reste sur LIKE.
+    create_notes_fts(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_notes_fts(op.get_bind())
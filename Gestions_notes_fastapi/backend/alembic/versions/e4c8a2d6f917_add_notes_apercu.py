@@ -0,0 +1,48 @@
+"""Add notes.apercu precomputed content preview
+
+Revision ID: e4c8a2d6f917
+Revises: a7d3e6f1c842
+Create Date: 2026-10-18 16:41:07.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.markdown import get_content_preview
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4c8a2d6f917'
+down_revision: Union[str, Sequence[str], None] = 'a7d3e6f1c842'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('notes', sa.Column('apercu', sa.String(length=255), nullable=True))
+
+    # Aperçu des notes existantes, calculé comme à l'écriture (Note.preview) : par lots d'ids
+    connection = op.get_bind()
+    notes = sa.table('notes', sa.column('id', sa.Integer), sa.column('contenu', sa.Text), sa.column('apercu', sa.String))
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(notes.c.id, notes.c.contenu).where(notes.c.id > last_id).order_by(notes.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        connection.execute(
+            notes.update().where(notes.c.id == sa.bindparam('note_id')).values(apercu=sa.bindparam('preview')),
+            [{'note_id': note_id, 'preview': get_content_preview(contenu or '')} for note_id, contenu in rows]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('notes', 'apercu')
@@ -0,0 +1,33 @@
+"""Add user_note_revisions write counters
+
+Revision ID: f2b7c4e9a1d3
+Revises: e4c8a2d6f917
+Create Date: 2026-10-18 18:12:26.551930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b7c4e9a1d3'
+down_revision: Union[str, Sequence[str], None] = 'e4c8a2d6f917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Pas de remplissage : un utilisateur sans ligne est à la révision 0
+    op.create_table(
+        'user_note_revisions',
+        sa.Column('utilisateur_id', sa.Integer(), sa.ForeignKey('utilisateurs.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('revision', sa.Integer(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_note_revisions')
@@ -0,0 +1,139 @@
+"""
+Benchmark de charge : chemin de données synchrone vs asynchrone
+
+Deux routes équivalentes (liste des notes d'un utilisateur) sur une base SQLite générée :
+- sync  : `def` + Session (exécutée dans le threadpool de Starlette, 40 threads par défaut)
+- async : `async def` + AsyncSession aiosqlite (NoteService exécuté via run_sync)
+
+Les requêtes sont envoyées en mémoire (httpx + ASGITransport) avec N requêtes simultanées,
+pour plusieurs niveaux de concurrence ; le script affiche le débit, les latences p50/p99
+et le nombre de requêtes en erreur (ex. attente d'une connexion du pool dépassée).
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_async_load [--requests 1000] [--concurrency 10 50 100]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from database.database import Base
+from schemas.note_schema import NoteResponse
+from services.note_service import AsyncNoteService, NoteService
+from benchmarks.bench_user_notes_query import seed
+
+POOL_TIMEOUT = 5
+
+
+def build_app(database_path: str, utilisateur_id: int):
+    # Même pool des deux côtés que l'application (5 connexions + 10 en débordement)
+    engine = create_engine(
+        f"sqlite:///{database_path}", connect_args={"check_same_thread": False},
+        pool_size=5, max_overflow=10, pool_timeout=POOL_TIMEOUT,
+    )
+    async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{database_path}", poolclass=AsyncAdaptedQueuePool,
+        pool_size=5, max_overflow=10, pool_timeout=POOL_TIMEOUT,
+    )
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    async_session_factory = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app = FastAPI()
+
+    @app.get("/sync/notes", response_model=list[NoteResponse])
+    def sync_notes(db: Session = Depends(get_db)):
+        return NoteService(db).get_user_notes(utilisateur_id, 0, 20)
+
+    @app.get("/async/notes", response_model=list[NoteResponse])
+    async def async_notes(db: AsyncSession = Depends(get_async_db)):
+        return await AsyncNoteService(db).get_user_notes(utilisateur_id, 0, 20)
+
+    return app, engine, async_engine
+
+
+async def run_load(app, path: str, total: int, concurrency: int):
+    """Envoie `total` requêtes avec au plus `concurrency` en vol ; renvoie (débit, latences, erreurs)"""
+    latencies = []
+    errors = 0
+    queue = iter(range(total))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            nonlocal errors
+            for _ in queue:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    ok = response.status_code == 200
+                except Exception:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                errors += not ok
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return total / elapsed, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 100])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, "bench.db")
+        engine = create_engine(f"sqlite:///{database_path}")
+        Base.metadata.create_all(engine)
+        print(f"Génération : {args.notes} notes...")
+        utilisateur_id = seed(engine, users=50, notes=args.notes, shares_per_note=3, tags=100, tags_per_note=3)
+        engine.dispose()
+
+        app, sync_engine, async_engine = build_app(database_path, utilisateur_id)
+
+        async def scenario():
+            # Préchauffage (connexions, caches de requêtes compilées)
+            for path in ("/sync/notes", "/async/notes"):
+                await run_load(app, path, 50, 5)
+
+            print(f"\n{'concurrence':>11}  {'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'erreurs':>8}")
+            for concurrency in args.concurrency:
+                for mode in ("sync", "async"):
+                    throughput, latencies, errors = await run_load(app, f"/{mode}/notes", args.requests, concurrency)
+                    latencies.sort()
+                    p50 = statistics.median(latencies) * 1000
+                    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+                    print(f"{concurrency:>11}  {mode:<6} {throughput:8.0f} {p50:8.1f} {p99:8.1f} {errors:8}")
+            await async_engine.dispose()
+
+        asyncio.run(scenario())
+        sync_engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
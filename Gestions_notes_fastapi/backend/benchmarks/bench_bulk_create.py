@@ -0,0 +1,114 @@
+"""
+Benchmark de la création groupée de notes
+
+Sur une base SQLite générée (profil de stockage par défaut, index FTS5 et ses triggers),
+crée le même lot de notes taguées de deux façons :
+- unitaire : NoteService.create_note, une transaction par note (ancien flux d'import)
+- groupée  : NoteService.create_notes_bulk, par requêtes de --batch notes
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_bulk_create [--notes 10000] [--batch 5000] [--single 1000]
+
+Le mode unitaire ne crée que --single notes (extrapolé à --notes). Le script échoue (code 1)
+si la création groupée de --notes notes dépasse 10 secondes.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from config import settings
+from database.database import Base
+from database.fts import create_notes_fts
+from database.storage import apply_profile, build_profile, engine_options
+from models.utilisateurs import Utilisateur
+from models.notes import Note
+from models.tag import note_tags
+from models.partage_note import PartageNote  # noqa: F401 (résolution des relations)
+from schemas.note_schema import NoteCreate
+from services.note_service import NoteService
+
+
+def make_items(count: int, tags: int, rng: random.Random):
+    return [
+        {
+            "titre": f"Note importée {i}",
+            "contenu": "Lorem ipsum dolor sit amet " * rng.randint(5, 40),
+            "visibilite": rng.choice(["prive", "prive", "public"]),
+            "tags": [f"tag{t}" for t in rng.sample(range(tags), 3)],
+        }
+        for i in range(count)
+    ]
+
+
+def make_engine(directory: str, name: str):
+    url = make_url(f"sqlite:///{os.path.join(directory, name)}")
+    profile = build_profile(settings)
+    engine = create_engine(url, **engine_options(url, profile))
+    apply_profile(engine, profile)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        create_notes_fts(connection)
+        connection.execute(insert(Utilisateur), [{"id": 1, "email": "import@bench.local", "mot_de_passe": "x", "est_actif": True}])
+    return engine
+
+
+def run_single(engine, items) -> float:
+    start = time.perf_counter()
+    with Session(engine) as db:
+        service = NoteService(db)
+        for item in items:
+            service.create_note(NoteCreate.model_validate(item), utilisateur_id=1)
+    return time.perf_counter() - start
+
+
+def run_bulk(engine, items, batch: int) -> float:
+    start = time.perf_counter()
+    with Session(engine) as db:
+        service = NoteService(db)
+        for offset in range(0, len(items), batch):
+            service.create_notes_bulk(items[offset:offset + batch], utilisateur_id=1)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--single", type=int, default=1000)
+    parser.add_argument("--tags", type=int, default=200)
+    args = parser.parse_args()
+
+    items = make_items(args.notes, args.tags, random.Random(42))
+    with tempfile.TemporaryDirectory() as directory:
+        single_engine = make_engine(directory, "single.db")
+        single = run_single(single_engine, items[:args.single]) * args.notes / args.single
+        single_engine.dispose()
+
+        bulk_engine = make_engine(directory, "bulk.db")
+        bulk = run_bulk(bulk_engine, items, args.batch)
+        with bulk_engine.connect() as connection:
+            notes = connection.execute(select(func.count()).select_from(Note)).scalar()
+            links = connection.execute(select(func.count()).select_from(note_tags)).scalar()
+        bulk_engine.dispose()
+
+    print(f"{args.notes} notes, 3 tags par note ({args.tags} tags distincts)\n")
+    print(f"{'mode':<10} {'durée s':>8} {'notes/s':>9}")
+    print(f"{'unitaire':<10} {single:8.2f} {args.notes / single:9.0f}   (extrapolé depuis {args.single} notes)")
+    print(f"{'groupée':<10} {bulk:8.2f} {args.notes / bulk:9.0f}   (lots de {args.batch}, {notes} notes / {links} tags en base)")
+
+    if bulk > 10:
+        print("\n❌ Création groupée trop lente")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
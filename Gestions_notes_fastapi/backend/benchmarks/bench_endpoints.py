@@ -0,0 +1,394 @@
+"""
+Suite de benchmarks des routes de l'API
+
+Pour chaque taille de base (--sizes, 10 000 / 100 000 / 1 000 000 notes par défaut) :
+1. génère une base SQLite (benchmarks.synthetic_data) : Markdown réaliste, tags et propriétaires
+   selon une loi de Zipf, graphe de partage, notes publiques
+2. démarre l'application réelle (main.app) sur cette base, dans un
+   processus dédié (les moteurs SQLAlchemy sont configurés par DATABASE_URL à l'import)
+3. envoie en mémoire (httpx + ASGITransport) --requests requêtes avec --concurrency requêtes
+   simultanées à chaque route de auth_router, note_router, search_router et partage_router,
+   en tant que l'utilisateur qui possède le plus de notes ; les routes coûteuses par nature
+   (bcrypt, export, import, création groupée) reçoivent dix fois moins de requêtes
+
+Les latences p50 / p95 / p99 et le débit de chaque route sont écrits en JSON (--output), puis
+comparés à une référence (--baseline), enregistrée sur la même machine : une route est en
+régression si son p50 et son p95 dépassent ceux de la référence de plus de --tolerance (et de
+plus de --min-delta-ms). --save-baseline enregistre le résultat comme nouvelle référence.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_endpoints [--sizes 10000 100000] [--requests 200] [--concurrency 10]
+    python -m benchmarks.bench_endpoints --sizes 10000 --save-baseline
+
+Le script échoue (code 1) si une route n'est pas couverte par la suite, si une requête reçoit
+un statut inattendu, si le processus de mesure d'une taille s'arrête en erreur (ex. mémoire
+insuffisante), ou en cas de régression par rapport à la référence. La référence n'est
+enregistrée que si la mesure ne comporte aucun échec.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import httpx
+
+from benchmarks.synthetic_data import PASSWORD, WORDS, seed
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "benchmarks", "baseline_endpoints.json")
+ROUTER_PREFIXES = ("/api/v1/auth", "/api/v1/notes", "/api/v1/search", "/api/v1/sharing")
+BENCH_USER_ID = 1
+
+# Requête : (méthode, URL, arguments supplémentaires de httpx.AsyncClient.request)
+Request = Tuple[str, str, Dict[str, Any]]
+
+
+@dataclass
+class Scenario:
+    route: str
+    request: Callable[[int], Request]
+    expected: int = 200
+    # Part de --requests envoyée à cette route (routes coûteuses par nature)
+    share: float = 1.0
+    # Appelé avec chaque réponse attendue (ex. mémoriser les notes créées)
+    collect: Optional[Callable[[httpx.Response], None]] = None
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Percentile au rang le plus proche d'une liste triée"""
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, total: int, concurrency: int) -> Dict[str, Any]:
+    """Envoie `total` requêtes avec au plus `concurrency` en vol ; renvoie latences et débit"""
+    latencies: List[float] = []
+    errors: List[str] = []
+    queue = iter(range(total))
+
+    async def worker():
+        for index in queue:
+            method, url, kwargs = scenario.request(index)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except Exception as exc:
+                latencies.append(time.perf_counter() - start)
+                errors.append(repr(exc))
+                continue
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != scenario.expected:
+                errors.append(f"{response.status_code} {response.text[:200]}")
+            elif scenario.collect is not None:
+                scenario.collect(response)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "throughput_rps": round(total / elapsed, 1),
+    }
+
+
+def build_scenarios(database_path: str, token: str) -> List[Scenario]:
+    """Une ou plusieurs requêtes réalistes par route, à partir des données générées"""
+    connection = sqlite3.connect(database_path)
+    owned = [row[0] for row in connection.execute(
+        "SELECT id FROM notes WHERE owner_id = ? ORDER BY random() LIMIT 2000", (BENCH_USER_ID,)
+    )]
+    tags = [row[0] for row in connection.execute(
+        "SELECT t.nom FROM user_tag_stats s JOIN tags t ON t.id = s.tag_id WHERE s.utilisateur_id = ? "
+        "ORDER BY s.count DESC LIMIT 50", (BENCH_USER_ID,)
+    )]
+    tokens = [row[0] for row in connection.execute(
+        "SELECT token_publique FROM notes WHERE token_publique IS NOT NULL LIMIT 500"
+    )]
+    recipients = [row[0] for row in connection.execute(
+        "SELECT email FROM utilisateurs WHERE id != ? ORDER BY id LIMIT 200", (BENCH_USER_ID,)
+    )]
+    connection.close()
+
+    auth = {"headers": {"Authorization": f"Bearer {token}"}}
+    created: List[int] = []
+
+    def pick(values: List[Any], index: int) -> Any:
+        return values[index % len(values)]
+
+    def note_payload(index: int) -> Dict[str, Any]:
+        return {
+            "titre": f"Note de benchmark {index}",
+            "contenu": f"## {pick(WORDS, index)}\n\n" + " ".join(pick(WORDS, index + k) for k in range(60)),
+            "tags": [pick(tags, index), pick(tags, index + 7)],
+        }
+
+    import_body = "".join(json.dumps(note_payload(index)) + "\n" for index in range(50)).encode()
+
+    def get(url: str, **kwargs) -> Callable[[int], Request]:
+        return lambda index: ("GET", url.format(i=index, **{key: pick(values, index) for key, values in kwargs.items()}), auth)
+
+    return [
+        # Lectures
+        Scenario("GET /api/v1/notes/notes/", get("/api/v1/notes/notes/?limit=20&skip={skip}", skip=[0, 20, 100, 500])),
+        Scenario("GET /api/v1/notes/notes/search/", get("/api/v1/notes/notes/search/?query={word}&limit=20", word=WORDS)),
+        Scenario("GET /api/v1/notes/notes/filter/visibility/{visibilite}", get("/api/v1/notes/notes/filter/visibility/{v}?limit=20", v=["prive", "public"])),
+        Scenario("GET /api/v1/notes/notes/filter/tag/{tag_nom}", get("/api/v1/notes/notes/filter/tag/{tag}?limit=20", tag=tags)),
+        Scenario("GET /api/v1/notes/notes/{note_id}", get("/api/v1/notes/notes/{note}", note=owned)),
+        Scenario("GET /api/v1/notes/notes/public/{token}", lambda index: ("GET", f"/api/v1/notes/notes/public/{pick(tokens, index)}", {})),
+        Scenario("GET /api/v1/notes/notes/export", get("/api/v1/notes/notes/export?format={format}", format=["ndjson", "markdown"]), share=0.1),
+        Scenario("GET /api/v1/search/notes", get("/api/v1/search/notes?q={query}", query=list(WORDS) + [f'"{a} {b}"' for a, b in zip(WORDS, WORDS[1:])])),
+        Scenario("GET /api/v1/search/notes/filter/visibility/{visibilite}", get("/api/v1/search/notes/filter/visibility/{v}", v=["prive", "partage", "public"])),
+        Scenario("GET /api/v1/search/notes/filter/tag/{tag_nom}", get("/api/v1/search/notes/filter/tag/{tag}", tag=tags)),
+        Scenario("GET /api/v1/search/tags", get("/api/v1/search/tags")),
+        Scenario("GET /api/v1/search/tags/autocomplete", get("/api/v1/search/tags/autocomplete?q={prefix}", prefix=[tag[:2] for tag in tags])),
+        Scenario("GET /api/v1/sharing/public/{token}", lambda index: ("GET", f"/api/v1/sharing/public/{pick(tokens, index)}", {})),
+        Scenario("GET /api/v1/sharing/test-db", get("/api/v1/sharing/test-db")),
+        # Écritures : les notes créées servent aux mises à jour, partages, liens publics et suppressions
+        Scenario(
+            "POST /api/v1/notes/notes/",
+            lambda index: ("POST", "/api/v1/notes/notes/", {**auth, "json": note_payload(index)}),
+            expected=201,
+            collect=lambda response: created.append(response.json()["id"]),
+        ),
+        Scenario(
+            "PUT /api/v1/notes/notes/{note_id}",
+            lambda index: ("PUT", f"/api/v1/notes/notes/{pick(created, index)}", {**auth, "json": {"contenu": f"Modifiée {index} #{pick(tags, index + 3)}", "tags": [pick(tags, index + 3)]}}),
+        ),
+        Scenario(
+            "POST /api/v1/sharing/{note_id}/share/{user_email}",
+            lambda index: ("POST", f"/api/v1/sharing/{pick(created, index)}/share/{pick(recipients, index)}", auth),
+        ),
+        Scenario("GET /api/v1/sharing/notes/{note_id}/shared-with", lambda index: ("GET", f"/api/v1/sharing/notes/{pick(created, index)}/shared-with", auth)),
+        Scenario(
+            "GET /api/v1/sharing/notes/shared-with",
+            lambda index: ("GET", "/api/v1/sharing/notes/shared-with", {**auth, "params": [("note_ids", pick(created, index * 20 + k)) for k in range(20)]}),
+        ),
+        Scenario(
+            "POST /api/v1/sharing/notes/share",
+            lambda index: ("POST", "/api/v1/sharing/notes/share", {**auth, "json": {
+                "note_ids": [pick(created, index * 10 + k) for k in range(10)],
+                "emails": [pick(recipients, index * 5 + k) for k in range(5)],
+            }}),
+        ),
+        Scenario(
+            "DELETE /api/v1/sharing/notes/{note_id}/share/{user_email}",
+            lambda index: ("DELETE", f"/api/v1/sharing/notes/{pick(created, index)}/share/{pick(recipients, index)}", auth),
+        ),
+        Scenario("POST /api/v1/sharing/notes/{note_id}/public-link", lambda index: ("POST", f"/api/v1/sharing/notes/{pick(created, index)}/public-link", auth)),
+        Scenario("DELETE /api/v1/sharing/notes/{note_id}/public-link", lambda index: ("DELETE", f"/api/v1/sharing/notes/{pick(created, index)}/public-link", auth)),
+        Scenario(
+            "POST /api/v1/notes/notes/bulk",
+            lambda index: ("POST", "/api/v1/notes/notes/bulk", {**auth, "json": {"items": [note_payload(index * 50 + k) for k in range(50)]}}),
+            share=0.1,
+        ),
+        Scenario(
+            "POST /api/v1/notes/notes/import",
+            lambda index: ("POST", "/api/v1/notes/notes/import", {"headers": {**auth["headers"], "Content-Type": "application/x-ndjson"}, "content": import_body}),
+            share=0.1,
+        ),
+        Scenario(
+            "DELETE /api/v1/notes/notes/{note_id}",
+            lambda index: ("DELETE", f"/api/v1/notes/notes/{created[index]}", auth),
+            expected=204,
+        ),
+        # Authentification : bcrypt (pool de hachage) pour l'inscription et la connexion
+        Scenario(
+            "POST /api/v1/auth/register",
+            lambda index: ("POST", "/api/v1/auth/register", {"json": {"email": f"new{index}@bench.example.com", "mot_de_passe": PASSWORD}}),
+            expected=201,
+            share=0.1,
+        ),
+        Scenario(
+            "POST /api/v1/auth/login",
+            lambda index: ("POST", "/api/v1/auth/login", {"json": {"email": f"user{BENCH_USER_ID}@bench.example.com", "mot_de_passe": PASSWORD}}),
+            share=0.1,
+        ),
+        Scenario("POST /api/v1/auth/logout", lambda index: ("POST", "/api/v1/auth/logout", {})),
+        Scenario("GET /api/v1/auth/me", get("/api/v1/auth/me")),
+    ]
+
+
+def route_keys(app) -> List[str]:
+    """Routes des quatre routeurs de l'API, sous la forme "MÉTHODE chemin" """
+    return sorted(
+        f"{method} {route.path}"
+        for route in app.routes
+        if route.path.startswith(ROUTER_PREFIXES)
+        for method in getattr(route, "methods", ())
+        if method not in ("HEAD", "OPTIONS")
+    )
+
+
+async def drive(database_path: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Côté processus dédié : démarre l'application sur la base et mesure chaque route"""
+    from main import app
+    from utils.security import create_access_token
+
+    start = time.perf_counter()
+    await app.router.startup()
+    startup = time.perf_counter() - start
+
+    scenarios = build_scenarios(database_path, create_access_token({"sub": str(BENCH_USER_ID)}))
+    results: Dict[str, Any] = {}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+            # Préchauffage (connexions, requêtes compilées) sur les premières routes de lecture
+            for scenario in scenarios[:5]:
+                await run_scenario(client, scenario, 10, 2)
+            for scenario in scenarios:
+                total = max(10, int(requests * scenario.share))
+                results[scenario.route] = await run_scenario(client, scenario, total, concurrency)
+                print(f"  {scenario.route:<60} p95 {results[scenario.route]['p95_ms']:9.1f} ms", file=sys.stderr)
+    finally:
+        await app.router.shutdown()
+
+    covered = {scenario.route for scenario in scenarios}
+    return {
+        "startup_seconds": round(startup, 2),
+        "uncovered_routes": [route for route in route_keys(app) if route not in covered],
+        "routes": results,
+    }
+
+
+def run_size(size: int, requests: int, concurrency: int) -> Dict[str, Any]:
+    """Génère la base puis lance la mesure dans un processus dédié (DATABASE_URL propre à la base)"""
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, "bench.db")
+        summary = seed(database_path, size)
+        print(f"{size} notes : base générée en {summary.seconds:.1f} s ({summary.users} utilisateurs, {summary.shares} partages)", file=sys.stderr)
+
+        output = os.path.join(directory, "result.json")
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{database_path}", "ACCESS_TOKEN_EXPIRE_MINUTES": "1440"}
+        command = [
+            sys.executable, "-m", "benchmarks.bench_endpoints", "--worker", database_path, "--worker-output", output,
+            "--requests", str(requests), "--concurrency", str(concurrency),
+        ]
+        # Les messages de l'application (stdout) sont écartés, la progression passe par stderr
+        returncode = subprocess.run(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL).returncode
+        if returncode != 0:
+            # Ex. processus tué faute de mémoire (-9) : la suite s'arrête, rien n'est écrit ni enregistré
+            # comme référence (une taille manquante ne doit pas passer pour un résultat)
+            raise SystemExit(f"\n❌ {size} notes : processus de mesure terminé avec le code {returncode}")
+        with open(output) as handle:
+            result = json.load(handle)
+    result["seed"] = {"users": summary.users, "tags": summary.tags, "shares": summary.shares, "note_tags": summary.note_tags, "seconds": round(summary.seconds, 1)}
+    return result
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_delta_ms: float) -> List[str]:
+    """
+    Affiche l'écart à la référence ; renvoie les routes en régression. Une route n'est en
+    régression que si son p50 et son p95 dépassent tous deux la référence de plus de `tolerance` :
+    un p95 seul varie fortement d'une exécution à l'autre (GC, checkpoint WAL, ordonnancement).
+    """
+    regressions = []
+    for size, result in current["sizes"].items():
+        reference = baseline.get("sizes", {}).get(size)
+        if reference is None:
+            print(f"\n{size} notes : pas de référence")
+            continue
+        print(f"\n{size} notes{'':<47} {'p50 réf.':>9} {'p50':>9} {'écart':>7} {'p95 réf.':>9} {'p95':>9} {'écart':>7} {'req/s':>7}")
+        for route, stats in result["routes"].items():
+            before = reference["routes"].get(route)
+            if before is None:
+                print(f"  {route:<58} (nouvelle route)")
+                continue
+            deltas = {
+                key: stats[key] / before[key] - 1 if before[key] else 0.0
+                for key in ("p50_ms", "p95_ms")
+            }
+            regressed = all(
+                deltas[key] > tolerance and stats[key] - before[key] > min_delta_ms for key in deltas
+            )
+            if regressed:
+                regressions.append(f"{size} {route}")
+            print(
+                f"{'❌' if regressed else '  '}{route:<58} {before['p50_ms']:9.1f} {stats['p50_ms']:9.1f} {deltas['p50_ms']:+7.0%} "
+                f"{before['p95_ms']:9.1f} {stats['p95_ms']:9.1f} {deltas['p95_ms']:+7.0%} {stats['throughput_rps']:7.0f}"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output", default="bench_endpoints.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Écart relatif toléré (0.5 = 50 %%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Écart absolu ignoré en deçà")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--worker-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = asyncio.run(drive(args.worker, args.requests, args.concurrency))
+        with open(args.worker_output, "w") as handle:
+            json.dump(result, handle)
+        return
+
+    current = {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "sizes": {str(size): run_size(size, args.requests, args.concurrency) for size in args.sizes},
+    }
+    with open(args.output, "w") as handle:
+        json.dump(current, handle, indent=2, ensure_ascii=False)
+    print(f"\nRésultats écrits dans {args.output}")
+
+    failures = []
+    for size, result in current["sizes"].items():
+        failures += [f"{size} : route non couverte {route}" for route in result["uncovered_routes"]]
+        failures += [
+            f"{size} : {route} — {stats['errors']} erreur(s), ex. {stats['first_error']}"
+            for route, stats in result["routes"].items() if stats["errors"]
+        ]
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as handle:
+            failures += [f"régression : {route}" for route in compare(current, json.load(handle), args.tolerance, args.min_delta_ms)]
+    else:
+        print(f"\nPas de référence ({args.baseline}) : relancer avec --save-baseline pour en créer une")
+
+    if args.save_baseline and failures:
+        print("\nRéférence non enregistrée : la mesure comporte des échecs")
+    elif args.save_baseline:
+        with open(args.baseline, "w") as handle:
+            json.dump(current, handle, indent=2, ensure_ascii=False)
+        print(f"Référence enregistrée : {args.baseline}")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark de l'export en flux (services.note_export)
+
+Sur des bases SQLite générées de tailles croissantes (notes d'un même utilisateur, 3 tags par note),
+mesure pour l'export NDJSON et l'export zip de Markdown :
+- le délai avant le premier bloc envoyé
+- la durée totale et le volume produit
+- le pic de mémoire Python (tracemalloc) pendant l'export, comparé au chargement de toutes
+  les notes en une requête (selectinload des tags) suivi de leur sérialisation
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_export [--sizes 5000 20000 50000] [--batch 500]
+
+Le script échoue (code 1) si le pic de mémoire de l'export NDJSON double entre la plus petite
+et la plus grande base.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from database.database import Base
+from models.utilisateurs import Utilisateur
+from models.notes import Note
+from models.tag import Tag, note_tags
+from models.partage_note import PartageNote  # noqa: F401 (résolution des relations)
+from schemas.note_schema import NoteResponse
+from services.note_export import export_markdown_zip, export_ndjson
+
+
+def seed(path: str, notes: int, tags: int = 200):
+    rng = random.Random(42)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Utilisateur), [{"id": 1, "email": "export@bench.local", "mot_de_passe": "x", "est_actif": True}])
+        connection.execute(insert(Tag), [{"id": i, "nom": f"tag{i}"} for i in range(1, tags + 1)])
+        for offset in range(0, notes, 10000):
+            ids = range(offset + 1, min(notes, offset + 10000) + 1)
+            connection.execute(insert(Note), [
+                {"id": i, "titre": f"Note {i}", "contenu": "Lorem ipsum dolor sit amet " * rng.randint(5, 60),
+                 "owner_id": 1, "visibilite": "prive"}
+                for i in ids
+            ])
+            connection.execute(insert(note_tags), [
+                {"note_id": i, "tag_id": tag_id} for i in ids for tag_id in rng.sample(range(1, tags + 1), 3)
+            ])
+    engine.dispose()
+
+
+async def measure_export(session_factory, exporter, batch: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_chunk, size = None, 0
+    async with session_factory() as db:
+        async for chunk in exporter(db, 1, batch):
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - start
+            size += len(chunk)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return first_chunk, elapsed, size, peak
+
+
+async def measure_load_all(session_factory):
+    tracemalloc.start()
+    start = time.perf_counter()
+    async with session_factory() as db:
+        def load(session):
+            notes = session.query(Note).options(selectinload(Note.tags)).filter(Note.owner_id == 1).all()
+            return "\n".join(NoteResponse.model_validate(note).model_dump_json() for note in notes)
+        body = await db.run_sync(load)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, elapsed, len(body), peak
+
+
+async def run(path: str, batch: int):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    results = {
+        "ndjson": await measure_export(session_factory, export_ndjson, batch),
+        "markdown": await measure_export(session_factory, export_markdown_zip, batch),
+        "tout charger": await measure_load_all(session_factory),
+    }
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 20000, 50000])
+    parser.add_argument("--batch", type=int, default=500)
+    args = parser.parse_args()
+
+    peaks = []
+    print(f"{'notes':>7} {'mode':<13} {'1er bloc ms':>11} {'durée s':>8} {'Mo produits':>11} {'pic mémoire Mo':>14}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "export.db")
+            seed(path, size)
+            results = asyncio.run(run(path, args.batch))
+        for mode, (first_chunk, elapsed, produced, peak) in results.items():
+            print(f"{size:7} {mode:<13} {first_chunk * 1000:11.1f} {elapsed:8.2f} {produced / 1e6:11.1f} {peak / 1e6:14.1f}")
+        peaks.append(results["ndjson"][3])
+
+    if peaks[-1] > 2 * peaks[0]:
+        print("\n❌ La mémoire de l'export NDJSON croît avec le nombre de notes")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
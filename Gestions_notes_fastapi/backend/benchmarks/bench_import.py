@@ -0,0 +1,116 @@
+"""
+Benchmark de l'import en flux (services.note_import)
+
+Génère à la volée (sans jamais le tenir en mémoire) un flux NDJSON de --megabytes Mo, découpé en blocs
+de 64 Ko comme un corps de requête, et l'importe par lots de --chunk notes sur une base SQLite
+temporaire (profil par défaut, index FTS5). Affiche le débit et le pic de mémoire Python (tracemalloc)
+pour des tailles croissantes.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_import [--megabytes 25 100] [--chunk 500]
+
+Le script échoue (code 1) si le pic de mémoire double entre le plus petit et le plus gros import.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from config import settings
+from database.database import Base
+from database.fts import create_notes_fts
+from database.storage import apply_profile, build_profile, engine_options
+from models.utilisateurs import Utilisateur
+from models.partage_note import PartageNote  # noqa: F401 (résolution des relations)
+from services.note_import import ImportReport, import_notes, iter_ndjson_records
+from services.note_service import AsyncNoteService
+
+BLOCK_SIZE = 64 * 1024
+
+
+async def ndjson_body(megabytes: int):
+    """Corps NDJSON généré bloc par bloc"""
+    rng = random.Random(42)
+    limit, produced, pending, index = megabytes * 1024 * 1024, 0, bytearray(), 0
+    while produced < limit:
+        note = {
+            "titre": f"Note importée {index}",
+            "contenu": "Lorem ipsum dolor sit amet #import " * rng.randint(5, 60),
+            "visibilite": "prive",
+            "tags": [f"tag{rng.randrange(300)}" for _ in range(3)],
+        }
+        pending += json.dumps(note).encode() + b"\n"
+        index += 1
+        while len(pending) >= BLOCK_SIZE:
+            yield bytes(pending[:BLOCK_SIZE])
+            produced += BLOCK_SIZE
+            del pending[:BLOCK_SIZE]
+    if pending:
+        yield bytes(pending)
+
+
+async def run(path: str, megabytes: int, chunk: int):
+    url = make_url(f"sqlite:///{path}")
+    profile = build_profile(settings)
+    sync_engine = create_engine(url, **engine_options(url, profile))
+    apply_profile(sync_engine, profile)
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as connection:
+        create_notes_fts(connection)
+        connection.execute(insert(Utilisateur), [{"id": 1, "email": "import@bench.local", "mot_de_passe": "x", "est_actif": True}])
+    sync_engine.dispose()
+
+    async_url = url.set(drivername="sqlite+aiosqlite")
+    engine = create_async_engine(async_url, poolclass=AsyncAdaptedQueuePool, **engine_options(async_url, profile))
+    apply_profile(engine.sync_engine, profile)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    async with session_factory() as db:
+        report = await import_notes(
+            AsyncNoteService(db), iter_ndjson_records(ndjson_body(megabytes), settings.import_max_record_bytes), 1, ImportReport(0), chunk
+        )
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    await engine.dispose()
+    return report, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=int, nargs="+", default=[25, 100])
+    parser.add_argument("--chunk", type=int, default=500)
+    args = parser.parse_args()
+
+    peaks = []
+    print(f"{'Mo':>5} {'notes':>8} {'lots':>5} {'durée s':>8} {'notes/s':>8} {'Mo/s':>6} {'pic mémoire Mo':>14}")
+    for megabytes in args.megabytes:
+        with tempfile.TemporaryDirectory() as directory:
+            report, elapsed, peak = asyncio.run(run(os.path.join(directory, "import.db"), megabytes, args.chunk))
+        print(
+            f"{megabytes:5} {report.created:8} {len(report.chunks):5} {elapsed:8.1f} {report.created / elapsed:8.0f} "
+            f"{megabytes / elapsed:6.1f} {peak / 1e6:14.1f}"
+        )
+        peaks.append(peak)
+
+    if peaks[-1] > 2 * peaks[0]:
+        print("\n❌ La mémoire de l'import croît avec la taille du fichier")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
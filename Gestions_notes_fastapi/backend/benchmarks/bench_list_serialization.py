@@ -0,0 +1,202 @@
+"""
+Benchmark de la sérialisation des listes de notes (utils.note_json)
+
+1. Sérialisation seule d'une page de --page notes (3 tags, ~600 caractères de Markdown chacune) :
+   - FastAPI : validation par le response_model (from_attributes) puis JSONResponse, comme
+     lorsqu'une route renvoie ses objets ORM
+   - TypeAdapter préconstruit : validation from_attributes et dump_json par pydantic-core
+   - lignes + orjson : dictionnaires construits sur les notes et FastJSONResponse (chemin actuel)
+   Les trois corps JSON doivent être identiques une fois décodés.
+2. Routes réelles (application en mémoire sur une base générée de --notes notes) :
+   GET /notes/, /notes/search/, /search/notes et la pagination par curseur, avec
+   FAST_LIST_RESPONSES activé puis désactivé ; latence médiane et égalité des réponses.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_list_serialization [--page 100] [--notes 5000] [--requests 200]
+
+Le script échoue (code 1) si un corps diffère d'un chemin à l'autre, ou si le chemin rapide
+n'est pas au moins deux fois plus rapide que FastAPI pour la sérialisation seule.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List, Union
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import httpx
+
+MIN_SPEEDUP = 2.0
+
+
+def sample_notes(count: int):
+    """Notes ORM transitoires (non attachées à une session), tags compris"""
+    from benchmarks.synthetic_data import WORDS
+    from models.notes import Note
+    from models.tag import Tag
+
+    rng = random.Random(7)
+    tags = [Tag(id=i, nom=f"tag-{i}") for i in range(1, 51)]
+    origin = datetime(2024, 1, 1)
+    notes = []
+    for note_id in range(1, count + 1):
+        created = origin + timedelta(seconds=rng.randrange(10 ** 7), microseconds=rng.randrange(10 ** 6))
+        notes.append(Note(
+            id=note_id,
+            titre=f"Note {note_id}",
+            contenu="## Titre\n\n" + " ".join(rng.choices(WORDS, k=80)),
+            owner_id=1,
+            visibilite="public" if note_id % 10 == 0 else "prive",
+            token_publique=f"token-{note_id}" if note_id % 10 == 0 else None,
+            date_creation=created,
+            date_modification=created + timedelta(hours=1),
+            tags=rng.sample(tags, 3),
+        ))
+    return notes
+
+
+def timed(function, repeat: int) -> float:
+    """Meilleur temps moyen par appel (secondes) sur 5 séries"""
+    function()
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def serialization(page: int, repeat: int):
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from pydantic import TypeAdapter
+
+    from schemas.note_schema import NotePage, NoteResponse
+    from utils.note_json import FastJSONResponse, note_row
+
+    notes = sample_notes(page)
+    field = create_response_field(name="response", type_=Union[List[NoteResponse], NotePage], mode="serialization")
+    adapter = TypeAdapter(List[NoteResponse])
+    loop = asyncio.new_event_loop()
+
+    def fastapi_path() -> bytes:
+        content = loop.run_until_complete(serialize_response(field=field, response_content=notes))
+        return JSONResponse(content).body
+
+    def type_adapter_path() -> bytes:
+        return adapter.dump_json(adapter.validate_python(notes, from_attributes=True))
+
+    def fast_path() -> bytes:
+        return FastJSONResponse([note_row(note) for note in notes]).body
+
+    variants = {"FastAPI (response_model)": fastapi_path, "TypeAdapter préconstruit": type_adapter_path, "lignes + orjson": fast_path}
+    bodies = {name: json.loads(function()) for name, function in variants.items()}
+    times = {name: timed(function, repeat) for name, function in variants.items()}
+    loop.close()
+    identical = all(body == bodies["FastAPI (response_model)"] for body in bodies.values())
+    return times, identical
+
+
+async def routes(database_path: str, requests: int):
+    from benchmarks.bench_endpoints import BENCH_USER_ID
+    from benchmarks.synthetic_data import WORDS
+    from config import settings
+    from main import app
+    from utils.security import create_access_token
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(BENCH_USER_ID)})}"}
+    urls = {
+        "GET /notes/ (limit=100)": "/api/v1/notes/notes/?limit=100",
+        "GET /notes/ (curseur)": "/api/v1/notes/notes/?limit=100&cursor=",
+        "GET /notes/search/": f"/api/v1/notes/notes/search/?query={WORDS[0]}&limit=100",
+        "GET /search/notes": f"/api/v1/search/notes?q={WORDS[1]}&limit=100",
+    }
+    results, mismatches = {}, []
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for name, url in urls.items():
+                latencies, bodies = {}, {}
+                for fast in (True, False):
+                    settings.fast_list_responses = fast
+                    samples = []
+                    for _ in range(requests):
+                        start = time.perf_counter()
+                        response = await client.get(url, headers=headers)
+                        samples.append(time.perf_counter() - start)
+                        assert response.status_code == 200, response.text[:200]
+                    latencies[fast] = statistics.median(samples)
+                    bodies[fast] = response.json()
+                if bodies[True] != bodies[False]:
+                    mismatches.append(name)
+                results[name] = (latencies[False], latencies[True], len(response.content))
+    finally:
+        settings.fast_list_responses = True
+        await app.router.shutdown()
+    return results, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, "bench.db")
+        # Les moteurs SQLAlchemy lisent DATABASE_URL à l'import : à fixer avant tout import du projet
+        os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+        from benchmarks.synthetic_data import seed
+        from database.database import async_engine, async_read_engine
+
+        times, identical = serialization(args.page, args.repeat)
+        print(f"Sérialisation de {args.page} notes")
+        print(f"{'chemin':<28} {'ms':>8}")
+        for name, seconds in times.items():
+            print(f"{name:<28} {seconds * 1000:8.3f}")
+
+        seed(database_path, args.notes)
+
+        async def run():
+            try:
+                return await routes(database_path, args.requests)
+            finally:
+                await async_engine.dispose()
+                await async_read_engine.dispose()
+
+        results, mismatches = asyncio.run(run())
+
+    print(f"\nRoutes ({args.notes} notes, médiane sur {args.requests} requêtes)")
+    print(f"{'route':<26} {'standard ms':>12} {'rapide ms':>10} {'gain':>6} {'octets':>8}")
+    for name, (standard, fast, size) in results.items():
+        print(f"{name:<26} {standard * 1000:12.2f} {fast * 1000:10.2f} {standard / fast:5.1f}x {size:8d}")
+
+    speedup = times["FastAPI (response_model)"] / times["lignes + orjson"]
+    failed = False
+    if not identical or mismatches:
+        print(f"\n❌ Corps JSON différents entre les chemins : {', '.join(mismatches) or 'sérialisation seule'}")
+        failed = True
+    if speedup < MIN_SPEEDUP:
+        print(f"\n❌ Chemin rapide seulement {speedup:.1f} fois plus rapide que FastAPI (minimum {MIN_SPEEDUP:.0f})")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
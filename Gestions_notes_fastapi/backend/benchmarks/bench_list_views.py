@@ -0,0 +1,155 @@
+"""
+Benchmark des vues de liste : complète, résumée (view=summary) et champs choisis (fields=)
+
+Base générée de --notes notes (benchmarks.synthetic_data), dont les notes de l'utilisateur de
+benchmark sont allongées à environ --body-kb Ko de Markdown (aperçu recalculé). Pour
+GET /notes/ (curseur, --limit notes) et GET /search/notes, en vue complète, résumée et
+fields=id,titre : latence médiane, taille de la réponse, pic d'allocation Python (tracemalloc)
+et requêtes SQL (Server-Timing). L'aperçu renvoyé en vue résumée est comparé à
+get_content_preview() du contenu renvoyé en vue complète.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_list_views [--notes 5000] [--body-kb 20] [--requests 100]
+
+Le script échoue (code 1) si un aperçu diffère, si une réponse résumée contient le contenu, ou si
+la réponse résumée de GET /notes/ n'est pas au moins dix fois plus petite que la réponse complète.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import httpx
+
+MIN_SIZE_RATIO = 10.0
+
+VIEWS = {"complète": "", "résumée": "&view=summary", "id,titre": "&fields=id,titre"}
+
+
+def lengthen_notes(database_path: str, utilisateur_id: int, body_kb: int) -> int:
+    """Contenu des notes de l'utilisateur allongé à ~body_kb Ko (paragraphes générés), aperçu recalculé"""
+    from sqlalchemy import create_engine, update
+
+    from benchmarks.synthetic_data import markdown_body
+    from models.notes import Note
+
+    rng = random.Random(11)
+    engine = create_engine(f"sqlite:///{database_path}")
+    with engine.begin() as connection:
+        note_ids = connection.execute(Note.__table__.select().with_only_columns(Note.id).where(Note.owner_id == utilisateur_id)).scalars().all()
+        for note_id in note_ids:
+            blocks = []
+            while sum(len(block) for block in blocks) < body_kb * 1024:
+                blocks.append(markdown_body(rng, []))
+            contenu = "\n\n".join(blocks)
+            connection.execute(update(Note).where(Note.id == note_id).values(contenu=contenu, apercu=Note.preview(contenu)))
+    engine.dispose()
+    return len(note_ids)
+
+
+async def measure(limit: int, requests: int):
+    from benchmarks.bench_endpoints import BENCH_USER_ID
+    from benchmarks.synthetic_data import WORDS
+    from core.query_stats import parse_server_timing
+    from main import app
+    from utils.markdown import get_content_preview
+    from utils.security import create_access_token
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(BENCH_USER_ID)})}"}
+    routes = {
+        "GET /notes/": f"/api/v1/notes/notes/?limit={limit}&cursor=",
+        "GET /search/notes": f"/api/v1/search/notes?q={WORDS[0]}&limit={limit}",
+    }
+    results, errors = {}, []
+    await app.router.startup()
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            for route, url in routes.items():
+                bodies = {}
+                for view, suffix in VIEWS.items():
+                    samples = []
+                    for _ in range(requests):
+                        start = time.perf_counter()
+                        response = await client.get(url + suffix, headers=headers)
+                        samples.append(time.perf_counter() - start)
+                        assert response.status_code == 200, response.text[:200]
+                    tracemalloc.start()
+                    await client.get(url + suffix, headers=headers)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    timing = parse_server_timing(response.headers.get("server-timing", "")) or {}
+                    results[(route, view)] = (statistics.median(samples), len(response.content), peak, timing.get("queries"))
+                    body = response.json()
+                    bodies[view] = body["items"] if isinstance(body, dict) else body
+
+                full = {row["id"]: row for row in bodies["complète"]}
+                for row in bodies["résumée"]:
+                    if "contenu" in row:
+                        errors.append(f"{route} : contenu présent en vue résumée")
+                        break
+                    if row["id"] in full and row["apercu"] != get_content_preview(full[row["id"]]["contenu"]):
+                        errors.append(f"{route} : aperçu de la note {row['id']} différent de get_content_preview()")
+                        break
+    finally:
+        await app.router.shutdown()
+    return results, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--body-kb", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, "bench.db")
+        # Les moteurs SQLAlchemy lisent DATABASE_URL à l'import : à fixer avant tout import du projet
+        os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+        from benchmarks.bench_endpoints import BENCH_USER_ID
+        from benchmarks.synthetic_data import seed
+        from database.database import async_engine, async_read_engine
+
+        seed(database_path, args.notes)
+        lengthened = lengthen_notes(database_path, BENCH_USER_ID, args.body_kb)
+
+        async def run():
+            try:
+                return await measure(args.limit, args.requests)
+            finally:
+                await async_engine.dispose()
+                await async_read_engine.dispose()
+
+        results, errors = asyncio.run(run())
+
+    print(f"{lengthened} notes de ~{args.body_kb} Ko, pages de {args.limit} notes, médiane sur {args.requests} requêtes")
+    print(f"{'route':<18} {'vue':<10} {'ms':>8} {'octets':>10} {'pic Ko':>8} {'SQL':>4}")
+    for (route, view), (seconds, size, peak, queries) in results.items():
+        print(f"{route:<18} {view:<10} {seconds * 1000:8.2f} {size:10d} {peak / 1024:8.0f} {queries or '-':>4}")
+
+    ratio = results[("GET /notes/", "complète")][1] / results[("GET /notes/", "résumée")][1]
+    failed = False
+    for error in errors:
+        print(f"\n❌ {error}")
+        failed = True
+    if ratio < MIN_SIZE_RATIO:
+        print(f"\n❌ Réponse résumée seulement {ratio:.1f} fois plus petite que la réponse complète (minimum {MIN_SIZE_RATIO:.0f})")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark du coût des logs pour le thread qui les émet (core.structured_logging)
+
+Le pipeline QueueHandler -> QueueListener est installé avec une sortie vers /dev/null ; on mesure
+le temps moyen d'un appel de log côté appelant, listener arrêté pendant la mesure (sur une
+machine à un cœur, son formatage JSON s'intercalerait dans le chronométrage), pour :
+- un enregistrement écarté par le niveau (logger.debug avec LOG_LEVEL=INFO)
+- un événement écarté par sample_event() avant création de l'enregistrement (taux 0)
+- un événement écarté par le filtre d'échantillonnage du handler (taux 0)
+- un enregistrement conservé, avec champs `extra` et identifiant de requête
+- à titre de comparaison, un print() vers /dev/null (ancien comportement ; vers un terminal ou un
+  tube, l'écriture peut bloquer l'appelant, ce que la file évite)
+Le temps d'écriture par le listener (formatage JSON compris) est ensuite mesuré en vidant la file.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_logging_overhead [--records 100000]
+
+Le script échoue (code 1) si un enregistrement conservé coûte plus de 20 µs à l'appelant.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import structured_logging
+from core.structured_logging import configure_logging, logging_stats, request_id_var, sample_event
+
+BUDGET_US = 20.0
+
+
+def timed(function, records: int) -> float:
+    """Temps moyen par appel (secondes)"""
+    start = time.perf_counter()
+    for index in range(records):
+        function(index)
+    return (time.perf_counter() - start) / records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    configure_logging("INFO", json_output=True, sample_rates={"bench.sampled": 0.0}, queue_size=args.records * 2)
+    listener = structured_logging._listener
+    listener.stop()
+    for handler in listener.handlers:
+        handler.setStream(devnull)
+    logger = logging.getLogger("bench")
+    request_id_var.set("0123456789abcdef0123456789abcdef")
+
+    def sampled_before(index):
+        rate = sample_event("bench.sampled")
+        if rate is not None:
+            logger.info("Note %d lue", index, extra={"event": "bench.sampled", "sample_rate": rate})
+
+    cases = {
+        "niveau écarté (debug)": lambda i: logger.debug("Note %d lue", i),
+        "écarté par sample_event": sampled_before,
+        "écarté par le filtre": lambda i: logger.info("Note %d lue", i, extra={"event": "bench.sampled"}),
+        "enregistrement conservé": lambda i: logger.info("Note %d lue", i, extra={"event": "bench.kept", "note_id": i, "duration_ms": 1.5}),
+        "print() synchrone": lambda i: print(f"DEBUG: note {i} lue", file=devnull, flush=True),
+    }
+    results = {}
+    for name, function in cases.items():
+        timed(function, args.records // 10)
+        results[name] = timed(function, args.records)
+
+    pending = logging_stats()["queue_depth"]
+    start = time.perf_counter()
+    listener.start()
+    listener.queue.join()
+    results["écriture par le listener"] = (time.perf_counter() - start) / pending
+
+    print(f"{'appel':<26} {'µs / appel':>11}")
+    for name, seconds in results.items():
+        print(f"{name:<26} {seconds * 1e6:11.2f}")
+    print(f"\nenregistrements abandonnés (file pleine) : {logging_stats()['dropped']}")
+
+    if results["enregistrement conservé"] * 1e6 > BUDGET_US:
+        print(f"\n❌ Un enregistrement conservé coûte plus de {BUDGET_US:.0f} µs à l'appelant")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
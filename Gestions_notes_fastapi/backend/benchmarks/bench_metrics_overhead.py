@@ -0,0 +1,119 @@
+"""
+Benchmark du coût de l'instrumentation HTTP (core.metrics.MetricsMiddleware)
+
+Deux mesures, par appels ASGI directs (sans client HTTP, dont le coût masquerait l'écart) :
+- middleware seul : application ASGI minimale (réponse de 2 octets, route déjà résolue dans
+  le scope) appelée avec et sans MetricsMiddleware
+- application FastAPI : une route JSON avec paramètre de chemin, avec et sans le middleware
+
+Chaque variante est répétée --repeat fois (--requests requêtes à chaque fois, variantes alternées)
+et la meilleure répétition est retenue ; le surcoût est l'écart de temps moyen par requête.
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_metrics_overhead [--requests 50000] [--repeat 7]
+
+Le script échoue (code 1) si l'un des deux surcoûts dépasse 20 µs par requête.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+
+from core.metrics import HttpMetrics, MetricsMiddleware
+
+BUDGET_US = 20.0
+
+
+class _Route:
+    path = "/api/v1/notes/notes/{note_id}"
+
+
+_ROUTE = _Route()
+_START = {"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]}
+_BODY = {"type": "http.response.body", "body": b"{}"}
+
+
+async def minimal_app(scope, receive, send):
+    scope["route"] = _ROUTE
+    await send(_START)
+    await send(_BODY)
+
+
+def fastapi_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/notes/notes/{note_id}")
+    async def get_note(note_id: int):
+        return {"id": note_id, "titre": "Note"}
+
+    return app
+
+
+def make_scope(path: str):
+    return {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1234), "server": ("bench", 80),
+    }
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def timed(app, path: str, requests: int) -> float:
+    """Temps moyen par requête (secondes)"""
+    template = make_scope(path)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(template), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+async def compare(bare, instrumented, path: str, requests: int, repeat: int):
+    best_bare, best_instrumented = float("inf"), float("inf")
+    await timed(bare, path, requests // 10)
+    await timed(instrumented, path, requests // 10)
+    for _ in range(repeat):
+        best_bare = min(best_bare, await timed(bare, path, requests))
+        best_instrumented = min(best_instrumented, await timed(instrumented, path, requests))
+    return best_bare, best_instrumented
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    metrics = HttpMetrics()
+    app = fastapi_app()
+    results = {
+        "middleware seul": asyncio.run(compare(
+            minimal_app, MetricsMiddleware(minimal_app, metrics), "/api/v1/notes/notes/42", args.requests, args.repeat
+        )),
+        "application FastAPI": asyncio.run(compare(
+            app, MetricsMiddleware(app, metrics), "/api/v1/notes/notes/42", args.requests // 5, args.repeat
+        )),
+    }
+
+    print(f"{'mesure':<20} {'sans µs':>9} {'avec µs':>9} {'surcoût µs':>11}")
+    for name, (bare, instrumented) in results.items():
+        print(f"{name:<20} {bare * 1e6:9.2f} {instrumented * 1e6:9.2f} {(instrumented - bare) * 1e6:11.2f}")
+
+    if any((instrumented - bare) * 1e6 > BUDGET_US for bare, instrumented in results.values()):
+        print(f"\n❌ Surcoût de l'instrumentation supérieur à {BUDGET_US:.0f} µs par requête")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark des profils de stockage SQLite (database.storage.PROFILES)
+
+Pour chaque profil, sur une base générée (avec l'index FTS5 et ses triggers) :
+- des lecteurs enchaînent NoteRepository.get_user_notes (première page de 20 notes)
+- des écrivains enchaînent création d'une note + modification d'une autre, une transaction chacune
+pendant une durée fixe ; le script affiche le débit et le p99 des lectures et des écritures,
+et le nombre d'opérations en échec ("database is locked" une fois busy_timeout dépassé).
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_storage_profiles [--duration 5] [--readers 8] [--writers 2] [--profiles legacy wal durable]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from database.database import Base
+from database.fts import create_notes_fts
+from database.storage import PROFILES, apply_profile, current_pragmas, engine_options
+from models.notes import Note
+from repositories.note_repository import NoteRepository
+from benchmarks.bench_user_notes_query import seed
+
+
+class Counters:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def record(self, elapsed: float, ok: bool):
+        with self.lock:
+            if ok:
+                self.latencies.append(elapsed)
+            else:
+                self.errors += 1
+
+
+def reader(engine, utilisateur_id: int, stop: threading.Event, counters: Counters):
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with Session(engine) as db:
+                NoteRepository(db).get_user_notes(utilisateur_id, 0, 20)
+            ok = True
+        except OperationalError:
+            ok = False
+        counters.record(time.perf_counter() - start, ok)
+
+
+def writer(engine, utilisateur_id: int, note_ids, stop: threading.Event, counters: Counters, seed_value: int):
+    rng = random.Random(seed_value)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            with Session(engine) as db:
+                db.add(Note(titre="Nouvelle note", contenu="lorem ipsum " * 20, owner_id=utilisateur_id, visibilite="prive"))
+                db.commit()
+                db.execute(update(Note).where(Note.id == rng.choice(note_ids)).values(contenu="modifié " * 20))
+                db.commit()
+            ok = True
+        except OperationalError:
+            ok = False
+        counters.record(time.perf_counter() - start, ok)
+
+
+def p99(latencies) -> float:
+    if not latencies:
+        return 0.0
+    latencies = sorted(latencies)
+    return latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000
+
+
+def run_profile(profile, args):
+    with tempfile.TemporaryDirectory() as directory:
+        url = make_url(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        engine = create_engine(url, **engine_options(url, profile))
+        apply_profile(engine, profile)
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            create_notes_fts(connection)
+        utilisateur_id = seed(engine, users=50, notes=args.notes, shares_per_note=3, tags=100, tags_per_note=3)
+        with engine.connect() as connection:
+            pragmas = current_pragmas(connection)
+        note_ids = list(range(1, args.notes + 1))
+
+        reads, writes = Counters(), Counters()
+        stop = threading.Event()
+        threads = [threading.Thread(target=reader, args=(engine, utilisateur_id, stop, reads)) for _ in range(args.readers)]
+        threads += [
+            threading.Thread(target=writer, args=(engine, utilisateur_id, note_ids, stop, writes, index))
+            for index in range(args.writers)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    return pragmas, reads, writes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--profiles", nargs="+", default=list(PROFILES), choices=list(PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.readers} lecteurs, {args.writers} écrivains, {args.duration:.0f} s par profil, {args.notes} notes\n")
+    print(f"{'profil':<8} {'lectures/s':>10} {'p99 ms':>8} {'écritures/s':>11} {'p99 ms':>8} {'erreurs':>8}")
+    for name in args.profiles:
+        pragmas, reads, writes = run_profile(PROFILES[name], args)
+        print(
+            f"{name:<8} {len(reads.latencies) / args.duration:10.0f} {p99(reads.latencies):8.1f} "
+            f"{len(writes.latencies) / args.duration:11.0f} {p99(writes.latencies):8.1f} {reads.errors + writes.errors:8}"
+            f"   ({pragmas['journal_mode']}, synchronous={pragmas['synchronous']}, mmap={pragmas['mmap_size']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
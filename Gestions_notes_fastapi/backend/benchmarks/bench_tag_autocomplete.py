@@ -0,0 +1,134 @@
+"""
+Benchmark de l'auto-complétion des tags
+
+Simule la saisie caractère par caractère de noms de tags (un appel par frappe)
+et compare la latence :
+- sql    : TagRepository.search_tags (requête par préfixe sur tags.nom)
+- memory : index en mémoire search.tag_autocomplete, avec sa vérification de version en base
+  (refresh : une requête par frappe)
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_tag_autocomplete [--tags 20000] [--users 200]
+
+Le script échoue (code 1) si le p99 de l'index en mémoire dépasse 1 ms.
+"""
+import argparse
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from database.database import Base
+from models.utilisateurs import Utilisateur
+from models.notes import Note
+from models.tag import Tag, note_tags
+from models.partage_note import PartageNote  # noqa: F401 (résolution des relations)
+from models.user_note_revision import UserNoteRevision  # noqa: F401 (table créée par create_all)
+from repositories.tag_repository import TagRepository
+from search.tag_autocomplete import TagAutocomplete
+
+
+def seed(engine, users: int, tags: int, notes: int, tags_per_note: int, rng: random.Random):
+    """Tags aux préfixes communs + notes qui les utilisent (loi de puissance)"""
+    syllables = ["pro", "per", "tra", "con", "re", "de", "ma", "vo", "ca", "li"]
+    names = set()
+    while len(names) < tags:
+        names.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) + rng.choice(string.ascii_lowercase))
+    names = sorted(names)
+
+    with engine.begin() as connection:
+        connection.execute(insert(Utilisateur), [
+            {"id": i, "email": f"user{i}@bench.local", "mot_de_passe": "x", "est_actif": True}
+            for i in range(1, users + 1)
+        ])
+        connection.execute(insert(Tag), [{"id": i, "nom": nom} for i, nom in enumerate(names, start=1)])
+        connection.execute(insert(Note), [
+            {"id": i, "titre": f"Note {i}", "contenu": "", "owner_id": rng.randint(1, users), "visibilite": "prive"}
+            for i in range(1, notes + 1)
+        ])
+        weights = [1 / rank for rank in range(1, tags + 1)]
+        rows = set()
+        for note_id in range(1, notes + 1):
+            for tag_id in rng.choices(range(1, tags + 1), weights=weights, k=tags_per_note):
+                rows.add((note_id, tag_id))
+        connection.execute(insert(note_tags), [{"note_id": n, "tag_id": t} for n, t in rows])
+    return names
+
+
+def keystrokes(names, count: int, rng: random.Random):
+    """Préfixes successifs tapés par les utilisateurs"""
+    prefixes = []
+    while len(prefixes) < count:
+        nom = rng.choice(names)
+        prefixes.extend(nom[:length] for length in range(1, len(nom) + 1))
+    return prefixes[:count]
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return {
+        "p50": statistics.median(timings) * 1000,
+        "p99": timings[int(len(timings) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tags", type=int, default=20000)
+    parser.add_argument("--notes", type=int, default=20000)
+    parser.add_argument("--tags-per-note", type=int, default=3)
+    parser.add_argument("--keystrokes", type=int, default=5000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        print(f"Génération : {args.tags} tags, {args.notes} notes, {args.users} utilisateurs...")
+        names = seed(engine, args.users, args.tags, args.notes, args.tags_per_note, rng)
+        prefixes = keystrokes(names, args.keystrokes, rng)
+        users = [rng.randint(1, args.users) for _ in prefixes]
+
+        with Session(engine) as db:
+            TagRepository(db).rebuild_usage_stats()
+            db.commit()
+            autocomplete = TagAutocomplete()
+            start = time.perf_counter()
+            autocomplete.rebuild(db)
+            # Tags de chaque utilisateur chargés une fois (première saisie), hors mesure des frappes
+            for user in set(users):
+                autocomplete.refresh(db, user)
+            print(f"Construction de l'index : {(time.perf_counter() - start) * 1000:.1f} ms")
+
+            repository = TagRepository(db)
+            results = {}
+            for name, complete in (
+                ("sql", lambda user, prefix: repository.search_tags(prefix, 10)),
+                ("memory", lambda user, prefix: (autocomplete.refresh(db, user), autocomplete.complete(user, prefix, 10))),
+            ):
+                timings = []
+                for user, prefix in zip(users, prefixes):
+                    start = time.perf_counter()
+                    complete(user, prefix)
+                    timings.append(time.perf_counter() - start)
+                results[name] = percentiles(timings)
+                print(f"  {name:<7} p50 {results[name]['p50']:.3f} ms   p99 {results[name]['p99']:.3f} ms")
+        engine.dispose()
+
+    if results["memory"]["p99"] > 1.0:
+        print("\n❌ Le p99 de l'auto-complétion en mémoire dépasse 1 ms")
+        sys.exit(1)
+    print("\n✅ Auto-complétion en mémoire sous la milliseconde (p99)")
+
+
+if __name__ == "__main__":
+    main()
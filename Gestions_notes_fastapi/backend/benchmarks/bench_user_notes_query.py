@@ -0,0 +1,178 @@
+"""
+Benchmark des stratégies de requête de NoteRepository.get_user_notes
+
+Compare sur une base SQLite générée (beaucoup de partages par note) :
+- legacy    : OUTER JOIN partage_notes + DISTINCT + joinedload(tags) (ancienne version)
+- exists    : owner_id = ? OR EXISTS(partage) + selectinload(tags)
+- union_all : id IN (notes possédées UNION ALL notes partagées) + selectinload(tags)
+- repository: la méthode actuellement en place dans NoteRepository
+
+Usage (depuis backend/) :
+    python -m benchmarks.bench_user_notes_query [--notes 5000] [--shares-per-note 8]
+
+Le script échoue (code 1) si la stratégie en place est plus lente que l'ancienne.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, or_, select, exists
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from database.database import Base
+from models.utilisateurs import Utilisateur
+from models.notes import Note
+from models.tag import Tag, note_tags
+from models.partage_note import PartageNote
+from repositories.note_repository import NoteRepository
+
+
+def seed(engine, users: int, notes: int, shares_per_note: int, tags: int, tags_per_note: int) -> int:
+    """Remplit la base par insertions groupées ; renvoie l'utilisateur cible"""
+    rng = random.Random(42)
+    with engine.begin() as connection:
+        connection.execute(insert(Utilisateur), [
+            {"id": i, "email": f"user{i}@bench.local", "mot_de_passe": "x", "est_actif": True}
+            for i in range(1, users + 1)
+        ])
+        connection.execute(insert(Tag), [{"id": i, "nom": f"tag{i}"} for i in range(1, tags + 1)])
+
+        note_rows, share_rows, tag_rows = [], [], []
+        for note_id in range(1, notes + 1):
+            owner_id = rng.randint(1, users)
+            note_rows.append({
+                "id": note_id,
+                "titre": f"Note {note_id}",
+                "contenu": "Lorem ipsum " * 20,
+                "owner_id": owner_id,
+                "visibilite": "prive",
+            })
+            recipients = rng.sample(range(1, users + 1), shares_per_note)
+            share_rows.extend(
+                {"note_id": note_id, "utilisateur_id": owner_id, "partage_avec_utilisateur_id": recipient, "permission": "read"}
+                for recipient in recipients if recipient != owner_id
+            )
+            tag_rows.extend(
+                {"note_id": note_id, "tag_id": tag_id}
+                for tag_id in rng.sample(range(1, tags + 1), tags_per_note)
+            )
+
+        connection.execute(insert(Note), note_rows)
+        connection.execute(insert(PartageNote), share_rows)
+        connection.execute(insert(note_tags), tag_rows)
+    return 1
+
+
+def legacy(db: Session, utilisateur_id: int, skip: int, limit: int):
+    return (
+        db.query(Note)
+        .options(joinedload(Note.tags))
+        .outerjoin(PartageNote, Note.id == PartageNote.note_id)
+        .filter(or_(Note.owner_id == utilisateur_id, PartageNote.partage_avec_utilisateur_id == utilisateur_id))
+        .distinct()
+        .order_by(Note.date_modification.desc(), Note.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+def exists_strategy(db: Session, utilisateur_id: int, skip: int, limit: int):
+    shared = exists(select(PartageNote.id).where(
+        PartageNote.note_id == Note.id,
+        PartageNote.partage_avec_utilisateur_id == utilisateur_id
+    ))
+    return (
+        db.query(Note)
+        .options(selectinload(Note.tags))
+        .filter(or_(Note.owner_id == utilisateur_id, shared))
+        .order_by(Note.date_modification.desc(), Note.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+def union_all_strategy(db: Session, utilisateur_id: int, skip: int, limit: int):
+    return (
+        db.query(Note)
+        .options(selectinload(Note.tags))
+        .filter(Note.id.in_(NoteRepository._accessible_note_ids(utilisateur_id)))
+        .order_by(Note.date_modification.desc(), Note.id.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+def repository(db: Session, utilisateur_id: int, skip: int, limit: int):
+    return NoteRepository(db).get_user_notes(utilisateur_id, skip, limit)
+
+
+STRATEGIES = {
+    "legacy": legacy,
+    "exists": exists_strategy,
+    "union_all": union_all_strategy,
+    "repository": repository,
+}
+
+
+def measure(engine, strategy, utilisateur_id: int, skip: int, limit: int, repeat: int):
+    timings, ids = [], None
+    for _ in range(repeat):
+        with Session(engine) as db:
+            start = time.perf_counter()
+            notes = strategy(db, utilisateur_id, skip, limit)
+            # Forcer le chargement des tags comme le ferait la sérialisation
+            ids = [(note.id, sorted(tag.id for tag in note.tags)) for note in notes]
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings), ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--notes", type=int, default=5000)
+    parser.add_argument("--shares-per-note", type=int, default=8)
+    parser.add_argument("--tags", type=int, default=300)
+    parser.add_argument("--tags-per-note", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        print(f"Génération : {args.notes} notes, {args.shares_per_note} partages/note, {args.tags_per_note} tags/note...")
+        utilisateur_id = seed(engine, args.users, args.notes, args.shares_per_note, args.tags, args.tags_per_note)
+
+        results = {}
+        for page, skip in (("première page", 0), ("page profonde", 500)):
+            print(f"\n{page} (skip={skip}, limit=100)")
+            reference = None
+            for name, strategy in STRATEGIES.items():
+                median, ids = measure(engine, strategy, utilisateur_id, skip, 100, args.repeat)
+                results[(name, skip)] = median
+                if reference is None:
+                    reference = ids
+                status = "ok" if ids == reference else "RÉSULTATS DIFFÉRENTS"
+                print(f"  {name:<11} {median * 1000:8.2f} ms  [{status}]")
+                if ids != reference:
+                    sys.exit(1)
+        engine.dispose()
+
+    slower = [skip for (name, skip), median in results.items()
+              if name == "repository" and median > results[("legacy", skip)]]
+    if slower:
+        print("\n❌ La stratégie en place est plus lente que l'ancienne requête")
+        sys.exit(1)
+    print("\n✅ La stratégie en place est plus rapide que l'ancienne requête")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Générateur de données synthétiques pour les benchmarks
+
+Remplit une base SQLite neuve par insertions groupées (Core, executemany par lots de 10 000) :
+- utilisateurs (un par --notes-per-user notes, au moins 100), même mot de passe haché pour tous
+- notes au contenu Markdown réaliste (titres, listes, blocs de code, liens, #tags), de longueur
+  log-normale, dates étalées sur deux ans ; propriétaires et tags tirés selon une loi de Zipf
+  (quelques utilisateurs et quelques tags concentrent l'essentiel des notes)
+- graphe de partage : chaque utilisateur partage avec un petit cercle de collaborateurs,
+  eux-mêmes tirés selon une loi de Zipf (quelques utilisateurs reçoivent beaucoup de partages)
+- ~10 % de notes publiques (token_publique)
+
+L'index FTS5 est construit en une passe après les insertions, puis les compteurs user_tag_stats
+sont recalculés (TagRepository.rebuild_usage_stats).
+
+Usage (depuis backend/) :
+    python -m benchmarks.synthetic_data --notes 100000 --output bench.db
+"""
+import argparse
+import bisect
+import itertools
+import os
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Sequence
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import Session
+
+from database.database import Base
+from database.fts import create_notes_fts
+from models.utilisateurs import Utilisateur
+from models.notes import Note
+from models.tag import Tag, note_tags
+from models.partage_note import PartageNote
+from models.user_tag_stats import UserTagStats  # noqa: F401 (table créée par create_all)
+from models.user_note_revision import UserNoteRevision  # noqa: F401 (table créée par create_all)
+from repositories.tag_repository import TagRepository
+from utils.security import hash_password
+
+# Mot de passe commun des utilisateurs générés (haché une seule fois)
+PASSWORD = "benchmark-password"
+BATCH_SIZE = 10000
+PUBLIC_RATIO = 0.1
+SHARED_RATIO = 0.15
+
+WORDS = (
+    "projet réunion client budget planning sprint revue livraison architecture api base données "
+    "migration index requête cache performance latence serveur déploiement test recette bug correctif "
+    "documentation spécification maquette design utilisateur équipe objectif trimestre roadmap idée "
+    "lecture article recette cuisine voyage sport santé famille courses factures banque impôts"
+).split()
+
+_TAG_STEMS = (
+    "travail perso idées todo urgent projet python sql fastapi devops lecture recettes voyage "
+    "finance santé sport famille réunion client design backend frontend mobile data ml sécurité"
+).split()
+
+_CODE_SNIPPETS = (
+    "SELECT id, titre FROM notes WHERE owner_id = ?;",
+    "def handler(request):\n    return {\"status\": \"ok\"}",
+    "git rebase -i origin/main",
+    "docker compose up -d api",
+)
+
+
+@dataclass(frozen=True)
+class SeedSummary:
+    notes: int
+    users: int
+    tags: int
+    shares: int
+    note_tags: int
+    seconds: float
+
+
+class Zipf:
+    """Tirage de rangs 1..n de probabilité proportionnelle à 1 / rang ** exponent"""
+
+    def __init__(self, n: int, exponent: float = 1.1):
+        self.n = n
+        self._cumulative = list(itertools.accumulate(1.0 / rank ** exponent for rank in range(1, n + 1)))
+
+    def sample(self, rng: random.Random) -> int:
+        return bisect.bisect_left(self._cumulative, rng.random() * self._cumulative[-1]) + 1
+
+    def sample_distinct(self, rng: random.Random, k: int) -> List[int]:
+        k = min(k, self.n)
+        chosen: Dict[int, None] = {}
+        while len(chosen) < k:
+            chosen[self.sample(rng)] = None
+        return list(chosen)
+
+
+def tag_names(count: int) -> List[str]:
+    """Noms de tags : les plus fréquents (rangs de tête) sont les plus courts"""
+    names = list(_TAG_STEMS)
+    for index in itertools.count(1):
+        if len(names) >= count:
+            break
+        names.extend(f"{stem}-{index}" for stem in _TAG_STEMS)
+    return names[:count]
+
+
+def markdown_body(rng: random.Random, tags: Sequence[str]) -> str:
+    """Contenu Markdown de longueur log-normale (médiane ~60 mots), #tags en fin de paragraphe"""
+    words = max(8, int(rng.lognormvariate(4.1, 0.7)))
+    blocks = [f"## {rng.choice(WORDS).capitalize()} {rng.choice(WORDS)}"]
+    while words > 0:
+        kind = rng.random()
+        if kind < 0.15:
+            items = rng.randint(2, 5)
+            blocks.append("\n".join(f"- {' '.join(rng.choices(WORDS, k=rng.randint(2, 6)))}" for _ in range(items)))
+            words -= items * 4
+        elif kind < 0.2:
+            blocks.append(f"```\n{rng.choice(_CODE_SNIPPETS)}\n```")
+            words -= 6
+        else:
+            length = min(words, rng.randint(8, 40))
+            sentence = " ".join(rng.choices(WORDS, k=length)).capitalize()
+            if rng.random() < 0.1:
+                sentence += f" [voir]({'https://example.org/' + rng.choice(WORDS)})"
+            blocks.append(sentence + ".")
+            words -= length
+    if tags:
+        blocks.append(" ".join(f"#{tag}" for tag in tags))
+    return "\n\n".join(blocks)
+
+
+def _batches(rows: Iterator[dict], size: int = BATCH_SIZE) -> Iterator[List[dict]]:
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def seed(
+    path: str,
+    notes: int,
+    notes_per_user: int = 50,
+    tags: int = 2000,
+    max_tags_per_note: int = 5,
+    seed_value: int = 42,
+) -> SeedSummary:
+    """Crée et remplit la base SQLite `path` (qui ne doit pas exister)"""
+    start = time.perf_counter()
+    rng = random.Random(seed_value)
+    users = max(100, notes // notes_per_user)
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def _fast_load(dbapi_connection, _):
+        # Chargement initial : pas de journal ni de synchronisation (la base est jetable tant
+        # qu'elle n'est pas complète) ; l'application repasse en WAL à sa première connexion
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA cache_size=-256000")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    owner_zipf = Zipf(users, exponent=1.0)
+    tag_zipf = Zipf(tags, exponent=1.1)
+    names = tag_names(tags)
+    # Cercle de collaborateurs de chaque utilisateur, tiré une fois
+    collaborators = {user: [c for c in owner_zipf.sample_distinct(rng, 6) if c != user] for user in range(1, users + 1)}
+    origin = datetime(2024, 1, 1)
+    counts = {"shares": 0, "note_tags": 0}
+
+    def note_rows() -> Iterator[dict]:
+        for note_id in range(1, notes + 1):
+            owner_id = owner_zipf.sample(rng)
+            note_tag_ids = tag_zipf.sample_distinct(rng, rng.randint(0, max_tags_per_note))
+            created = origin + timedelta(seconds=rng.randrange(730 * 86400))
+            public = rng.random() < PUBLIC_RATIO
+            titre = f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS)} {note_id}"
+            contenu = markdown_body(rng, [names[tag_id - 1] for tag_id in note_tag_ids[:2]])
+            yield {
+                "id": note_id,
+                "titre": titre,
+                "contenu": contenu,
+                "apercu": Note.preview(contenu),
+                "owner_id": owner_id,
+                "visibilite": "public" if public else "prive",
+                "token_publique": str(uuid.UUID(int=rng.getrandbits(128), version=4)) if public else None,
+                "date_creation": created,
+                "date_modification": created + timedelta(seconds=rng.randrange(30 * 86400)),
+                "_tags": note_tag_ids,
+            }
+
+    with engine.begin() as connection:
+        hashed = hash_password(PASSWORD)
+        for batch in _batches({"id": i, "email": f"user{i}@bench.example.com", "mot_de_passe": hashed, "est_actif": True} for i in range(1, users + 1)):
+            connection.execute(insert(Utilisateur), batch)
+        connection.execute(insert(Tag), [{"id": i, "nom": nom} for i, nom in enumerate(names, start=1)])
+
+        for batch in _batches(note_rows()):
+            links, shares = [], []
+            for row in batch:
+                links.extend({"note_id": row["id"], "tag_id": tag_id} for tag_id in row.pop("_tags"))
+                if rng.random() < SHARED_RATIO and collaborators[row["owner_id"]]:
+                    circle = collaborators[row["owner_id"]]
+                    shares.extend(
+                        {"note_id": row["id"], "utilisateur_id": row["owner_id"], "partage_avec_utilisateur_id": recipient, "permission": "read"}
+                        for recipient in rng.sample(circle, rng.randint(1, min(3, len(circle))))
+                    )
+            connection.execute(insert(Note), batch)
+            if links:
+                connection.execute(insert(note_tags), links)
+            if shares:
+                connection.execute(insert(PartageNote), shares)
+            counts["note_tags"] += len(links)
+            counts["shares"] += len(shares)
+
+        create_notes_fts(connection)
+
+    with Session(engine) as db:
+        TagRepository(db).rebuild_usage_stats()
+        db.commit()
+    engine.dispose()
+    return SeedSummary(notes, users, tags, counts["shares"], counts["note_tags"], time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--output", required=True, help="Fichier SQLite à créer")
+    parser.add_argument("--notes-per-user", type=int, default=50)
+    parser.add_argument("--tags", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if os.path.exists(args.output):
+        print(f"❌ {args.output} existe déjà")
+        sys.exit(1)
+    summary = seed(args.output, args.notes, args.notes_per_user, args.tags, seed_value=args.seed)
+    print(
+        f"✅ {summary.notes} notes, {summary.users} utilisateurs, {summary.tags} tags, "
+        f"{summary.note_tags} liens note/tag, {summary.shares} partages en {summary.seconds:.1f} s"
+    )
+
+
+if __name__ == "__main__":
+    main()
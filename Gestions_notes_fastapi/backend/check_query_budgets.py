@@ -0,0 +1,205 @@
+"""
+Vérification du nombre de requêtes SQL par route (budgets de requêtes)
+
+L'application réelle (main.app) est démarrée sur une petite base générée
+(benchmarks.synthetic_data) et chaque route des quatre routeurs reçoit quelques
+requêtes (scénarios de benchmarks.bench_endpoints). Les requêtes SQL de chaque requête
+HTTP sont comptées sur les moteurs jusqu'à la lecture complète du corps de la réponse
+(export en flux compris) et comparées au budget de la route (QUERY_BUDGETS, ou
+BATCH_QUERY_BUDGETS par lot pour l'export) : un budget dépassé signale une requête ajoutée
+ou un chargement paresseux par élément (N+1). L'en-tête Server-Timing (core.query_stats)
+doit être présent sur chaque réponse. Une forme de requête répétée au moins
+SQL_N_PLUS_ONE_THRESHOLD fois dans une même requête HTTP fait aussi échouer la vérification.
+
+Usage (depuis backend/) :
+    python check_query_budgets.py [-v]
+
+Code de sortie 1 si une route dépasse son budget, n'en a pas, ou répète une requête.
+"""
+import asyncio
+import logging
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+# Ajouter la racine du projet au chemin Python
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+
+load_dotenv()
+
+import httpx
+
+# Requêtes SQL au plus par requête HTTP, indépendamment de la taille des pages et du nombre
+# d'éléments traités ; les routes servies par un cache (utilisateur authentifié, notes
+# publiques, index de recherche) ont le budget de leur premier appel.
+QUERY_BUDGETS = {
+    "GET /api/v1/notes/notes/": 3,
+    "GET /api/v1/notes/notes/search/": 3,
+    "GET /api/v1/notes/notes/filter/visibility/{visibilite}": 2,
+    "GET /api/v1/notes/notes/filter/tag/{tag_nom}": 2,
+    "GET /api/v1/notes/notes/{note_id}": 2,
+    "GET /api/v1/notes/notes/public/{token}": 2,
+    "GET /api/v1/search/notes": 2,
+    "GET /api/v1/search/notes/filter/visibility/{visibilite}": 2,
+    "GET /api/v1/search/notes/filter/tag/{tag_nom}": 2,
+    "GET /api/v1/search/tags": 1,
+    "GET /api/v1/search/tags/autocomplete": 2,
+    "GET /api/v1/sharing/public/{token}": 2,
+    "GET /api/v1/sharing/test-db": 1,
+    "POST /api/v1/notes/notes/": 7,
+    "PUT /api/v1/notes/notes/{note_id}": 12,
+    "POST /api/v1/sharing/{note_id}/share/{user_email}": 5,
+    "GET /api/v1/sharing/notes/{note_id}/shared-with": 2,
+    "GET /api/v1/sharing/notes/shared-with": 1,
+    "POST /api/v1/sharing/notes/share": 4,
+    "DELETE /api/v1/sharing/notes/{note_id}/share/{user_email}": 5,
+    "POST /api/v1/sharing/notes/{note_id}/public-link": 3,
+    "DELETE /api/v1/sharing/notes/{note_id}/public-link": 3,
+    "POST /api/v1/notes/notes/bulk": 5,
+    "POST /api/v1/notes/notes/import": 5,
+    "DELETE /api/v1/notes/notes/{note_id}": 9,
+    "POST /api/v1/auth/register": 3,
+    "POST /api/v1/auth/login": 1,
+    "POST /api/v1/auth/logout": 0,
+    "GET /api/v1/auth/me": 1,
+}
+
+# Routes lues par lots (export en flux) : (requêtes fixes, requêtes par lot). L'export de
+# l'utilisateur de test est découpé en plusieurs lots de EXPORT_BATCH_SIZE notes, pour qu'une
+# requête par note (N+1) dépasse le budget.
+BATCH_QUERY_BUDGETS = {
+    "GET /api/v1/notes/notes/export": (1, 1),
+}
+EXPORT_BATCH_SIZE = 150
+
+REQUESTS_PER_ROUTE = 3
+
+
+class _QueryCounter:
+    """Requêtes SQL exécutées sur les moteurs de l'application, corps des réponses en flux compris"""
+
+    def __init__(self, engines):
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "after_cursor_execute", self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        if not conn.info.get("explaining"):
+            self.count += 1
+
+
+class _RepeatedQueries(logging.Handler):
+    """Mémorise les signalements N+1 de core.query_stats"""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        if getattr(record, "event", None) == "sql.n_plus_one":
+            self.messages.append(record.getMessage())
+
+
+def route_budget(route: str, database_path: str, utilisateur_id: int):
+    """Budget de la route ; pour une route lue par lots, selon le nombre de notes de l'utilisateur"""
+    if route not in BATCH_QUERY_BUDGETS:
+        return QUERY_BUDGETS.get(route)
+    fixed, per_batch = BATCH_QUERY_BUDGETS[route]
+    with sqlite3.connect(database_path) as connection:
+        (notes,) = connection.execute("SELECT COUNT(*) FROM notes WHERE owner_id = ?", (utilisateur_id,)).fetchone()
+    return fixed + per_batch * max(1, math.ceil(notes / EXPORT_BATCH_SIZE))
+
+
+async def measure(database_path: str, verbose: bool):
+    """Requêtes SQL (nombre maximal observé, budget) par route, et routes non couvertes"""
+    from benchmarks.bench_endpoints import BENCH_USER_ID, build_scenarios, route_keys
+    from core.query_stats import SERVER_TIMING_HEADER, parse_server_timing
+    from database.database import async_engine, async_read_engine, engine
+    from main import app
+    from utils.security import create_access_token
+
+    counter = _QueryCounter({engine, async_engine.sync_engine, async_read_engine.sync_engine})
+    counts, errors = {}, []
+    await app.router.startup()
+    try:
+        scenarios = build_scenarios(database_path, create_access_token({"sub": str(BENCH_USER_ID)}))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://check") as client:
+            for scenario in scenarios:
+                for index in range(REQUESTS_PER_ROUTE):
+                    method, url, kwargs = scenario.request(index)
+                    budget = route_budget(scenario.route, database_path, BENCH_USER_ID)
+                    # ASGITransport rend la réponse une fois le corps entièrement produit :
+                    # les requêtes des lots d'un export en flux sont comptées
+                    counter.count = 0
+                    response = await client.request(method, url, **kwargs)
+                    queries = counter.count
+                    if response.status_code != scenario.expected:
+                        errors.append(f"{scenario.route} : statut {response.status_code} ({response.text[:200]})")
+                        continue
+                    if scenario.collect is not None:
+                        scenario.collect(response)
+                    if parse_server_timing(response.headers.get(SERVER_TIMING_HEADER)) is None:
+                        errors.append(f"{scenario.route} : en-tête Server-Timing absent")
+                        continue
+                    count, _ = counts.get(scenario.route, (0, budget))
+                    counts[scenario.route] = (max(count, queries), budget)
+                    if verbose:
+                        print(f"    {method} {url[:80]} : {queries} requête(s)")
+    finally:
+        await app.router.shutdown()
+
+    covered = {scenario.route for scenario in scenarios}
+    errors.extend(f"{route} : route non couverte" for route in route_keys(app) if route not in covered)
+    return counts, errors
+
+
+def check_query_budgets(verbose: bool = False) -> bool:
+    with tempfile.TemporaryDirectory() as directory:
+        database_path = os.path.join(directory, "budgets.db")
+        # Les moteurs SQLAlchemy lisent DATABASE_URL à l'import : à fixer avant tout import du projet
+        os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+        os.environ["EXPORT_BATCH_SIZE"] = str(EXPORT_BATCH_SIZE)
+        from benchmarks.synthetic_data import seed
+        from database.database import async_engine, async_read_engine
+
+        seed(database_path, notes=2000, notes_per_user=20, tags=200)
+        repeated = _RepeatedQueries()
+        logging.getLogger("core.query_stats").addHandler(repeated)
+
+        async def run():
+            try:
+                return await measure(database_path, verbose)
+            finally:
+                await async_engine.dispose()
+                await async_read_engine.dispose()
+
+        counts, errors = asyncio.run(run())
+
+    violations = list(errors)
+    for route, (count, budget) in sorted(counts.items()):
+        if budget is None:
+            violations.append(f"{route} : pas de budget ({count} requête(s) observée(s))")
+            ok = False
+        else:
+            ok = count <= budget
+            if not ok:
+                violations.append(f"{route} : {count} requêtes SQL pour un budget de {budget}")
+        print(f"{'✅' if ok else '❌'} {route} : {count} requête(s) (budget {budget})")
+    violations.extend(repeated.messages)
+
+    for violation in violations:
+        print(f"\n❌ {violation}")
+    return not violations
+
+
+if __name__ == "__main__":
+    if not check_query_budgets(verbose="-v" in sys.argv[1:]):
+        sys.exit(1)
+    print("\n✅ Toutes les routes respectent leur budget de requêtes SQL")
@@ -0,0 +1,185 @@
+"""
+Vérification des plans d'exécution des requêtes des repositories
+
+Chaque méthode de NoteRepository, TagRepository, UserRepository et PartageService (et la mise
+à jour de l'auto-complétion des tags)
+est exécutée sur une base SQLite temporaire ; les SELECT émis sont capturés puis
+passés à EXPLAIN QUERY PLAN. Toute ligne "SCAN <table>" sur une table du modèle
+(parcours complet d'une table ou d'un index) fait échouer la vérification.
+
+Usage (depuis backend/) :
+    python check_query_plans.py [-v]
+
+Code de sortie 1 si une requête retombe sur un parcours complet de table.
+"""
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+# Ajouter la racine du projet au chemin Python
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from database.database import Base
+from database.fts import create_notes_fts
+from models.notes import Note
+from models.utilisateurs import Utilisateur
+from repositories.note_repository import NoteRepository
+from repositories.tag_repository import TagRepository
+from repositories.utilisateur_repository import UserRepository
+from search.tag_autocomplete import TagAutocomplete
+from services.partage_service import PartageService
+from utils.note_fields import NoteFields, SUMMARY_FIELDS
+from utils.pagination import Keyset
+from benchmarks.bench_user_notes_query import seed
+
+# Parcours complets tolérés par méthode ("Classe.methode": {"table"}), avec leur justification
+ALLOWED_SCANS = {}
+
+_SCAN_PATTERN = re.compile(r"^SCAN (\w+)")
+_ALIAS_SUFFIX = re.compile(r"_\d+$")
+
+
+class StatementRecorder:
+    """Capture les SELECT émis sur l'engine pendant l'exécution d'une méthode"""
+
+    def __init__(self, engine):
+        self.statements = []
+        self.active = False
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.active and not executemany and statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    def capture(self, function):
+        self.statements = []
+        self.active = True
+        try:
+            function()
+        finally:
+            self.active = False
+        return list(self.statements)
+
+
+def full_scans(connection, statement, parameters):
+    """Tables du modèle parcourues intégralement par le plan de la requête"""
+    tables = set(Base.metadata.tables)
+    plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    scanned = set()
+    for row in plan:
+        match = _SCAN_PATTERN.match(row[-1])
+        if match:
+            # Les alias générés par l'ORM (tags_1, note_tags_1...) désignent la même table
+            table = _ALIAS_SUFFIX.sub("", match.group(1))
+            if table in tables:
+                scanned.add(table)
+    return scanned, [row[-1] for row in plan]
+
+
+def build_cases(db: Session, utilisateur_id: int):
+    """Appels représentatifs de chaque méthode, avec et sans curseur de pagination"""
+    notes = NoteRepository(db)
+    tags = TagRepository(db)
+    users = UserRepository(db)
+    partages = PartageService(db)
+
+    note = db.query(Note).filter(Note.owner_id == utilisateur_id).order_by(Note.id).first()
+    note.visibilite = "public"
+    note.generate_public_token()
+    db.commit()
+    token = note.token_publique
+    keyset = Keyset(after_date=note.date_modification or datetime.utcnow(), after_id=note.id)
+    recipient = db.query(Utilisateur).filter(Utilisateur.id != utilisateur_id).order_by(Utilisateur.id).first()
+    summary = NoteFields(SUMMARY_FIELDS)
+
+    return [
+        ("NoteRepository.get_user_notes", lambda: notes.get_user_notes(utilisateur_id, 0, 50)),
+        ("NoteRepository.get_user_notes[keyset]", lambda: notes.get_user_notes(utilisateur_id, 0, 50, keyset)),
+        ("NoteRepository.get_user_notes[summary]", lambda: notes.get_user_notes(utilisateur_id, 0, 50, keyset, summary)),
+        ("NoteRepository.get_user_note_by_id", lambda: notes.get_user_note_by_id(note.id, utilisateur_id)),
+        ("NoteRepository.get_user_notes_by_ids", lambda: notes.get_user_notes_by_ids(utilisateur_id, [note.id, note.id + 1])),
+        ("NoteRepository.get_revision", lambda: notes.get_revision(utilisateur_id)),
+        ("NoteRepository.iter_user_note_texts", lambda: list(notes.iter_user_note_texts(utilisateur_id))),
+        ("NoteRepository.get_owned_note_titles", lambda: notes.get_owned_note_titles(utilisateur_id, [note.id, note.id + 1])),
+        ("NoteRepository.get_public_note_by_token", lambda: notes.get_public_note_by_token(token)),
+        ("NoteRepository.search_user_notes", lambda: notes.search_user_notes(utilisateur_id, "lorem", 0, 50)),
+        ("NoteRepository.search_user_notes[keyset]", lambda: notes.search_user_notes(utilisateur_id, "lorem", 0, 50, keyset)),
+        ("NoteRepository.search_user_notes[summary]", lambda: notes.search_user_notes(utilisateur_id, "lorem", 0, 50, None, summary)),
+        ("NoteRepository._search_user_notes_like", lambda: notes._search_user_notes_like(utilisateur_id, "lorem", 0, 50, None, None)),
+        ("NoteRepository.filter_user_notes_by_visibility", lambda: notes.filter_user_notes_by_visibility(utilisateur_id, "prive", 0, 50)),
+        ("NoteRepository.filter_user_notes_by_visibility[keyset]", lambda: notes.filter_user_notes_by_visibility(utilisateur_id, "prive", 0, 50, keyset)),
+        ("NoteRepository.filter_user_notes_by_tag[summary]", lambda: notes.filter_user_notes_by_tag(utilisateur_id, "tag1", 0, 50, None, NoteFields(("id", "titre", "apercu")))),
+        ("NoteRepository.filter_user_notes_by_tag", lambda: notes.filter_user_notes_by_tag(utilisateur_id, "tag1", 0, 50)),
+        ("NoteRepository.filter_user_notes_by_tag[keyset]", lambda: notes.filter_user_notes_by_tag(utilisateur_id, "tag1", 0, 50, keyset)),
+        ("NoteRepository.count_user_notes", lambda: notes.count_user_notes(utilisateur_id)),
+        ("NoteRepository.get_shared_with_user", lambda: notes.get_shared_with_user(utilisateur_id, 0, 50)),
+        ("NoteRepository.get_shared_with_user[keyset]", lambda: notes.get_shared_with_user(utilisateur_id, 0, 50, keyset)),
+        ("TagRepository.get_or_create", lambda: tags.get_or_create("tag1")),
+        ("TagRepository.get_by_name", lambda: tags.get_by_name("tag2")),
+        ("TagRepository.search_tags", lambda: tags.search_tags("tag1")),
+        ("TagRepository.get_popular_tags", lambda: tags.get_popular_tags(utilisateur_id, 20)),
+        ("TagAutocomplete.refresh", lambda: TagAutocomplete().refresh(db, utilisateur_id)),
+        ("UserRepository.get", lambda: users.get(utilisateur_id)),
+        ("UserRepository.get_by_email", lambda: users.get_by_email(recipient.email)),
+        ("UserRepository.get_by_emails", lambda: users.get_by_emails([recipient.email, "absent@example.com"])),
+        ("PartageService.share_note_with_user", lambda: partages.share_note_with_user(note.id, recipient.email, utilisateur_id)),
+        ("PartageService.get_note_shares", lambda: partages.get_note_shares(note.id, utilisateur_id)),
+        ("PartageService.get_notes_shares", lambda: partages.get_notes_shares([note.id, note.id + 1], utilisateur_id)),
+        ("PartageService.unshare_note_with_user", lambda: partages.unshare_note_with_user(note.id, recipient.email, utilisateur_id)),
+        ("PartageService.share_notes_with_users", lambda: partages.share_notes_with_users([note.id], [recipient.email], utilisateur_id)),
+        ("PartageService.get_notes_shared_with_user", lambda: partages.get_notes_shared_with_user(utilisateur_id, 0, 50)),
+        ("PartageService.get_public_note_by_token", lambda: partages.get_public_note_by_token(token)),
+    ]
+
+
+def check_query_plans(verbose: bool = False) -> bool:
+    """Exécute chaque cas et vérifie l'absence de parcours complet de table"""
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'plans.db')}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            create_notes_fts(connection)
+        utilisateur_id = seed(engine, users=50, notes=2000, shares_per_note=3, tags=100, tags_per_note=3)
+        with Session(engine) as db:
+            TagRepository(db).rebuild_usage_stats()
+            db.commit()
+        recorder = StatementRecorder(engine)
+
+        violations = []
+        with Session(engine) as db:
+            for name, function in build_cases(db, utilisateur_id):
+                statements = recorder.capture(function)
+                allowed = ALLOWED_SCANS.get(name, set())
+                method_ok = True
+                for statement, parameters in statements:
+                    scanned, plan = full_scans(db.connection(), statement, parameters)
+                    forbidden = scanned - allowed
+                    if forbidden:
+                        method_ok = False
+                        violations.append((name, forbidden, statement, plan))
+                    if verbose:
+                        print(f"    {' '.join(statement.split())[:120]}")
+                        for line in plan:
+                            print(f"      {line}")
+                print(f"{'✅' if method_ok else '❌'} {name} ({len(statements)} requête(s))")
+        engine.dispose()
+
+    for name, tables, statement, plan in violations:
+        print(f"\n❌ {name} : parcours complet de {', '.join(sorted(tables))}")
+        print(f"   {' '.join(statement.split())}")
+        for line in plan:
+            print(f"     {line}")
+    return not violations
+
+
+if __name__ == "__main__":
+    if not check_query_plans(verbose="-v" in sys.argv[1:]):
+        sys.exit(1)
+    print("\n✅ Aucune requête ne parcourt une table complète")
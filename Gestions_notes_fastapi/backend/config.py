@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -8,11 +8,80 @@ class Settings(BaseSettings):
     environment: str = "development"
     
     database_url: str = os.getenv("DATABASE_URL")
+
+    # Profil de stockage (database.storage.PROFILES : legacy, wal, durable) ; chaque réglage
+    # ci-dessous, s'il est renseigné, remplace la valeur du profil
+    storage_profile: str = "wal"
+    sqlite_journal_mode: Optional[str] = None
+    sqlite_synchronous: Optional[str] = None
+    sqlite_cache_size: Optional[int] = None
+    sqlite_mmap_size: Optional[int] = None
+    sqlite_temp_store: Optional[str] = None
+    sqlite_busy_timeout_ms: Optional[int] = None
+    db_pool_size: Optional[int] = None
+    db_max_overflow: Optional[int] = None
+    db_pool_recycle: Optional[int] = None
+    db_pool_timeout: Optional[float] = None
+
+    # Sessions de lecture : réplique optionnelle (sinon connexions SQLite mode=ro sur la même base)
+    # et taille de leur pool (par défaut celle du profil)
+    database_read_url: Optional[str] = None
+    db_read_pool_size: Optional[int] = None
     
     secret_key: str = os.getenv("SECRET_KEY")
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
-    
+
+    # Cache des utilisateurs authentifiés (core.principal_cache), 0 pour le désactiver
+    principal_cache_size: int = 10000
+    principal_cache_ttl_seconds: float = 60.0
+
+    # Pool dédié au hachage bcrypt (utils.password_hashing) : calculs simultanés et file d'attente
+    password_hashing_workers: int = 4
+    password_hashing_queue_size: int = 32
+
+    # Notes publiques sérialisées en cache (services.public_note_cache), 0 pour le désactiver ;
+    # le TTL borne le délai avant qu'un autre worker voie une modification ou une révocation
+    public_note_cache_size: int = 1000
+    public_note_cache_ttl_seconds: float = 10.0
+
+    # Index de recherche en mémoire (search.engine), utilisé sans FTS5 : construit par utilisateur
+    # à sa première recherche, borné en nombre total de notes indexées (LRU)
+    search_index_max_notes: int = 50000
+
+    # Auto-complétion des tags (search.tag_autocomplete) : intervalle minimal entre deux comparaisons
+    # de l'index d'un utilisateur à la base, délai avant de voir les écritures des autres workers
+    tag_autocomplete_refresh_seconds: float = 1.0
+
+    # Export en flux (services.note_export) : notes lues par lot
+    export_batch_size: int = 500
+
+    # Import en flux (services.note_import) : notes créées par lot (une transaction chacun)
+    # et taille maximale d'un enregistrement (ligne NDJSON ou fichier Markdown décompressé)
+    import_chunk_size: int = 500
+    import_max_record_bytes: int = 10 * 1024 * 1024
+
+    # Métriques HTTP / pool / caches (core.metrics) exposées au format Prometheus sur /metrics
+    metrics_enabled: bool = True
+
+    # Instrumentation SQL par requête (core.query_stats) : en-tête Server-Timing, signalement des
+    # formes de requête répétées au moins SQL_N_PLUS_ONE_THRESHOLD fois (N+1), journal des requêtes
+    # plus lentes que SQL_SLOW_QUERY_MS ; 0 désactive le seuil. Les valeurs des paramètres (mots de
+    # passe hachés, emails, tokens, contenus) et le plan d'exécution, calculé sur la connexion de la
+    # requête, ne sont journalisés que sur demande
+    sql_instrumentation_enabled: bool = True
+    sql_n_plus_one_threshold: int = 5
+    sql_slow_query_ms: float = 200.0
+    sql_slow_query_log_params: bool = False
+    sql_slow_query_explain: bool = False
+
+    # Logs (core.structured_logging) : niveau, JSON ou texte, file d'attente vers le thread d'écriture
+    # et part conservée des événements volumineux (extra={"event": ...}), 0 pour les écarter
+    log_level: str = "INFO"
+    log_json: bool = True
+    log_queue_size: int = 10000
+    log_sample_rates: Dict[str, float] = {"http.request": 0.1, "auth.invalid_token": 0.1}
+
     cors_origins: List[str] = [
         "http://localhost:3000",
         "http://localhost:3001", 
@@ -24,6 +93,10 @@ class Settings(BaseSettings):
         "http://127.0.0.1:8080"
     ]
     
+    # Routes de liste de notes : lignes construites depuis les notes chargées et encodées par orjson
+    # (utils.note_json), sans revalidation par le response_model ; false pour le chemin standard
+    fast_list_responses: bool = True
+
     default_page_size: int = 20
     max_page_size: int = 100
     
@@ -2,14 +2,18 @@ import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from database.database import get_db
-from models.utilisateurs import Utilisateur
-from utils.security import SECRET_KEY, ALGORITHM  
+from core.principal_cache import Principal, principal_cache
+from database.database import AsyncSessionLocal
+from repositories.utilisateur_repository import AsyncUserRepository
+from utils.security import SECRET_KEY, ALGORITHM
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Utilisateur:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Utilisateur du token JWT. Servi par le cache des utilisateurs authentifiés : en cas
+    de succès, aucune session ni requête sur la table utilisateurs.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Impossible de valider les identifiants",
@@ -24,8 +28,17 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except (JWTError, ValueError, TypeError):
         raise credentials_exception
 
-    user = db.query(Utilisateur).filter(Utilisateur.id == user_id).first()
-    if not user:
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        generation = principal_cache.generation
+        async with AsyncSessionLocal() as db:
+            user = await AsyncUserRepository(db).get(user_id)
+            if not user:
+                raise credentials_exception
+            principal = Principal.from_user(user)
+        principal_cache.put(principal, generation)
+
+    if not principal.est_actif:
         raise credentials_exception
 
-    return user
\ No newline at end of file
+    return principal
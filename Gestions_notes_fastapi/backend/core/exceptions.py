@@ -15,6 +15,13 @@ class ValidationException(NotesException):
 class NotFoundException(NotesException):
     pass
 
+class ServiceUnavailableException(NotesException):
+    """Ressource saturée : la requête peut être réessayée après `retry_after` secondes"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
 credentials_exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
     detail="Could not validate credentials",
@@ -0,0 +1,287 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Starlette ajoute lui-même "; charset=utf-8" aux types text/*
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# Seaux (bornes supérieures) des histogrammes, en secondes et en octets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# Libellé des requêtes sans route (404) : le chemin brut ferait exploser le nombre de séries
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    """Histogramme à seaux fixes : comptes par seau (non cumulés), somme et nombre d'observations"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        # bisect_left : une valeur égale à une borne compte dans ce seau (le="borne")
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self) -> "Histogram":
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.sum = self.sum
+        histogram.count = self.count
+        return histogram
+
+
+class _RouteMetrics:
+    __slots__ = ("latency", "size", "statuses")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses: Dict[int, int] = {}
+
+
+def route_label(scope: Dict[str, Any]) -> str:
+    """Gabarit de chemin de la route servie (ex. /api/v1/notes/notes/{note_id}), connu après le routage"""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Routes Starlette sans paramètre (documentation) : le chemin est le gabarit
+    return scope["path"] if "endpoint" in scope else UNMATCHED_ROUTE
+
+
+class HttpMetrics:
+    """
+    Métriques HTTP par (méthode, gabarit de route) : latence, taille de réponse, statuts.
+
+    Le gabarit n'est connu qu'une fois la requête routée : les requêtes en cours sont donc
+    mémorisées (leur scope) et regroupées par route seulement à la lecture des métriques,
+    sans second routage ni coût supplémentaire par requête. Propre au processus, comme
+    les caches : chaque worker expose ses propres compteurs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], _RouteMetrics] = {}
+        self._active: Dict[int, Dict[str, Any]] = {}
+
+    def start(self, scope: Dict[str, Any]) -> None:
+        with self._lock:
+            self._active[id(scope)] = scope
+
+    def finish(self, scope: Dict[str, Any], status: int, size: int, duration: float) -> None:
+        key = (scope["method"], route_label(scope))
+        with self._lock:
+            self._active.pop(id(scope), None)
+            metrics = self._routes.get(key)
+            if metrics is None:
+                metrics = self._routes[key] = _RouteMetrics()
+            metrics.latency.observe(duration)
+            metrics.size.observe(size)
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def snapshot(self) -> Tuple[Dict[Tuple[str, str], _RouteMetrics], Dict[Tuple[str, str], int]]:
+        """Copie cohérente des métriques par route et nombre de requêtes en cours par route"""
+        with self._lock:
+            routes = {}
+            for key, metrics in self._routes.items():
+                copy = _RouteMetrics()
+                copy.latency, copy.size, copy.statuses = metrics.latency.copy(), metrics.size.copy(), dict(metrics.statuses)
+                routes[key] = copy
+            active = list(self._active.values())
+        in_flight = {key: 0 for key in routes}
+        for scope in active:
+            key = (scope["method"], route_label(scope))
+            in_flight[key] = in_flight.get(key, 0) + 1
+        return routes, in_flight
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI (sans BaseHTTPMiddleware, qui ajoute une tâche et des files par requête) :
+    mesure chaque requête HTTP et l'enregistre dans `metrics` sous le gabarit de sa route.
+    """
+
+    def __init__(self, app, metrics: Optional[HttpMetrics] = None):
+        self.app = app
+        self.metrics = metrics if metrics is not None else http_metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        # [statut, octets envoyés] ; 500 si l'application lève une exception avant de répondre
+        response = [500, 0]
+
+        async def send_with_metrics(message):
+            if message["type"] == "http.response.body":
+                response[1] += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                response[0] = message["status"]
+            await send(message)
+
+        self.metrics.start(scope)
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            self.metrics.finish(scope, response[0], response[1], time.perf_counter() - start)
+
+
+class PoolMetrics:
+    """Temps d'obtention d'une connexion (attente d'une connexion libre comprise), par pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits: Dict[str, Histogram] = {}
+
+    def observe(self, pool: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._waits.get(pool)
+            if histogram is None:
+                histogram = self._waits[pool] = Histogram(POOL_WAIT_BUCKETS)
+            histogram.observe(seconds)
+
+    def snapshot(self) -> Dict[str, Histogram]:
+        with self._lock:
+            return {pool: histogram.copy() for pool, histogram in self._waits.items()}
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool qui mesure chaque obtention de connexion (pool_metrics)"""
+
+    metrics_label = "default"
+    # Journal du pool sous le logger de SQLAlchemy (niveau WARNING par défaut), pas sous core.metrics
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.AsyncAdaptedQueuePool"
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            pool_metrics.observe(self.metrics_label, time.perf_counter() - start)
+
+
+def timed_pool_class(label: str) -> type:
+    """
+    Classe de pool mesurée sous le libellé `label` (ex. "write", "read") : une sous-classe
+    plutôt qu'un attribut d'instance, pour survivre à la recréation du pool (engine.dispose()).
+    """
+    return type(f"TimedAsyncAdaptedQueuePool_{label}", (TimedAsyncAdaptedQueuePool,), {"metrics_label": label})
+
+
+class _Exposition:
+    """Texte au format d'exposition Prometheus (version 0.0.4)"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, labels: Dict[str, Any], value: float) -> None:
+        if labels:
+            rendered = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+            self.lines.append(f"{name}{{{rendered}}} {_number(value)}")
+        else:
+            self.lines.append(f"{name} {_number(value)}")
+
+    def histogram(self, name: str, labels: Dict[str, Any], histogram: Histogram) -> None:
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            self.sample(f"{name}_bucket", {**labels, "le": _number(bound)}, cumulative)
+        self.sample(f"{name}_bucket", {**labels, "le": "+Inf"}, histogram.count)
+        self.sample(f"{name}_sum", labels, histogram.sum)
+        self.sample(f"{name}_count", labels, histogram.count)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+def render_metrics(
+    pools: Dict[str, Any],
+    caches: Dict[str, Dict[str, Any]],
+    password_hashing: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Métriques HTTP et de pool, plus l'état des pools SQLAlchemy (`pools` : libellé -> pool) et
+    les compteurs des caches (`caches` : nom -> stats() avec hits / misses / size).
+    """
+    routes, in_flight = http_metrics.snapshot()
+    out = _Exposition()
+
+    out.family("http_request_duration_seconds", "histogram", "Durée des requêtes HTTP par route")
+    for (method, route), metrics in sorted(routes.items()):
+        out.histogram("http_request_duration_seconds", {"method": method, "route": route}, metrics.latency)
+    out.family("http_response_size_bytes", "histogram", "Taille du corps des réponses HTTP par route")
+    for (method, route), metrics in sorted(routes.items()):
+        out.histogram("http_response_size_bytes", {"method": method, "route": route}, metrics.size)
+    out.family("http_responses_total", "counter", "Réponses HTTP par route et statut")
+    for (method, route), metrics in sorted(routes.items()):
+        for status, count in sorted(metrics.statuses.items()):
+            out.sample("http_responses_total", {"method": method, "route": route, "status": status}, count)
+    out.family("http_requests_in_flight", "gauge", "Requêtes HTTP en cours par route")
+    for (method, route), count in sorted(in_flight.items()):
+        out.sample("http_requests_in_flight", {"method": method, "route": route}, count)
+
+    out.family("db_pool_checkout_seconds", "histogram", "Temps d'obtention d'une connexion du pool")
+    for pool, histogram in sorted(pool_metrics.snapshot().items()):
+        out.histogram("db_pool_checkout_seconds", {"pool": pool}, histogram)
+    for name, help_text, read in (
+        ("db_pool_size", "Connexions permanentes du pool", lambda pool: pool.size()),
+        ("db_pool_checked_out", "Connexions du pool en cours d'utilisation", lambda pool: pool.checkedout()),
+        ("db_pool_overflow", "Connexions ouvertes au-delà de la taille du pool", lambda pool: max(0, pool.overflow())),
+    ):
+        out.family(name, "gauge", help_text)
+        for label, pool in sorted(pools.items()):
+            out.sample(name, {"pool": label}, read(pool))
+
+    for name, kind, help_text, key in (
+        ("cache_hits_total", "counter", "Lectures servies par le cache", "hits"),
+        ("cache_misses_total", "counter", "Lectures absentes du cache", "misses"),
+        ("cache_entries", "gauge", "Entrées en cache", "size"),
+    ):
+        out.family(name, kind, help_text)
+        for cache, stats in sorted(caches.items()):
+            out.sample(name, {"cache": cache}, stats[key])
+    out.family("cache_hit_ratio", "gauge", "Part des lectures servies par le cache")
+    for cache, stats in sorted(caches.items()):
+        lookups = stats["hits"] + stats["misses"]
+        out.sample("cache_hit_ratio", {"cache": cache}, stats["hits"] / lookups if lookups else 0.0)
+
+    if password_hashing is not None:
+        for name, kind, help_text, key in (
+            ("password_hashing_running", "gauge", "Hachages bcrypt en cours", "running"),
+            ("password_hashing_queue_depth", "gauge", "Hachages bcrypt en attente", "queue_depth"),
+            ("password_hashing_completed_total", "counter", "Hachages bcrypt terminés", "completed"),
+            ("password_hashing_rejected_total", "counter", "Demandes refusées (pool saturé, 503)", "rejected"),
+        ):
+            out.family(name, kind, help_text)
+            out.sample(name, {}, password_hashing[key])
+
+    return out.render()
+
+
+http_metrics = HttpMetrics()
+pool_metrics = PoolMetrics()
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Utilisateur authentifié, détaché de la session : les champs lus par les routes
+    (id, email, est_actif, date_creation), sans mot de passe ni relations.
+    """
+    id: int
+    email: str
+    est_actif: bool
+    date_creation: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, utilisateur) -> "Principal":
+        return cls(
+            id=utilisateur.id,
+            email=utilisateur.email,
+            est_actif=bool(utilisateur.est_actif),
+            date_creation=utilisateur.date_creation,
+        )
+
+
+class PrincipalCache:
+    """
+    Cache LRU borné en taille et en durée (TTL) des utilisateurs authentifiés, indexé par id.
+
+    get_current_user le consulte avant d'interroger la table utilisateurs ; UserRepository
+    invalide l'entrée à chaque modification, désactivation ou suppression. Comme l'index de
+    recherche, il est propre au processus : le TTL borne la durée pendant laquelle un autre
+    processus peut servir une entrée périmée.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, utilisateur_id: int) -> Optional[Principal]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(utilisateur_id)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[utilisateur_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(utilisateur_id)
+            self.hits += 1
+            return entry[0]
+
+    @property
+    def generation(self) -> int:
+        """Numéro incrémenté à chaque invalidation, à relever avant de lire l'utilisateur en base"""
+        return self._generation
+
+    def put(self, principal: Principal, generation: Optional[int] = None) -> None:
+        """
+        Mémorise l'utilisateur. Si une invalidation a eu lieu depuis `generation`
+        (lecture concurrente d'une modification), la valeur lue est ignorée.
+        """
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[principal.id] = (principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, utilisateur_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(utilisateur_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Compteurs exposés par /health"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.principal_cache_size,
+    ttl=settings.principal_cache_ttl_seconds,
+)
@@ -0,0 +1,191 @@
+import logging
+import re
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Listes de paramètres (IN (?, ?, ?), VALUES (?, ?), (?, ?)) ramenées à une forme unique :
+# la même requête avec 3 ou 30 identifiants a la même « forme »
+_PARAMETER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)\s*,?)+\)")
+_REPEATED_GROUPS = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+SERVER_TIMING_HEADER = "server-timing"
+_SERVER_TIMING_PATTERN = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+@lru_cache(maxsize=2048)
+def statement_shape(statement: str) -> str:
+    """
+    Forme d'une requête : texte SQL aux listes de paramètres et espaces normalisés.
+    Les textes SQL compilés étant réutilisés par SQLAlchemy, la forme est mémorisée par texte.
+    """
+    shape = _PARAMETER_LIST.sub("(?)", statement)
+    shape = _REPEATED_GROUPS.sub(r"\1", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class RequestQueryStats:
+    """Requêtes SQL exécutées pendant une requête HTTP : nombre, durée cumulée, formes répétées"""
+
+    __slots__ = ("count", "duration", "shapes", "reported")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Dict[str, int] = {}
+        # Formes ayant atteint SQL_N_PLUS_ONE_THRESHOLD, dans l'ordre où elles l'ont atteint
+        self.reported: List[str] = []
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.3f};desc="{self.count} queries"'
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+def install_query_hooks(engine: Engine) -> None:
+    """
+    Écoute before_cursor_execute / after_cursor_execute sur `engine` (engine.sync_engine pour
+    un moteur asynchrone : les événements sont émis dans le greenlet, même contexte que la requête).
+    Les requêtes sont comptées dans les statistiques de la requête HTTP en cours (QueryStatsMiddleware),
+    et celles qui dépassent SQL_SLOW_QUERY_MS sont journalisées : nombre et types des paramètres
+    (valeurs avec SQL_SLOW_QUERY_LOG_PARAMS), plan d'exécution avec SQL_SLOW_QUERY_EXPLAIN.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        if conn.info.get("explaining"):
+            return
+
+        stats = _current_stats.get()
+        if stats is not None:
+            shape = statement_shape(statement)
+            stats.count += 1
+            stats.duration += duration
+            repeats = stats.shapes[shape] = stats.shapes.get(shape, 0) + 1
+            threshold = settings.sql_n_plus_one_threshold
+            if threshold and repeats == threshold:
+                stats.reported.append(shape)
+
+        if settings.sql_slow_query_ms and duration * 1000 >= settings.sql_slow_query_ms:
+            logger.warning(
+                "Requête SQL lente (%.1f ms) : %s", duration * 1000, statement,
+                extra={
+                    "event": "sql.slow_query",
+                    "duration_ms": round(duration * 1000, 3),
+                    "parameters": _truncate(parameters) if settings.sql_slow_query_log_params else _describe(parameters, executemany),
+                    "plan": _explain(conn, statement, parameters, executemany),
+                },
+            )
+
+
+def _explain(conn, statement: str, parameters: Any, executemany: bool) -> str:
+    """
+    Plan d'exécution (EXPLAIN QUERY PLAN sous SQLite, EXPLAIN ailleurs) sur la même connexion,
+    avant de la rendre à la requête lente : désactivé par défaut (SQL_SLOW_QUERY_EXPLAIN)
+    """
+    if executemany or not settings.sql_slow_query_explain:
+        return "(non calculé)"
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    conn.info["explaining"] = True
+    try:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+    except Exception as e:
+        return f"(indisponible : {e})"
+    finally:
+        conn.info["explaining"] = False
+    return "\n".join(" | ".join(str(value) for value in row) for row in rows)
+
+
+def _describe(parameters: Any, executemany: bool) -> str:
+    """Nombre et types des paramètres, sans leurs valeurs"""
+    if executemany:
+        return f"{len(parameters)} lot(s)"
+    values = parameters.values() if isinstance(parameters, dict) else parameters or ()
+    return f"{len(values)} paramètre(s) : " + ", ".join(type(value).__name__ for value in values)
+
+
+def _truncate(parameters: Any, limit: int = 500) -> str:
+    text = repr(parameters)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class QueryStatsMiddleware:
+    """
+    Middleware ASGI : ouvre les statistiques SQL de chaque requête HTTP, ajoute l'en-tête
+    Server-Timing (durée SQL cumulée et nombre de requêtes) et signale les formes de requête
+    répétées au moins SQL_N_PLUS_ONE_THRESHOLD fois (motif N+1).
+
+    Pour une réponse en flux (export), l'en-tête ne compte que les requêtes exécutées avant
+    l'envoi des en-têtes ; le signalement N+1, fait en fin de requête, les compte toutes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_server_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((SERVER_TIMING_HEADER.encode(), stats.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            _current_stats.reset(token)
+            if stats.reported:
+                logger.warning(
+                    "Motif N+1 possible sur %s %s (%d requêtes SQL) : %s",
+                    scope["method"], scope["path"], stats.count,
+                    " ; ".join(f"{stats.shapes[shape]} x {shape}" for shape in stats.reported),
+                    extra={"event": "sql.n_plus_one", "queries": stats.count, "repeated": {shape: stats.shapes[shape] for shape in stats.reported}},
+                )
+
+
+def parse_server_timing(value: str) -> Optional[Dict[str, float]]:
+    """Nombre de requêtes et durée SQL (ms) lus dans un en-tête Server-Timing, None si absent"""
+    match = _SERVER_TIMING_PATTERN.search(value or "")
+    if match is None:
+        return None
+    return {"duration_ms": float(match.group(1)), "queries": int(match.group(2))}
+
+
+def assert_query_budget(response, max_queries: int) -> int:
+    """
+    Assistant de test : vérifie qu'une réponse (httpx / TestClient) n'a pas demandé plus de
+    `max_queries` requêtes SQL, d'après son en-tête Server-Timing ; renvoie le nombre de requêtes.
+    """
+    timing = parse_server_timing(response.headers.get(SERVER_TIMING_HEADER))
+    assert timing is not None, f"En-tête Server-Timing absent ({response.request.method} {response.request.url})"
+    assert timing["queries"] <= max_queries, (
+        f"{response.request.method} {response.request.url.path} : {timing['queries']} requêtes SQL "
+        f"pour un budget de {max_queries}"
+    )
+    return int(timing["queries"])
@@ -0,0 +1,254 @@
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from core.metrics import route_label
+
+REQUEST_ID_HEADER = "x-request-id"
+# Identifiant fourni par le client (ou un proxy) repris tel quel s'il est raisonnable
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+# Attributs propres à LogRecord : tout autre attribut vient de `extra` et est écrit dans le JSON
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_RESERVED_FIELDS = ("request_id", "event", "sample_rate")
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+access_logger = logging.getLogger("http.access")
+
+
+def current_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+def _extra_fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {
+        key: value for key, value in record.__dict__.items()
+        if key not in _RECORD_ATTRIBUTES and key not in _RESERVED_FIELDS and not key.startswith("_")
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objet JSON par ligne : horodatage, niveau, logger, message, request_id, event et champs `extra`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in _RESERVED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        entry.update(_extra_fields(record))
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Échantillonnage des événements volumineux : un enregistrement portant `event` (extra) présent
+    dans `rates` n'est conservé qu'avec cette probabilité (0 : jamais), et porte alors `sample_rate`
+    pour permettre de repondérer les comptages. Les avertissements et erreurs ne sont jamais écartés.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+
+    def keep(self, event: Optional[str]) -> Optional[float]:
+        """Taux appliqué si l'événement est conservé (1.0 s'il n'est pas échantillonné), None s'il est écarté"""
+        rate = self.rates.get(event)
+        if rate is None or rate >= 1.0:
+            return 1.0
+        return rate if random.random() < rate else None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Déjà échantillonné par l'appelant (sample_event) ou avertissement / erreur : conservé
+        if hasattr(record, "sample_rate") or record.levelno >= logging.WARNING:
+            return True
+        rate = self.keep(getattr(record, "event", None))
+        if rate is None:
+            return False
+        if rate < 1.0:
+            record.sample_rate = rate
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Côté requête, le strict minimum : fusion du message et de ses arguments (qui pourraient changer
+    ensuite), identifiant de requête, trace d'exception rendue en texte, puis dépôt dans une file
+    bornée sans attente. Si la file est pleine (sortie bloquée), l'enregistrement est abandonné et
+    compté plutôt que de ralentir la requête. Le formatage JSON et l'écriture se font dans le thread
+    du QueueListener.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class TextFormatter(logging.Formatter):
+    """Format lisible (développement) : request_id, message, puis event et champs `extra`"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = "-"
+        text = super().format(record)
+        fields = {"event": getattr(record, "event", None), **_extra_fields(record)}
+        # Valeurs sur plusieurs lignes (plan d'exécution...) sous la ligne principale
+        inline = {key: value for key, value in fields.items() if value is not None and "\n" not in str(value)}
+        if inline:
+            text += " (" + " ".join(f"{key}={value}" for key, value in inline.items()) + ")"
+        for key, value in fields.items():
+            if value is not None and "\n" in str(value):
+                text += f"\n  {key}:\n" + "\n".join(f"    {line}" for line in str(value).splitlines())
+        return text
+
+
+_traceback_formatter = logging.Formatter()
+_sampler = SamplingFilter({})
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def sample_event(event: str) -> Optional[float]:
+    """
+    Décision d'échantillonnage avant de créer l'enregistrement, pour les événements émis à chaque
+    requête : None si l'événement est écarté, sinon le taux à passer en extra (sample_rate).
+    """
+    return _sampler.keep(event)
+
+
+def configure_logging(
+    level: str = "INFO",
+    json_output: bool = True,
+    sample_rates: Optional[Dict[str, float]] = None,
+    queue_size: int = 10000,
+) -> None:
+    """
+    Installe le pipeline QueueHandler -> file bornée -> QueueListener -> stderr sur le logger racine.
+    Idempotent : un second appel (rechargement, scripts) ne fait rien. Les loggers d'uvicorn gardent
+    leur propre configuration.
+    """
+    global _handler, _listener
+    if _listener is not None:
+        return
+
+    # Champs jamais écrits : pas de remontée de la pile (fichier / ligne) ni de lecture du thread
+    # et du processus à chaque enregistrement (cf. « Optimization » dans le guide de logging)
+    logging._srcfile = None
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    _sampler.rates = dict(sample_rates or {})
+    log_queue: queue.Queue = queue.Queue(queue_size)
+    _handler = NonBlockingQueueHandler(log_queue)
+    _handler.addFilter(_sampler)
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if json_output else TextFormatter())
+
+    root = logging.getLogger()
+    root.setLevel(level.upper())
+    root.addHandler(_handler)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    # Vider la file à l'arrêt du processus
+    atexit.register(_listener.stop)
+
+
+def logging_stats() -> Dict[str, int]:
+    """Enregistrements en attente d'écriture et abandonnés (file pleine)"""
+    if _handler is None:
+        return {"queue_depth": 0, "dropped": 0}
+    return {"queue_depth": _handler.queue.qsize(), "dropped": _handler.dropped}
+
+
+class RequestContextMiddleware:
+    """
+    Middleware ASGI : identifiant de chaque requête HTTP (en-tête X-Request-ID du client s'il est
+    valide, sinon généré), disponible pour les logs émis pendant la requête et renvoyé dans la
+    réponse ; une ligne de journal d'accès (événement `http.request`, échantillonnable) par requête.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")
+                break
+        if request_id is None or not _VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (REQUEST_ID_HEADER.encode(), request_id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            level = logging.ERROR if status[0] >= 500 else logging.INFO
+            rate = 1.0 if level >= logging.WARNING else sample_event("http.request")
+            if rate is not None and access_logger.isEnabledFor(level):
+                access_logger.log(
+                    level,
+                    "%s %s %d",
+                    scope["method"], scope["path"], status[0],
+                    extra={
+                        "event": "http.request",
+                        "sample_rate": rate,
+                        "method": scope["method"],
+                        "route": route_label(scope),
+                        "status": status[0],
+                        "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+                    },
+                )
+            request_id_var.reset(token)
@@ -37,6 +37,18 @@ try:
     except ImportError as e:
         print(f"⚠️  Modèle NoteTag non trouvé: {e}")
     
+    try:
+        from models.user_tag_stats import UserTagStats
+        print("✅ Modèle UserTagStats importé")
+    except ImportError as e:
+        print(f"⚠️  Modèle UserTagStats non trouvé: {e}")
+
+    try:
+        from models.user_note_revision import UserNoteRevision
+        print("✅ Modèle UserNoteRevision importé")
+    except ImportError as e:
+        print(f"⚠️  Modèle UserNoteRevision non trouvé: {e}")
+    
     # Ou si vous avez un fichier qui importe tout
     try:
         from models import *
@@ -63,6 +75,14 @@ def create_all_tables():
         # Créer toutes les tables
         Base.metadata.create_all(bind=engine)
         print("✅ Toutes les tables ont été créées avec succès !")
+
+        # Index plein texte (FTS5) pour la recherche dans les notes
+        from database.fts import create_notes_fts
+        with engine.begin() as connection:
+            if create_notes_fts(connection):
+                print("✅ Index plein texte notes_fts créé")
+            else:
+                print("⚠️  FTS5 indisponible : la recherche utilisera LIKE")
         
         # Vérifier que les tables existent
         from sqlalchemy import inspect
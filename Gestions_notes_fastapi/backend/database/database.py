@@ -1,17 +1,77 @@
+from dataclasses import replace
+
+from fastapi import Request
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./notes.db"
+from config import settings
+from core.metrics import timed_pool_class
+from core.query_stats import install_query_hooks
+from database.storage import apply_profile, build_profile, database_urls, engine_options, read_only_url
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# URL de Settings.database_url (sqlite:///./notes.db par défaut) et profil de stockage
+# (PRAGMA SQLite et pool) de Settings.storage_profile, communs aux deux moteurs
+SQLALCHEMY_DATABASE_URL, ASYNC_SQLALCHEMY_DATABASE_URL = database_urls(settings.database_url)
+storage_profile = build_profile(settings)
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_options(SQLALCHEMY_DATABASE_URL, storage_profile))
+apply_profile(engine, storage_profile)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Moteur asynchrone (aiosqlite) utilisé par les routes : les requêtes n'occupent plus
+# un thread du threadpool de Starlette. Sans poolclass, aiosqlite ouvrirait une
+# connexion (et un thread) par session. Le pool mesure le temps d'obtention des connexions (/metrics).
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    poolclass=timed_pool_class("write"),
+    **engine_options(ASYNC_SQLALCHEMY_DATABASE_URL, storage_profile),
+)
+apply_profile(async_engine.sync_engine, storage_profile)
+
+# expire_on_commit=False : les objets renvoyés restent lisibles après le commit,
+# la sérialisation de la réponse se fait hors de la session
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Moteur de lecture des routes GET (listes, recherche, filtres, notes publiques) : pool séparé de
+# connexions en lecture seule sur le même fichier (mode=ro) ou réplique DATABASE_READ_URL.
+# En WAL, les lecteurs ne prennent pas le verrou de l'écrivain.
+ASYNC_READ_DATABASE_URL = (
+    database_urls(settings.database_read_url)[1] if settings.database_read_url
+    else read_only_url(ASYNC_SQLALCHEMY_DATABASE_URL)
+)
+if ASYNC_READ_DATABASE_URL is not None:
+    read_profile = replace(storage_profile, pool_size=settings.db_read_pool_size or storage_profile.pool_size)
+    async_read_engine = create_async_engine(
+        ASYNC_READ_DATABASE_URL,
+        poolclass=timed_pool_class("read"),
+        **engine_options(ASYNC_READ_DATABASE_URL, read_profile),
+    )
+    apply_profile(async_read_engine.sync_engine, read_profile, read_only=True)
+else:
+    async_read_engine = async_engine
+
+# Comptage des requêtes SQL par requête HTTP, N+1 et journal des requêtes lentes (core.query_stats)
+if settings.sql_instrumentation_enabled:
+    install_query_hooks(engine)
+    install_query_hooks(async_engine.sync_engine)
+    if async_read_engine is not async_engine:
+        install_query_hooks(async_read_engine.sync_engine)
+
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# En-tête par lequel un client demande à relire ses propres écritures (lecture sur l'écrivain)
+READ_YOUR_WRITES_HEADER = "X-Read-Your-Writes"
+
 Base = declarative_base()
 def init_db():
+    from database.fts import create_notes_fts
+    # Enregistrer toutes les tables dans Base.metadata avant create_all
+    from models import utilisateurs, notes, partage_note, tag, user_tag_stats, user_note_revision  # noqa: F401
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        create_notes_fts(connection)
     print("Base de données initialisée.")
 
 def get_db():
@@ -20,6 +80,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db(request: Request):
+    """Session d'écriture (mutations) ; mémorisée sur la requête pour get_async_read_db"""
+    async with AsyncSessionLocal() as db:
+        request.state.writer_session = db
+        yield db
+
+async def get_async_read_db(request: Request):
+    """
+    Session de lecture, sur le pool en lecture seule.
+    Lecture de ses propres écritures : si la requête a déjà ouvert une session d'écriture,
+    ou si le client envoie l'en-tête X-Read-Your-Writes: 1, la session d'écriture est utilisée.
+    """
+    writer_session = getattr(request.state, "writer_session", None)
+    if writer_session is not None:
+        yield writer_session
+        return
+    if request.headers.get(READ_YOUR_WRITES_HEADER) == "1":
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    async with AsyncReadSessionLocal() as db:
+        yield db
         
 def show_tables():
     from sqlalchemy import inspect
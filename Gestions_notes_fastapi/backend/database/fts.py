@@ -0,0 +1,142 @@
+import html
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.sql import column, table
+
+# Table virtuelle FTS5 "external content" adossée à la table notes :
+# seul l'index inversé est stocké, le texte reste dans notes.
+NOTES_FTS_TABLE = "notes_fts"
+
+notes_fts = table(NOTES_FTS_TABLE, column("rowid"), column("titre"), column("contenu"))
+
+NOTES_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {NOTES_FTS_TABLE} USING fts5(
+        titre, contenu,
+        content='notes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO {NOTES_FTS_TABLE}(rowid, titre, contenu) VALUES (new.id, new.titre, new.contenu);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO {NOTES_FTS_TABLE}({NOTES_FTS_TABLE}, rowid, titre, contenu) VALUES ('delete', old.id, old.titre, old.contenu);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE OF titre, contenu ON notes BEGIN
+        INSERT INTO {NOTES_FTS_TABLE}({NOTES_FTS_TABLE}, rowid, titre, contenu) VALUES ('delete', old.id, old.titre, old.contenu);
+        INSERT INTO {NOTES_FTS_TABLE}(rowid, titre, contenu) VALUES (new.id, new.titre, new.contenu);
+    END
+    """,
+]
+
+NOTES_FTS_DROP = [
+    "DROP TRIGGER IF EXISTS notes_fts_au",
+    "DROP TRIGGER IF EXISTS notes_fts_ad",
+    "DROP TRIGGER IF EXISTS notes_fts_ai",
+    f"DROP TABLE IF EXISTS {NOTES_FTS_TABLE}",
+]
+
+# Poids bm25 par colonne : un terme trouvé dans le titre compte plus que dans le contenu
+BM25_WEIGHTS = (10.0, 1.0)
+
+_fts_enabled_cache: Dict[str, bool] = {}
+
+# Saisie de recherche : "phrase entre guillemets" ou mot isolé ; termes passés à FTS5
+_QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Bornes du surlignage posées par snippet() : caractères d'usage privé, remplacés par <mark>
+# seulement après échappement HTML du texte de la note (render_snippet)
+SNIPPET_START = "\ue000"
+SNIPPET_END = "\ue001"
+
+
+def fts5_available(connection) -> bool:
+    """Vérifier que le SQLite utilisé a été compilé avec FTS5"""
+    if connection.dialect.name != "sqlite":
+        return False
+    try:
+        connection.execute(text("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)"))
+        connection.execute(text("DROP TABLE temp.fts5_probe"))
+        return True
+    except Exception:
+        return False
+
+
+def create_notes_fts(connection) -> bool:
+    """Créer la table FTS5 et ses triggers, puis indexer les notes existantes"""
+    if not fts5_available(connection):
+        return False
+    for statement in NOTES_FTS_DDL:
+        connection.execute(text(statement))
+    connection.execute(text(f"INSERT INTO {NOTES_FTS_TABLE}({NOTES_FTS_TABLE}) VALUES ('rebuild')"))
+    _fts_enabled_cache.clear()
+    return True
+
+
+def drop_notes_fts(connection) -> None:
+    for statement in NOTES_FTS_DROP:
+        connection.execute(text(statement))
+    _fts_enabled_cache.clear()
+
+
+def notes_fts_enabled(db) -> bool:
+    """Indique si la recherche peut passer par l'index FTS5 (résultat mis en cache par base)"""
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _fts_enabled_cache:
+        if bind.dialect.name != "sqlite":
+            _fts_enabled_cache[key] = False
+        else:
+            found = db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": NOTES_FTS_TABLE}
+            ).first()
+            _fts_enabled_cache[key] = found is not None
+    return _fts_enabled_cache[key]
+
+
+def build_match_expression(query: str) -> Optional[str]:
+    """
+    Transforme la saisie utilisateur en expression MATCH sûre, avec la syntaxe de l'index en
+    mémoire (search.engine.parse_query) : chaque mot devient un préfixe entre guillemets (ET
+    implicite), `OR` sépare des alternatives, "phrase exacte" reste une phrase FTS5.
+
+    Exemple : `budget OR "compte rendu" client` -> `("budget"*) OR ("compte rendu" "client"*)`.
+    """
+    clauses: List[List[str]] = [[]]
+    for phrase, word in _QUERY_PATTERN.findall(query):
+        if word == "OR":
+            if clauses[-1]:
+                clauses.append([])
+            continue
+        if phrase:
+            terms = _TERM_PATTERN.findall(phrase)
+            if terms:
+                clauses[-1].append('"' + " ".join(terms) + '"')
+        else:
+            clauses[-1].extend(f'"{term}"*' for term in _TERM_PATTERN.findall(word))
+    clauses = [clause for clause in clauses if clause]
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return " ".join(clauses[0])
+    return " OR ".join("(" + " ".join(clause) + ")" for clause in clauses)
+
+
+def render_snippet(extrait: Optional[str]) -> Optional[str]:
+    """
+    Extrait FTS5 prêt pour le HTML : le texte de la note est échappé (un `<script>` saisi dans
+    une note reste du texte), puis les bornes SNIPPET_START / SNIPPET_END deviennent <mark>.
+    """
+    if extrait is None:
+        return None
+    return html.escape(extrait).replace(SNIPPET_START, "<mark>").replace(SNIPPET_END, "</mark>")
@@ -0,0 +1,156 @@
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+
+@dataclass(frozen=True)
+class StorageProfile:
+    """
+    Réglages de stockage appliqués à chaque connexion SQLite (PRAGMA) et au pool de connexions.
+
+    cache_size suit la convention SQLite : négatif = taille en KiB, positif = nombre de pages.
+    """
+    name: str
+    journal_mode: str = "delete"
+    synchronous: str = "full"
+    cache_size: int = -2000
+    mmap_size: int = 0
+    temp_store: str = "default"
+    busy_timeout_ms: int = 5000
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_recycle: int = -1
+    pool_timeout: float = 30.0
+
+    def pragmas(self) -> Dict[str, Any]:
+        return {
+            # journal_mode en premier : les autres réglages s'appliquent au mode choisi
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "cache_size": self.cache_size,
+            "mmap_size": self.mmap_size,
+            "temp_store": self.temp_store,
+            "busy_timeout": self.busy_timeout_ms,
+        }
+
+    def pool_options(self) -> Dict[str, Any]:
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_recycle": self.pool_recycle,
+            "pool_timeout": self.pool_timeout,
+        }
+
+
+PROFILES: Dict[str, StorageProfile] = {
+    # Réglages par défaut de SQLite : journal de rollback, les lecteurs attendent les écritures
+    "legacy": StorageProfile(name="legacy"),
+    # WAL : lectures concurrentes d'une écriture ; synchronous=NORMAL ne synchronise le disque
+    # qu'aux checkpoints (une coupure de courant peut perdre les dernières transactions, jamais
+    # corrompre la base)
+    "wal": StorageProfile(
+        name="wal",
+        journal_mode="wal",
+        synchronous="normal",
+        cache_size=-64000,
+        mmap_size=256 * 1024 * 1024,
+        temp_store="memory",
+    ),
+    # WAL avec synchronisation à chaque commit
+    "durable": StorageProfile(
+        name="durable",
+        journal_mode="wal",
+        synchronous="full",
+        cache_size=-64000,
+        mmap_size=256 * 1024 * 1024,
+        temp_store="memory",
+    ),
+}
+
+DEFAULT_DATABASE_URL = "sqlite:///./notes.db"
+
+# Pilote asynchrone correspondant à chaque pilote synchrone
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "sqlite+pysqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def build_profile(settings) -> StorageProfile:
+    """Profil nommé par settings.storage_profile, surchargé champ par champ par les réglages sqlite_* / db_*"""
+    try:
+        profile = PROFILES[settings.storage_profile]
+    except KeyError:
+        raise ValueError(f"Profil de stockage inconnu : {settings.storage_profile!r} ({', '.join(PROFILES)})")
+    overrides = {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "cache_size": settings.sqlite_cache_size,
+        "mmap_size": settings.sqlite_mmap_size,
+        "temp_store": settings.sqlite_temp_store,
+        "busy_timeout_ms": settings.sqlite_busy_timeout_ms,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_timeout": settings.db_pool_timeout,
+    }
+    return replace(profile, **{key: value for key, value in overrides.items() if value is not None})
+
+
+def database_urls(database_url: Optional[str]) -> tuple:
+    """URL synchrone et URL asynchrone équivalente"""
+    url = make_url(database_url or DEFAULT_DATABASE_URL)
+    async_url = url.set(drivername=_ASYNC_DRIVERS.get(url.drivername, url.drivername))
+    return url, async_url
+
+
+def read_only_url(url):
+    """
+    URL d'une connexion SQLite en lecture seule (mode=ro) sur le même fichier,
+    None si la base n'est pas un fichier SQLite (base en mémoire, autre SGBD)
+    """
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        return None
+    if url.database.startswith("file:"):
+        return url.update_query_dict({"mode": "ro", "uri": "true"})
+    return url.set(database=f"file:{url.database}").update_query_dict({"mode": "ro", "uri": "true"})
+
+
+def engine_options(url, profile: StorageProfile) -> Dict[str, Any]:
+    """Arguments de create_engine / create_async_engine pour le profil"""
+    if url.get_backend_name() != "sqlite":
+        return profile.pool_options()
+    options = {"connect_args": {"check_same_thread": False}}
+    if url.database and url.database != ":memory:":
+        # Base en mémoire : une seule connexion (SingletonThreadPool), pas de réglage de pool
+        options.update(profile.pool_options())
+    return options
+
+
+def apply_profile(engine: Engine, profile: StorageProfile, read_only: bool = False) -> None:
+    """
+    Exécute les PRAGMA du profil à l'ouverture de chaque connexion SQLite du pool.
+    En lecture seule, journal_mode et synchronous (propres à l'écrivain) sont omis
+    et query_only interdit toute écriture, y compris sur une réplique.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    pragmas = profile.pragmas()
+    if read_only:
+        del pragmas["journal_mode"], pragmas["synchronous"]
+        pragmas["query_only"] = 1
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def current_pragmas(connection) -> Dict[str, Any]:
+    """Valeurs effectives des PRAGMA du profil sur une connexion (vérification, benchmark)"""
+    names = ("journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout")
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
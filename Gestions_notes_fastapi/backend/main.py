@@ -1,3 +1,5 @@
+import logging
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -5,9 +7,26 @@ load_dotenv()
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import Response
 
 from config import Settings, settings
+from core.structured_logging import configure_logging
+
+# Avant les autres imports du projet : leurs avertissements passent déjà par le pipeline de logs
+configure_logging(settings.log_level, settings.log_json, settings.log_sample_rates, settings.log_queue_size)
+
+from core.metrics import MetricsMiddleware, PROMETHEUS_CONTENT_TYPE, render_metrics
+from core.principal_cache import principal_cache
+from core.query_stats import QueryStatsMiddleware
+from core.structured_logging import RequestContextMiddleware, logging_stats
 from routers import auth_router, note_router, search_router, partage_router
+from database.database import SessionLocal, async_engine, async_read_engine
+from search.engine import search_engine
+from search.tag_autocomplete import tag_autocomplete
+from services.public_note_cache import public_note_cache
+from utils.password_hashing import password_hashing_pool
+
+logger = logging.getLogger(__name__)
 
 def custom_openapi(app: FastAPI):
     """Configuration personnalisée d'OpenAPI avec authentification Bearer"""
@@ -60,6 +79,18 @@ def create_application() -> FastAPI:
         expose_headers=["*"]
     )
 
+    if settings.sql_instrumentation_enabled:
+        # Requêtes SQL de chaque requête HTTP : en-tête Server-Timing, signalement N+1
+        app.add_middleware(QueryStatsMiddleware)
+
+    # Identifiant de requête (logs, en-tête X-Request-ID) et journal d'accès ; à l'extérieur de
+    # QueryStatsMiddleware pour que le signalement N+1 porte l'identifiant
+    app.add_middleware(RequestContextMiddleware)
+
+    if settings.metrics_enabled:
+        # Ajouté en dernier, donc le plus à l'extérieur : la durée mesurée inclut les autres middlewares
+        app.add_middleware(MetricsMiddleware)
+
     app.include_router(
         auth_router.router, 
         prefix="/api/v1/auth", 
@@ -83,6 +114,26 @@ def create_application() -> FastAPI:
 
     app.openapi = lambda: custom_openapi(app)
 
+    @app.on_event("startup")
+    def build_tag_autocomplete():
+        """Charger les tags et leurs compteurs d'utilisation pour l'auto-complétion"""
+        db = SessionLocal()
+        try:
+            count = tag_autocomplete.rebuild(db)
+            logger.info("Auto-complétion des tags prête (%d tags)", count)
+        except Exception as e:
+            logger.warning("Auto-complétion des tags indisponible, recherche SQL utilisée : %s", e)
+        finally:
+            db.close()
+
+    @app.on_event("shutdown")
+    async def close_database():
+        """Fermer les connexions asynchrones (et les threads aiosqlite associés) et le pool de hachage"""
+        await async_engine.dispose()
+        if async_read_engine is not async_engine:
+            await async_read_engine.dispose()
+        password_hashing_pool.shutdown()
+
     return app
 
 app = create_application()
@@ -105,12 +156,30 @@ def health_check():
     return {
         "status": "healthy", 
         "environment": settings.environment,
-        "debug": settings.debug
+        "debug": settings.debug,
+        "principal_cache": principal_cache.stats(),
+        "password_hashing": password_hashing_pool.stats(),
+        "public_note_cache": public_note_cache.stats(),
+        "search_index": search_engine.stats(),
+        "logging": logging_stats()
     }
 
+if settings.metrics_enabled:
+    @app.get("/metrics", tags=["Health"], include_in_schema=False)
+    def metrics():
+        """Métriques au format d'exposition Prometheus (latences par route, pools, caches)"""
+        return Response(
+            content=render_metrics(
+                pools={"write": async_engine.pool, **({"read": async_read_engine.pool} if async_read_engine is not async_engine else {})},
+                caches={"principal": principal_cache.stats(), "public_note": public_note_cache.stats()},
+                password_hashing=password_hashing_pool.stats(),
+            ),
+            media_type=PROMETHEUS_CONTENT_TYPE,
+        )
+
 if __name__ == "__main__":
     import uvicorn
-    print(f" Démarrage du serveur en mode {'développement' if settings.debug else 'production'}")
+    logger.info("Démarrage du serveur en mode %s", "développement" if settings.debug else "production")
     
     uvicorn.run(
         "main:app",  
@@ -7,7 +7,12 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 
 from config import Settings, settings
+from core.principal_cache import principal_cache
 from routers import auth_router, note_router, search_router, partage_router
+from database.database import SessionLocal, async_engine, async_read_engine
+from search.tag_autocomplete import tag_autocomplete
+from services.public_note_cache import public_note_cache
+from utils.password_hashing import password_hashing_pool
 from swagger_config import create_custom_openapi, get_custom_swagger_ui_html, get_custom_redoc_html
 
 def create_alternative_application() -> FastAPI:
@@ -66,6 +71,24 @@ def create_alternative_application() -> FastAPI:
     # Configuration OpenAPI personnalisée
     app.openapi = lambda: create_custom_openapi(app)
 
+    @app.on_event("startup")
+    def build_tag_autocomplete():
+        db = SessionLocal()
+        try:
+            count = tag_autocomplete.rebuild(db)
+            print(f"🏷️  Auto-complétion des tags prête ({count} tags)")
+        except Exception as e:
+            print(f"⚠️  Auto-complétion des tags indisponible, recherche SQL utilisée : {e}")
+        finally:
+            db.close()
+
+    @app.on_event("shutdown")
+    async def close_database():
+        await async_engine.dispose()
+        if async_read_engine is not async_engine:
+            await async_read_engine.dispose()
+        password_hashing_pool.shutdown()
+
     # Swagger UI personnalisé
     @app.get("/docs", response_class=HTMLResponse, include_in_schema=False)
     async def custom_swagger_ui():
@@ -123,7 +146,10 @@ def health_check_v2():
             "custom_swagger": True,
             "redoc_support": True,
             "enhanced_docs": True
-        }
+        },
+        "principal_cache": principal_cache.stats(),
+        "password_hashing": password_hashing_pool.stats(),
+        "public_note_cache": public_note_cache.stats()
     }
 
 if __name__ == "__main__":
@@ -1,20 +1,32 @@
-import random
-from tokenize import generate_tokens
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+import uuid
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from database.database import Base
+from utils.markdown import get_content_preview
 
 
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        # Listes d'un propriétaire triées par date (get_user_notes, recherche, pagination)
+        Index("ix_notes_owner_date", "owner_id", "date_modification", "id"),
+        # Filtre par visibilité
+        Index("ix_notes_owner_visibilite_date", "owner_id", "visibilite", "date_modification"),
+        # Accès aux notes publiques par token
+        Index("ux_notes_token_publique", "token_publique", unique=True),
+    )
     
     id = Column(Integer, primary_key=True)
     titre = Column(String(255), nullable=False)
     contenu = Column(Text)
+    # Aperçu du contenu (get_content_preview), recalculé à chaque écriture : les listes en vue
+    # résumée le renvoient sans lire le contenu
+    apercu = Column(String(255), nullable=True)
     owner_id = Column(Integer, ForeignKey("utilisateurs.id", ondelete="CASCADE"), nullable=False)
     date_creation = Column(DateTime(timezone=True), server_default=func.now())
-    date_modification = Column(DateTime(timezone=True), onupdate=func.now())
+    # Renseignée dès la création : sert de clé de tri et de pagination par curseur
+    date_modification = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now())
     visibilite = Column(String(50), default="prive")  
     token_publique = Column(String(255), nullable=True)  # Token pour les notes publiques
 
@@ -22,9 +34,22 @@ class Note(Base):
     partages = relationship("PartageNote", back_populates="note", cascade="all, delete-orphan")
     tags = relationship("Tag", secondary="note_tags", back_populates="notes")
 
+    @validates("contenu")
+    def _update_apercu(self, key, contenu):
+        self.apercu = self.preview(contenu)
+        return contenu
+
+    @staticmethod
+    def preview(contenu) -> str:
+        return get_content_preview(contenu or "")
+
+    @staticmethod
+    def new_public_token() -> str:
+        return str(uuid.uuid4())  # Token unique (index unique sur token_publique)
+
     def generate_public_token(self):
         if self.visibilite == "public":
-            self.token_publique = str(random.randint(100000, 999999))  # Fonction pour générer un token unique
+            self.token_publique = self.new_public_token()
         else:
             self.token_publique = None
             
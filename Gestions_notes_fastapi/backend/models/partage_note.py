@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, String, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database.database import Base
 
 class PartageNote(Base):
     __tablename__ = "partage_notes"
+    __table_args__ = (
+        # Un seul partage par (note, destinataire) ; sert aussi les recherches par note
+        Index("ux_partage_notes_note_recipient", "note_id", "partage_avec_utilisateur_id", unique=True),
+        # Notes partagées avec un utilisateur
+        Index("ix_partage_notes_recipient", "partage_avec_utilisateur_id", "note_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False)
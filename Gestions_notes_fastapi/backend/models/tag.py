@@ -1,5 +1,5 @@
 # models/tag.py - Version corrigée
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from database.database import Base
@@ -8,15 +8,17 @@ from database.database import Base
 note_tags = Table(
     'note_tags',
     Base.metadata,
-    Column('note_id', Integer, ForeignKey('notes.id', ondelete='CASCADE')),
-    Column('tag_id', Integer, ForeignKey('tags.id', ondelete='CASCADE'))
+    Column('note_id', Integer, ForeignKey('notes.id', ondelete='CASCADE'), primary_key=True),
+    Column('tag_id', Integer, ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    # La clé primaire (note_id, tag_id) sert les tags d'une note, cet index les notes d'un tag
+    Index('ix_note_tags_tag', 'tag_id', 'note_id')
 )
 
 class Tag(Base):
     __tablename__ = "tags"
 
     id = Column(Integer, primary_key=True, index=True)
-    nom = Column(String(100), nullable=False, index=True)
+    nom = Column(String(100), nullable=False, unique=True, index=True)  # Unique : pas de doublons entre requêtes concurrentes
 
     date_creation = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from database.database import Base
+
+class UserNoteRevision(Base):
+    """
+    Compteur d'écritures des notes d'un utilisateur (création, modification, suppression),
+    incrémenté par NoteService dans la même transaction que les notes : version exacte des
+    index en mémoire de chaque processus, quel que soit le worker qui a écrit.
+    """
+    __tablename__ = "user_note_revisions"
+
+    utilisateur_id = Column(Integer, ForeignKey("utilisateurs.id", ondelete="CASCADE"), primary_key=True)
+    revision = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<UserNoteRevision(utilisateur_id={self.utilisateur_id}, revision={self.revision})>"
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Index
+from sqlalchemy.sql import func
+from database.database import Base
+
+class UserTagStats(Base):
+    """
+    Compteurs d'utilisation des tags par utilisateur (nombre de ses notes portant le tag),
+    maintenus par NoteService dans la même transaction que les notes.
+    """
+    __tablename__ = "user_tag_stats"
+    __table_args__ = (
+        # Tags populaires d'un utilisateur : lecture top-N dans l'ordre de l'index
+        Index("ix_user_tag_stats_user_count", "utilisateur_id", "count", "tag_id"),
+    )
+
+    utilisateur_id = Column(Integer, ForeignKey("utilisateurs.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    last_used = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<UserTagStats(utilisateur_id={self.utilisateur_id}, tag_id={self.tag_id}, count={self.count})>"
@@ -0,0 +1,42 @@
+# rebuild_tag_stats.py
+"""
+Recalcule la table user_tag_stats (compteurs d'utilisation des tags par utilisateur)
+à partir de note_tags. À lancer après un import direct en base ou en cas de doute
+sur les compteurs ; l'application doit être redémarrée pour recharger l'auto-complétion.
+
+Usage (depuis backend/) :
+    python rebuild_tag_stats.py
+"""
+import sys
+import os
+
+# Ajouter le répertoire courant au Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.database import SessionLocal
+from models.utilisateurs import Utilisateur
+from models.partage_note import PartageNote
+from repositories.tag_repository import TagRepository
+
+
+def rebuild_tag_stats() -> int:
+    db = SessionLocal()
+    try:
+        rows = TagRepository(db).rebuild_usage_stats()
+        db.commit()
+        return rows
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("🔄 Recalcul des compteurs d'utilisation des tags...")
+    try:
+        rows = rebuild_tag_stats()
+        print(f"✅ {rows} compteurs (utilisateur, tag) recalculés")
+    except Exception as e:
+        print(f"❌ Erreur lors du recalcul : {e}")
+        sys.exit(1)
@@ -1,10 +1,12 @@
-from typing import Generic, TypeVar, Type, Optional, List
+from typing import Any, Callable, Generic, TypeVar, Type, Optional, List
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
 ModelType = TypeVar("ModelType")
 CreateSchemaType = TypeVar("CreateSchemaType")
 UpdateSchemaType = TypeVar("UpdateSchemaType")
+ResultType = TypeVar("ResultType")
 
 class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType], db: Session):
@@ -46,4 +48,43 @@ class BaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         return obj
 
     def count(self) -> int:
-        return self.db.query(self.model).count()
\ No newline at end of file
+        return self.db.query(self.model).count()
+
+
+class AsyncBaseRepository(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    Version asynchrone d'un repository, pour une AsyncSession.
+
+    Les requêtes restent écrites une seule fois, dans le repository synchrone :
+    elles sont exécutées par AsyncSession.run_sync, dont les entrées/sorties passent
+    par le driver asynchrone (aiosqlite) sans occuper de thread du serveur.
+    """
+
+    def __init__(self, model: Type[ModelType], db: AsyncSession):
+        self.model = model
+        self.db = db
+
+    def _sync_repository(self, session: Session) -> BaseRepository:
+        return BaseRepository(self.model, session)
+
+    async def _run(self, operation: Callable[[Any], ResultType]) -> ResultType:
+        """Exécute operation(repository synchrone) dans la session asynchrone"""
+        return await self.db.run_sync(lambda session: operation(self._sync_repository(session)))
+
+    async def get(self, id: int) -> Optional[ModelType]:
+        return await self._run(lambda repository: repository.get(id))
+
+    async def get_multi(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
+        return await self._run(lambda repository: repository.get_multi(skip, limit))
+
+    async def create(self, obj_in: CreateSchemaType) -> ModelType:
+        return await self._run(lambda repository: repository.create(obj_in))
+
+    async def update(self, db_obj: ModelType, obj_in: UpdateSchemaType) -> ModelType:
+        return await self._run(lambda repository: repository.update(db_obj, obj_in))
+
+    async def delete(self, id: int) -> Optional[ModelType]:
+        return await self._run(lambda repository: repository.delete(id))
+
+    async def count(self) -> int:
+        return await self._run(lambda repository: repository.count())
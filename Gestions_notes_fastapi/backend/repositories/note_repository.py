@@ -1,106 +1,279 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_, func
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer, load_only, selectinload
+from sqlalchemy import or_, and_, func, insert, literal_column, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from database.fts import (
+    notes_fts, notes_fts_enabled, build_match_expression, render_snippet, BM25_WEIGHTS, NOTES_FTS_TABLE,
+    SNIPPET_END, SNIPPET_START
+)
 from models.notes import Note
-from models.tag import Tag
+from models.tag import Tag, note_tags
 from models.partage_note import PartageNote
+from models.user_note_revision import UserNoteRevision
 from schemas.note_schema import NoteCreate, NoteUpdate
-from repositories.base import BaseRepository
+from repositories.base import AsyncBaseRepository, BaseRepository
+from utils.note_fields import NoteFields
+from utils.pagination import Keyset, keyset_filter
+
+
+def _list_options(fields: Optional[NoteFields]) -> list:
+    """
+    Chargement des notes d'une liste : complet (sauf l'aperçu, non renvoyé), ou limité aux colonnes
+    des champs demandés (plus date_modification, clé du tri et du curseur) ; tags chargés à part
+    seulement s'ils sont demandés.
+    """
+    if fields is None:
+        return [selectinload(Note.tags), defer(Note.apercu)]
+    options = [load_only(Note.date_modification, *(getattr(Note, name) for name in fields.columns))]
+    if fields.with_tags:
+        options.append(selectinload(Note.tags))
+    return options
+
 
 class NoteRepository(BaseRepository[Note, NoteCreate, NoteUpdate]):
     def __init__(self, db: Session):
         super().__init__(Note, db)
 
-    def get_user_notes(self, utilisateur_id: int, skip: int = 0, limit: int = 100) -> List[Note]:
+    def _paginate(self, query, skip: int, limit: int, keyset: Optional[Keyset]):
+        """
+        Tri stable (date_modification desc, id desc) puis pagination :
+        par curseur si un Keyset est fourni, sinon par skip/limit (compatibilité).
+        """
+        query = query.order_by(Note.date_modification.desc(), Note.id.desc())
+        if keyset is None:
+            return query.offset(skip).limit(limit)
+        if not keyset.is_first_page:
+            query = query.filter(
+                keyset_filter(Note.date_modification, Note.id, keyset, self.db.get_bind().dialect.name)
+            )
+        return query.limit(limit)
+
+    def get_user_notes(self, utilisateur_id: int, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
         """
         Récupère toutes les notes accessibles à un utilisateur :
         - Ses propres notes (owner_id == utilisateur_id)
         - Les notes partagées avec lui (via PartageNote)
+
+        Les identifiants accessibles sont calculés par un UNION ALL (chaque branche peut
+        utiliser son propre index) plutôt que par un OUTER JOIN + DISTINCT qui multiplie
+        les lignes par le nombre de partages ; les tags sont chargés à part (selectinload).
         """
-        
-        return  (
+        query = (
             self.db.query(Note)
-            .options(joinedload(Note.tags))
-            .outerjoin(PartageNote, Note.id == PartageNote.note_id)
-            .filter(
-                or_(
-                    Note.owner_id == utilisateur_id,
-                    PartageNote.partage_avec_utilisateur_id == utilisateur_id
-                )
-            )
-            .distinct()  # Important pour éviter les doublons
-            .order_by(Note.date_modification.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
+            .options(*_list_options(fields))
+            .filter(Note.id.in_(self._accessible_note_ids(utilisateur_id)))
         )
+        return self._paginate(query, skip, limit, keyset).all()
+
+    @staticmethod
+    def _accessible_note_ids(utilisateur_id: int):
+        owned = select(Note.id).where(Note.owner_id == utilisateur_id)
+        shared = select(PartageNote.note_id).where(PartageNote.partage_avec_utilisateur_id == utilisateur_id)
+        return union_all(owned, shared)
 
     def get_user_note_by_id(self, note_id: int, utilisateur_id: int) -> Optional[Note]:
         return (
             self.db.query(Note)
-            .options(joinedload(Note.tags))
+            .options(selectinload(Note.tags))
             .filter(and_(Note.id == note_id, Note.owner_id == utilisateur_id))
             .first()
         )
 
+    def get_user_notes_by_ids(self, utilisateur_id: int, note_ids: List[int], fields: Optional[NoteFields] = None) -> List[Note]:
+        """Charge les notes demandées en conservant l'ordre des identifiants fournis"""
+        if not note_ids:
+            return []
+        notes = (
+            self.db.query(Note)
+            .options(*_list_options(fields))
+            .filter(and_(Note.owner_id == utilisateur_id, Note.id.in_(note_ids)))
+            .all()
+        )
+        by_id = {note.id: note for note in notes}
+        return [by_id[note_id] for note_id in note_ids if note_id in by_id]
+
+    def get_owned_note_titles(self, utilisateur_id: int, note_ids: Sequence[int]) -> Dict[int, str]:
+        """Titres des notes demandées dont l'utilisateur est propriétaire (sans charger les notes)"""
+        if not note_ids:
+            return {}
+        rows = self.db.query(Note.id, Note.titre).filter(and_(Note.owner_id == utilisateur_id, Note.id.in_(note_ids)))
+        return {note_id: titre for note_id, titre in rows}
+
+    def fts_enabled(self) -> bool:
+        return notes_fts_enabled(self.db)
+
+    def get_revision(self, utilisateur_id: int) -> int:
+        """Compteur d'écritures des notes d'un utilisateur (0 s'il n'a jamais écrit) : version des index en mémoire"""
+        revision = (
+            self.db.query(UserNoteRevision.revision)
+            .filter(UserNoteRevision.utilisateur_id == utilisateur_id)
+            .scalar()
+        )
+        return revision or 0
+
+    def bump_revision(self, utilisateur_id: int) -> int:
+        """
+        Incrémente le compteur d'écritures de l'utilisateur et renvoie sa nouvelle valeur.
+        S'exécute dans la transaction courante : le commit est fait par l'appelant.
+        """
+        dialect = postgresql if self.db.get_bind().dialect.name == "postgresql" else sqlite
+        statement = dialect.insert(UserNoteRevision).values(utilisateur_id=utilisateur_id, revision=1)
+        return self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[UserNoteRevision.utilisateur_id],
+                set_={"revision": UserNoteRevision.revision + 1}
+            ).returning(UserNoteRevision.revision)
+        ).scalar_one()
+
+    def iter_user_note_texts(self, utilisateur_id: int, batch_size: int = 1000) -> Iterator[Tuple[int, str, Optional[str]]]:
+        """(id, titre, contenu) des notes d'un utilisateur, lus par lots, pour construire son index"""
+        return iter(
+            self.db.query(Note.id, Note.titre, Note.contenu)
+            .filter(Note.owner_id == utilisateur_id)
+            .execution_options(yield_per=batch_size)
+        )
+
     def get_public_note_by_token(self, token: str) -> Optional[Note]:
         return (
             self.db.query(Note)
-            .options(joinedload(Note.tags))
+            .options(selectinload(Note.tags))
             .filter(and_(Note.token_publique == token, Note.visibilite == "public"))
             .first()
         )
 
-    def search_user_notes(self, utilisateur_id: int, query: str, skip: int = 0, limit: int = 100) -> List[Note]:
+    def search_user_notes(self, utilisateur_id: int, query: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        """
+        Recherche plein texte dans les notes de l'utilisateur.
+        Passe par l'index FTS5 (classement bm25 + extrait surligné dans note.snippet,
+        texte échappé en HTML et termes trouvés entre <mark>)
+        et retombe sur un LIKE quand FTS5 n'est pas disponible.
+        En pagination par curseur, les résultats sont triés par date de modification.
+        """
+        match_expression = build_match_expression(query)
+        if match_expression and notes_fts_enabled(self.db):
+            return self._search_user_notes_fts(utilisateur_id, match_expression, skip, limit, keyset, fields)
+        return self._search_user_notes_like(utilisateur_id, query, skip, limit, keyset, fields)
+
+    def _search_user_notes_fts(self, utilisateur_id: int, match_expression: str, skip: int, limit: int, keyset: Optional[Keyset], fields: Optional[NoteFields]) -> List[Note]:
+        fts_table = literal_column(NOTES_FTS_TABLE)
+        snippet = func.snippet(fts_table, -1, SNIPPET_START, SNIPPET_END, "…", 16)
+
+        query = (
+            self.db.query(Note, snippet)
+            .options(*_list_options(fields))
+            .join(notes_fts, notes_fts.c.rowid == Note.id)
+            .filter(and_(Note.owner_id == utilisateur_id, fts_table.op("MATCH")(match_expression)))
+        )
+        if keyset is None:
+            query = query.order_by(func.bm25(fts_table, *BM25_WEIGHTS), Note.date_modification.desc()).offset(skip).limit(limit)
+        else:
+            query = self._paginate(query, skip, limit, keyset)
+        rows = query.all()
+
+        notes = []
+        for note, extrait in rows:
+            note.snippet = render_snippet(extrait)
+            notes.append(note)
+        return notes
+
+    def _search_user_notes_like(self, utilisateur_id: int, query: str, skip: int, limit: int, keyset: Optional[Keyset], fields: Optional[NoteFields]) -> List[Note]:
         search_filter = or_(
             Note.titre.contains(query),
             Note.contenu.contains(query)
         )
         
-        return (
+        query = (
             self.db.query(Note)
-            .options(joinedload(Note.tags))
+            .options(*_list_options(fields))
             .filter(and_(Note.owner_id == utilisateur_id, search_filter))
-            .order_by(Note.date_modification.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return self._paginate(query, skip, limit, keyset).all()
 
-    def filter_user_notes_by_visibility(self, utilisateur_id: int, visibilite: str, skip: int = 0, limit: int = 100) -> List[Note]:
-        return (
+    def filter_user_notes_by_visibility(self, utilisateur_id: int, visibilite: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        query = (
             self.db.query(Note)
-            .options(joinedload(Note.tags))
+            .options(*_list_options(fields))
             .filter(and_(Note.owner_id == utilisateur_id, Note.visibilite == visibilite))
-            .order_by(Note.date_modification.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return self._paginate(query, skip, limit, keyset).all()
 
-    def filter_user_notes_by_tag(self, utilisateur_id: int, nom_tag: str, skip: int = 0, limit: int = 100) -> List[Note]:
-        return (
+    def filter_user_notes_by_tag(self, utilisateur_id: int, nom_tag: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        query = (
             self.db.query(Note)
-            .options(joinedload(Note.tags))
+            .options(*_list_options(fields))
             .join(Note.tags)
             .filter(and_(Note.owner_id == utilisateur_id, Tag.nom == nom_tag.lower()))
-            .order_by(Note.date_modification.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
         )
+        return self._paginate(query, skip, limit, keyset).all()
+
+    def insert_many(self, rows: List[Dict[str, Any]], tag_ids: Sequence[Sequence[int]]) -> List[int]:
+        """
+        Insérer des notes et leurs associations de tags par INSERT groupés (pas de commit).
+        `tag_ids[i]` liste les tags de `rows[i]` ; renvoie les ids des notes dans l'ordre des lignes.
+        """
+        if not rows:
+            return []
+        # INSERT Core sur la table (et non l'entité) : un seul INSERT ... VALUES (...), (...) RETURNING
+        # par page de lignes. L'ordre de RETURNING n'est pas garanti, mais les ids sont attribués
+        # dans l'ordre des VALUES (max(id) + 1 en SQLite, séquence en PostgreSQL) : triés, ils suivent
+        # `rows`. sort_by_parameter_order ferait à la place un INSERT par ligne en SQLite.
+        table = Note.__table__
+        note_ids = sorted(self.db.execute(insert(table).returning(table.c.id), rows).scalars())
+        links = [
+            {"note_id": note_id, "tag_id": tag_id}
+            for note_id, note_tag_ids in zip(note_ids, tag_ids)
+            for tag_id in note_tag_ids
+        ]
+        if links:
+            self.db.execute(insert(note_tags), links)
+        return note_ids
 
     def count_user_notes(self, utilisateur_id: int) -> int:
         return self.db.query(Note).filter(Note.owner_id == utilisateur_id).count()
 
-    def get_shared_with_user(self, utilisateur_id: int, skip: int = 0, limit: int = 100) -> List[Note]:
-        return (
+    def get_shared_with_user(self, utilisateur_id: int, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None) -> List[Note]:
+        query = (
             self.db.query(Note)
-            .options(joinedload(Note.tags))
+            .options(selectinload(Note.tags))
             .join(PartageNote)
-            .filter(PartageNote.partage_avec_utilisateur == utilisateur_id)
-            .order_by(Note.date_modification.desc())
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
\ No newline at end of file
+            .filter(PartageNote.partage_avec_utilisateur_id == utilisateur_id)
+        )
+        return self._paginate(query, skip, limit, keyset).all()
+
+
+class AsyncNoteRepository(AsyncBaseRepository[Note, NoteCreate, NoteUpdate]):
+    """NoteRepository pour une AsyncSession (mêmes requêtes, exécutées via run_sync)"""
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(Note, db)
+
+    def _sync_repository(self, session: Session) -> NoteRepository:
+        return NoteRepository(session)
+
+    async def get_user_notes(self, utilisateur_id: int, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        return await self._run(lambda repository: repository.get_user_notes(utilisateur_id, skip, limit, keyset, fields))
+
+    async def get_user_note_by_id(self, note_id: int, utilisateur_id: int) -> Optional[Note]:
+        return await self._run(lambda repository: repository.get_user_note_by_id(note_id, utilisateur_id))
+
+    async def get_user_notes_by_ids(self, utilisateur_id: int, note_ids: List[int], fields: Optional[NoteFields] = None) -> List[Note]:
+        return await self._run(lambda repository: repository.get_user_notes_by_ids(utilisateur_id, note_ids, fields))
+
+    async def get_public_note_by_token(self, token: str) -> Optional[Note]:
+        return await self._run(lambda repository: repository.get_public_note_by_token(token))
+
+    async def search_user_notes(self, utilisateur_id: int, query: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        return await self._run(lambda repository: repository.search_user_notes(utilisateur_id, query, skip, limit, keyset, fields))
+
+    async def filter_user_notes_by_visibility(self, utilisateur_id: int, visibilite: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        return await self._run(lambda repository: repository.filter_user_notes_by_visibility(utilisateur_id, visibilite, skip, limit, keyset, fields))
+
+    async def filter_user_notes_by_tag(self, utilisateur_id: int, nom_tag: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        return await self._run(lambda repository: repository.filter_user_notes_by_tag(utilisateur_id, nom_tag, skip, limit, keyset, fields))
+
+    async def count_user_notes(self, utilisateur_id: int) -> int:
+        return await self._run(lambda repository: repository.count_user_notes(utilisateur_id))
+
+    async def get_shared_with_user(self, utilisateur_id: int, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None) -> List[Note]:
+        return await self._run(lambda repository: repository.get_shared_with_user(utilisateur_id, skip, limit, keyset))
@@ -1,49 +1,160 @@
-from typing import List, Optional
+from collections import Counter
+from typing import Callable, Iterable, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from models.tag import Tag
-from repositories.base import BaseRepository
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from models.notes import Note
+from models.tag import Tag, note_tags
+from models.user_tag_stats import UserTagStats
+from repositories.base import BaseRepository, ResultType
+from search.tag_autocomplete import normalize_tag
 
 class TagRepository:
     def __init__(self, db: Session):
         self.db = db
+        # Tags insérés par le dernier resolve_tags : publiés dans l'auto-complétion par
+        # l'appelant après son commit (un tag d'une transaction annulée n'y apparaît pas)
+        self.created_tags: List[str] = []
 
     def get_or_create(self, tag_nom: str) -> Tag:
         """Obtenir ou créer un tag"""
-        tag_nom = tag_nom.lower().strip()
-        tag = self.db.query(Tag).filter(Tag.nom == tag_nom).first()
+        return self.resolve_tags([tag_nom])[0]
 
-        if not tag:
-            tag = Tag(nom=tag_nom)
-            self.db.add(tag)
-            self.db.flush()  
-        
-        return tag
+    def resolve_tags(self, tag_noms: Iterable[str]) -> List[Tag]:
+        """
+        Obtenir ou créer plusieurs tags en une fois, dans l'ordre des noms fournis (sans doublons) :
+        une requête IN pour les tags existants, puis un seul INSERT ... ON CONFLICT DO NOTHING
+        pour les manquants. L'index unique sur tags.nom évite les doublons entre requêtes concurrentes.
+        """
+        noms = list(dict.fromkeys(normalize_tag(nom) for nom in tag_noms))
+        self.created_tags = []
+        if not noms:
+            return []
+
+        tags = {tag.nom: tag for tag in self.db.query(Tag).filter(Tag.nom.in_(noms))}
+        missing = [nom for nom in noms if nom not in tags]
+        if missing:
+            self.db.execute(
+                self._insert(Tag)
+                .values([{"nom": nom} for nom in missing])
+                .on_conflict_do_nothing(index_elements=[Tag.nom])
+            )
+            for tag in self.db.query(Tag).filter(Tag.nom.in_(missing)):
+                tags[tag.nom] = tag
+                self.created_tags.append(tag.nom)
+
+        return [tags[nom] for nom in noms]
 
     def get_by_name(self, tag_nom: str) -> Optional[Tag]:
         """Obtenir un tag par nom"""
-        return self.db.query(Tag).filter(Tag.nom == tag_nom.lower().strip()).first()
+        return self.db.query(Tag).filter(Tag.nom == normalize_tag(tag_nom)).first()
 
-    def get_popular_tags(self, utilisateur_id: int, limit: int = 20) -> List[Tag]:
-        """Obtenir les tags les plus utilisés par un utilisateur"""
-        from models.notes import Note, note_tags
-        
+    def get_popular_tags(self, utilisateur_id: int, limit: int = 20) -> List[Tuple[Tag, int]]:
+        """
+        Obtenir les tags les plus utilisés par un utilisateur.
+        Lecture top-N sur les compteurs matérialisés (index utilisateur_id, count).
+        """
         return (
-            self.db.query(Tag, func.count(note_tags.c.note_id).label('count'))
-            .join(note_tags)
-            .join(Note)
-            .filter(Note.utilisateur_id == utilisateur_id)
-            .group_by(Tag.id)
-            .order_by(func.count(note_tags.c.note_id).desc())
+            self.db.query(Tag, UserTagStats.count)
+            .join(UserTagStats, UserTagStats.tag_id == Tag.id)
+            .filter(UserTagStats.utilisateur_id == utilisateur_id)
+            .order_by(UserTagStats.count.desc(), UserTagStats.tag_id.desc())
             .limit(limit)
             .all()
         )
 
+    def record_usage(self, utilisateur_id: int, added_tag_ids: Iterable[int] = (), removed_tag_ids: Iterable[int] = ()) -> None:
+        """
+        Mettre à jour les compteurs d'utilisation après ajout/retrait de tags sur une ou plusieurs notes
+        (un tag répété compte autant de fois : création groupée).
+        S'exécute dans la transaction courante : le commit est fait par l'appelant.
+        """
+        added = Counter(added_tag_ids)
+        removed = Counter(removed_tag_ids)
+
+        if added:
+            # Une instruction compilée une fois, exécutée pour chaque tag (executemany)
+            statement = self._insert(UserTagStats).values(last_used=func.now())
+            self.db.execute(
+                statement.on_conflict_do_update(
+                    index_elements=[UserTagStats.utilisateur_id, UserTagStats.tag_id],
+                    set_={"count": UserTagStats.count + statement.excluded.count, "last_used": statement.excluded.last_used}
+                ),
+                [
+                    {"utilisateur_id": utilisateur_id, "tag_id": tag_id, "count": count}
+                    for tag_id, count in sorted(added.items())
+                ]
+            )
+
+        if removed:
+            # Une requête par décrément distinct (1 dans le cas courant d'une seule note)
+            for count in sorted(set(removed.values())):
+                tag_ids = sorted(tag_id for tag_id, n in removed.items() if n == count)
+                owned = (UserTagStats.utilisateur_id == utilisateur_id) & UserTagStats.tag_id.in_(tag_ids)
+                self.db.execute(update(UserTagStats).where(owned).values(count=UserTagStats.count - count))
+            owned = (UserTagStats.utilisateur_id == utilisateur_id) & UserTagStats.tag_id.in_(sorted(removed))
+            self.db.execute(delete(UserTagStats).where(owned & (UserTagStats.count <= 0)))
+
+    def rebuild_usage_stats(self) -> int:
+        """Recalculer tous les compteurs à partir de note_tags (pas de commit)"""
+        usage = (
+            select(
+                Note.owner_id,
+                note_tags.c.tag_id,
+                func.count(),
+                func.max(func.coalesce(Note.date_modification, Note.date_creation)),
+            )
+            .join(note_tags, note_tags.c.note_id == Note.id)
+            .group_by(Note.owner_id, note_tags.c.tag_id)
+        )
+        self.db.execute(delete(UserTagStats))
+        self.db.execute(
+            insert(UserTagStats).from_select(["utilisateur_id", "tag_id", "count", "last_used"], usage)
+        )
+        return self.db.query(UserTagStats).count()
+
+    def _insert(self, model):
+        """INSERT propre au dialecte, qui expose on_conflict_do_update / on_conflict_do_nothing"""
+        dialect = postgresql if self.db.get_bind().dialect.name == "postgresql" else sqlite
+        return dialect.insert(model)
+
     def search_tags(self, query: str, limit: int = 10) -> List[Tag]:
-        """Rechercher des tags"""
+        """
+        Rechercher des tags par préfixe.
+        Comparaison par intervalle plutôt que LIKE : elle utilise l'index sur tags.nom.
+        """
+        prefix = query.lower().strip()
         return (
             self.db.query(Tag)
-            .filter(Tag.nom.contains(query.lower()))
+            .filter(Tag.nom >= prefix, Tag.nom < prefix + "\U0010ffff")
+            .order_by(Tag.nom)
             .limit(limit)
             .all()
-        )
\ No newline at end of file
+        )
+
+
+class AsyncTagRepository:
+    """TagRepository pour une AsyncSession (mêmes requêtes, exécutées via run_sync)"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _run(self, operation: Callable[[TagRepository], ResultType]) -> ResultType:
+        return await self.db.run_sync(lambda session: operation(TagRepository(session)))
+
+    async def get_or_create(self, tag_nom: str) -> Tag:
+        return await self._run(lambda repository: repository.get_or_create(tag_nom))
+
+    async def resolve_tags(self, tag_noms: Iterable[str]) -> List[Tag]:
+        tag_noms = list(tag_noms)
+        return await self._run(lambda repository: repository.resolve_tags(tag_noms))
+
+    async def get_by_name(self, tag_nom: str) -> Optional[Tag]:
+        return await self._run(lambda repository: repository.get_by_name(tag_nom))
+
+    async def get_popular_tags(self, utilisateur_id: int, limit: int = 20) -> List[Tuple[Tag, int]]:
+        return await self._run(lambda repository: repository.get_popular_tags(utilisateur_id, limit))
+
+    async def search_tags(self, query: str, limit: int = 10) -> List[Tag]:
+        return await self._run(lambda repository: repository.search_tags(query, limit))
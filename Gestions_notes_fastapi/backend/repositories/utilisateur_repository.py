@@ -1,8 +1,10 @@
-from typing import Optional
+from typing import Iterable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from core.principal_cache import principal_cache
 from models.utilisateurs import Utilisateur
 from schemas.utilisateur_schema import UserCreate, UserUpdate
-from repositories.base import BaseRepository
+from repositories.base import AsyncBaseRepository, BaseRepository
 from utils.security import hash_password, verify_password
 
 class UserRepository(BaseRepository[Utilisateur, UserCreate, UserUpdate]):
@@ -13,9 +15,17 @@ class UserRepository(BaseRepository[Utilisateur, UserCreate, UserUpdate]):
         """Obtenir un utilisateur par email"""
         return self.db.query(Utilisateur).filter(Utilisateur.email == email).first()
 
-    def create_user(self, user_create: UserCreate) -> Utilisateur:
-        """Créer un nouvel utilisateur avec mot de passe hashé"""
-        hashed_password = hash_password(user_create.mot_de_passe)
+    def get_by_emails(self, emails: Iterable[str]) -> List[Utilisateur]:
+        """Obtenir plusieurs utilisateurs par email en une requête IN"""
+        emails = list(emails)
+        if not emails:
+            return []
+        return self.db.query(Utilisateur).filter(Utilisateur.email.in_(emails)).all()
+
+    def create_user(self, user_create: UserCreate, hashed_password: Optional[str] = None) -> Utilisateur:
+        """Créer un nouvel utilisateur avec mot de passe hashé (hash fourni ou calculé ici)"""
+        if hashed_password is None:
+            hashed_password = hash_password(user_create.mot_de_passe)
         db_user = Utilisateur(
             email=user_create.email,
             mot_de_passe=hashed_password
@@ -25,6 +35,22 @@ class UserRepository(BaseRepository[Utilisateur, UserCreate, UserUpdate]):
         self.db.refresh(db_user)
         return db_user
 
+    def update(self, db_obj: Utilisateur, obj_in: UserUpdate) -> Utilisateur:
+        """Modifier un utilisateur et retirer son entrée du cache des utilisateurs authentifiés"""
+        utilisateur = super().update(db_obj, obj_in)
+        principal_cache.invalidate(utilisateur.id)
+        return utilisateur
+
+    def delete(self, id: int) -> Optional[Utilisateur]:
+        """Supprimer un utilisateur ; ses tokens encore valides sont refusés aussitôt"""
+        utilisateur = super().delete(id)
+        principal_cache.invalidate(id)
+        return utilisateur
+
+    def set_active(self, utilisateur: Utilisateur, est_actif: bool) -> Utilisateur:
+        """Activer ou désactiver un compte (un compte désactivé ne peut plus s'authentifier)"""
+        return self.update(utilisateur, {"est_actif": est_actif})
+
     def authenticate(self, email: str, mot_de_passe: str) -> Optional[Utilisateur]:
         """Authentifier un utilisateur"""
         utilisateur = self.get_by_email(email)
@@ -36,3 +62,25 @@ class UserRepository(BaseRepository[Utilisateur, UserCreate, UserUpdate]):
         """Vérifier si l'utilisateur est actif"""
         return utilisateur.est_actif
 
+
+class AsyncUserRepository(AsyncBaseRepository[Utilisateur, UserCreate, UserUpdate]):
+    """
+    UserRepository pour une AsyncSession.
+    Le hachage bcrypt (coûteux en CPU) n'est pas fait ici : l'appelant fournit le hash
+    calculé hors de la boucle d'événements.
+    """
+
+    def __init__(self, db: AsyncSession):
+        super().__init__(Utilisateur, db)
+
+    def _sync_repository(self, session: Session) -> UserRepository:
+        return UserRepository(session)
+
+    async def get_by_email(self, email: str) -> Optional[Utilisateur]:
+        return await self._run(lambda repository: repository.get_by_email(email))
+
+    async def create_user(self, user_create: UserCreate, hashed_password: str) -> Utilisateur:
+        return await self._run(lambda repository: repository.create_user(user_create, hashed_password))
+
+    async def set_active(self, utilisateur: Utilisateur, est_actif: bool) -> Utilisateur:
+        return await self._run(lambda repository: repository.set_active(utilisateur, est_actif))
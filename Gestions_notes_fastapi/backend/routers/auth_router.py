@@ -1,55 +1,67 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.auth import get_current_user
-from database.database import get_db
-from models.utilisateurs import Utilisateur
+from database.database import get_async_db
+from core.principal_cache import Principal
 from schemas.auth_schema import LoginRequest, Token
 from schemas.utilisateur_schema import UserCreate, UserResponse
-from services.auth_service import AuthService
-from core.exceptions import AuthenticationException, ValidationException
+from services.auth_service import AsyncAuthService
+from core.exceptions import AuthenticationException, ServiceUnavailableException, ValidationException
 
 router = APIRouter()
 
+def service_unavailable(error: ServiceUnavailableException) -> HTTPException:
+    """503 avec Retry-After quand le pool de hachage des mots de passe est saturé"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
 @router.post("/register", response_model=dict, status_code=status.HTTP_201_CREATED)
-def register(
+async def register(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
    
     try:
-        auth_service = AuthService(db)
-        return auth_service.signup(user_data)
+        auth_service = AsyncAuthService(db)
+        return await auth_service.signup(user_data)
     except ValidationException as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except ServiceUnavailableException as e:
+        raise service_unavailable(e)
 
 @router.post("/login", response_model=dict)
-def login(
+async def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     
     try:
-        auth_service = AuthService(db)
-        return auth_service.login(login_data)
+        auth_service = AsyncAuthService(db)
+        return await auth_service.login(login_data)
     except AuthenticationException as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e),
             headers={"WWW-Authenticate": "Bearer"},
         )
+    except ServiceUnavailableException as e:
+        raise service_unavailable(e)
 
 @router.post("/logout")
-def logout():
+async def logout():
    
     return {"message": "Déconnexion réussie. Supprimez le token côté client."}
 
 @router.get("/me", response_model=UserResponse)
-def get_current_user_info(
-    current_user: Utilisateur = Depends(get_current_user)
+async def get_current_user_info(
+    current_user: Principal = Depends(get_current_user)
 ):
     """Récupérer les informations de l'utilisateur connecté"""
     return {
@@ -1,59 +1,136 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
-from sqlalchemy.orm import Session
+import logging
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Request, status, Query, Path
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.database import get_db
-from models.utilisateurs import Utilisateur
+from config import settings
+from database.database import AsyncReadSessionLocal, AsyncSessionLocal, READ_YOUR_WRITES_HEADER, get_async_db, get_async_read_db
+from core.principal_cache import Principal
 from core.auth import get_current_user
-from schemas.note_schema import NoteCreate, NoteUpdate, NoteResponse, NoteList, PublicNoteResponse
-from services.note_service import NoteService
-from core.exceptions import NotFoundException
+from schemas.note_schema import NoteCreate, NoteBulkCreate, NoteBulkResponse, NoteUpdate, NoteResponse, NoteSearchResponse, NoteList, NotePage, NoteSearchPage, PublicNoteResponse
+from services.note_service import AsyncNoteService
+from services.note_export import EXPORT_FORMATS, export_stream
+from services.note_import import ImportReport, import_notes, iter_markdown_records, iter_ndjson_records
+from services.public_note_cache import public_note_cache
+from core.exceptions import NotFoundException, ValidationException
+from utils.note_fields import NoteFields, get_note_fields, get_search_note_fields
+from utils.note_json import note_list_response
+from utils.pagination import Keyset, get_keyset
 
 router = APIRouter()
 
+logger = logging.getLogger(__name__)
+
 @router.post("/notes/", response_model=NoteResponse, status_code=status.HTTP_201_CREATED)
-def create_note(
+async def create_note(
     note_data: NoteCreate,
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Créer une nouvelle note"""
-    note_service = NoteService(db)
-    note = note_service.create_note(note_data, utilisateur_id=current_user.id)
+    note_service = AsyncNoteService(db)
+    note = await note_service.create_note(note_data, utilisateur_id=current_user.id)
     return note
 
-@router.get("/notes/", response_model=List[NoteResponse])
-def get_my_notes(
+@router.post("/notes/bulk", response_model=NoteBulkResponse)
+async def create_notes_bulk(
+    payload: NoteBulkCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Créer plusieurs notes en une transaction (un résultat par élément, invalides ignorés)"""
+    note_service = AsyncNoteService(db)
+    results = await note_service.create_notes_bulk(payload.items, utilisateur_id=current_user.id)
+    created = sum(1 for result in results if result["status"] == "created")
+    return {"created": created, "failed": len(results) - created, "items": results}
+
+@router.get("/notes/", response_model=Union[List[NoteResponse], NotePage])
+async def get_my_notes(
     skip: int = Query(0, ge=0, description="Nombre d'éléments à ignorer"),
     limit: int = Query(100, ge=1, le=100, description="Nombre d'éléments à retourner"),
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    keyset: Optional[Keyset] = Depends(get_keyset),
+    fields: Optional[NoteFields] = Depends(get_note_fields),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Récupérer toutes mes notes"""
-    note_service = NoteService(db)
-    notes = note_service.get_user_notes(current_user.id, skip, limit)
-    return notes
+    note_service = AsyncNoteService(db)
+    notes = await note_service.get_user_notes(current_user.id, skip, limit, keyset, fields)
+    return note_list_response(notes, keyset, limit, fields=fields)
+
+@router.get("/notes/export")
+async def export_notes(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|markdown)$", description="ndjson, ou markdown (zip de fichiers .md)"),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Exporter toutes mes notes en flux (mémoire constante quel que soit le nombre de notes)"""
+    session_factory = AsyncSessionLocal if request.headers.get(READ_YOUR_WRITES_HEADER) == "1" else AsyncReadSessionLocal
+    media_type, filename = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        export_stream(session_factory, current_user.id, format, settings.export_batch_size),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/notes/import")
+async def import_notes_stream(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|markdown)$", description="ndjson, ou markdown (zip de fichiers .md)"),
+    resume_from: int = Query(0, ge=0, description="Position du premier enregistrement à importer (reprise)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Importer des notes depuis le corps de la requête (NDJSON ou zip de Markdown), lu en flux
+    et validé par lots. En cas d'échec, `committed` indique la valeur de `resume_from` pour reprendre.
+    """
+    parse = iter_ndjson_records if format == "ndjson" else iter_markdown_records
+    report = ImportReport(resume_from)
+    try:
+        await import_notes(
+            AsyncNoteService(db),
+            parse(request.stream(), settings.import_max_record_bytes),
+            current_user.id,
+            report,
+            settings.import_chunk_size
+        )
+    except ValidationException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail={"message": str(e), **report.as_dict()})
+    except Exception:
+        await db.rollback()
+        logger.exception("Import interrompu", extra={"event": "notes.import_failed", "committed": report.committed})
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={"message": "Import interrompu", **report.as_dict()}
+        )
+    return report.as_dict()
 
-@router.get("/notes/search/", response_model=List[NoteResponse])
-def search_notes(
+@router.get("/notes/search/", response_model=Union[List[NoteSearchResponse], NoteSearchPage])
+async def search_notes(
     query: str = Query(..., min_length=1, description="Terme de recherche"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    keyset: Optional[Keyset] = Depends(get_keyset),
+    fields: Optional[NoteFields] = Depends(get_search_note_fields),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Rechercher dans mes notes"""
-    note_service = NoteService(db)
-    notes = note_service.search_notes(current_user.id, query, skip, limit)
-    return notes
+    note_service = AsyncNoteService(db)
+    notes = await note_service.search_notes(current_user.id, query, skip, limit, keyset, fields)
+    return note_list_response(notes, keyset, limit, search=True, fields=fields)
 
-@router.get("/notes/filter/visibility/{visibilite}", response_model=List[NoteResponse])
-def filter_by_visibility(
+@router.get("/notes/filter/visibility/{visibilite}", response_model=Union[List[NoteResponse], NotePage])
+async def filter_by_visibility(
     visibilite: str,  
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    keyset: Optional[Keyset] = Depends(get_keyset),
+    fields: Optional[NoteFields] = Depends(get_note_fields),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     if visibilite not in ["prive", "public"]:
         raise HTTPException(
@@ -61,79 +138,82 @@ def filter_by_visibility(
             detail="La visibilité doit être 'prive' ou 'public'"
         )
     
-    note_service = NoteService(db)
-    notes = note_service.filter_notes_by_visibilite(current_user.id, visibilite, skip, limit)
-    return notes
+    note_service = AsyncNoteService(db)
+    notes = await note_service.filter_notes_by_visibilite(current_user.id, visibilite, skip, limit, keyset, fields)
+    return note_list_response(notes, keyset, limit, fields=fields)
 
-@router.get("/notes/filter/tag/{tag_nom}", response_model=List[NoteResponse])
-def filter_by_tag(
+@router.get("/notes/filter/tag/{tag_nom}", response_model=Union[List[NoteResponse], NotePage])
+async def filter_by_tag(
     tag_nom: str,  
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    keyset: Optional[Keyset] = Depends(get_keyset),
+    fields: Optional[NoteFields] = Depends(get_note_fields),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Filtrer mes notes par tag"""
-    note_service = NoteService(db)
-    notes = note_service.filter_notes_by_tag(current_user.id, tag_nom, skip, limit)
-    return notes
+    note_service = AsyncNoteService(db)
+    notes = await note_service.filter_notes_by_tag(current_user.id, tag_nom, skip, limit, keyset, fields)
+    return note_list_response(notes, keyset, limit, fields=fields)
 
 @router.get("/notes/public/{token}", response_model=PublicNoteResponse)
-def get_public_note(
+async def get_public_note(
     token: str,  # CORRECTION: Paramètre simple
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Récupérer une note publique (pas d'authentification requise)"""
-    note_service = NoteService(db)
-    note = note_service.get_public_note_by_token(token)
+    """Récupérer une note publique (pas d'authentification requise), avec ETag / Last-Modified"""
+    note_service = AsyncNoteService(db)
+    entry = await public_note_cache.get_or_load(token, lambda: note_service.get_public_note_by_token(token))
 
-    if not note:
+    if not entry:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Note publique non trouvée"
         )
     
-    return note
+    return entry.response(request, PublicNoteResponse)
 
 @router.get("/notes/{note_id}", response_model=NoteResponse)
-def get_note(
+async def get_note(
     note_id: int,  
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Récupérer une note spécifique"""
     try:
-        note_service = NoteService(db)
-        note = note_service.get_note_by_id(note_id, current_user.id)
+        note_service = AsyncNoteService(db)
+        note = await note_service.get_note_by_id(note_id, current_user.id)
         return note
     except NotFoundException as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 @router.put("/notes/{note_id}", response_model=NoteResponse)
-def update_note(
+async def update_note(
     note_id: int,  
     note_data: NoteUpdate,
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Mettre à jour une note"""
     try:
-        note_service = NoteService(db)
-        note = note_service.update_note(note_id, note_data, current_user.id)
+        note_service = AsyncNoteService(db)
+        note = await note_service.update_note(note_id, note_data, current_user.id)
         return note
     except NotFoundException as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 @router.delete("/notes/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_note(
+async def delete_note(
     note_id: int,  
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Supprimer une note"""
     try:
-        note_service = NoteService(db)
-        note_service.delete_note(note_id, current_user.id)
+        note_service = AsyncNoteService(db)
+        await note_service.delete_note(note_id, current_user.id)
         return None
     except NotFoundException as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
\ No newline at end of file
@@ -1,196 +1,256 @@
+import logging
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.database import get_db
-from models.utilisateurs import Utilisateur
+from database.database import get_async_db, get_async_read_db
+from core.principal_cache import Principal
 from core.auth import get_current_user
 from schemas.note_schema import NoteResponse
+from schemas.partage_schema import PartageBatchCreate, SHARES_LOOKUP_MAX_NOTES
 from core.exceptions import NotFoundException, ValidationException
 
-from services.partage_service import PartageService
+from services.partage_service import AsyncPartageService
+from services.public_note_cache import public_note_cache
 
 SERVER_ERROR_MESSAGE = "Erreur interne du serveur"
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 @router.post("/{note_id}/share/{user_email}", response_model=dict)
-def share_note_with_user(
+async def share_note_with_user(
     note_id: int,
     user_email: str,
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     try:
-        print(f"DB object: {db}")  
-        sharing_service = PartageService(db)
-        result = sharing_service.share_note_with_user(note_id, user_email, current_user.id)
+        sharing_service = AsyncPartageService(db)
+        result = await sharing_service.share_note_with_user(note_id, user_email, current_user.id)
         return result
     except (NotFoundException, ValidationException) as e:
         error_message = str(e)
         if isinstance(e.args[0], dict) and 'message' in e.args[0]:
             error_message = e.args[0]['message']
         
-        print(f"Error details: {e}")  
+        logger.info("Partage refusé : %s", error_message, extra={"event": "sharing.rejected"})
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST if isinstance(e, ValidationException) else status.HTTP_404_NOT_FOUND,
             detail=error_message  
         )
-    except Exception as e:
-        print(f"Unexpected error: {e}")
+    except Exception:
+        logger.exception("Erreur inattendue lors du partage")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=SERVER_ERROR_MESSAGE
+        )
+
+@router.post("/notes/share", response_model=dict)
+async def share_notes_with_users(
+    payload: PartageBatchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Partager plusieurs notes avec plusieurs utilisateurs (statut par couple note / email)"""
+    try:
+        sharing_service = AsyncPartageService(db)
+        return await sharing_service.share_notes_with_users(payload.note_ids, payload.emails, current_user.id)
+    except ValidationException as e:
+        error_message = str(e)
+        if isinstance(e.args[0], dict) and 'message' in e.args[0]:
+            error_message = e.args[0]['message']
+
+        logger.info("Partage refusé : %s", error_message, extra={"event": "sharing.rejected"})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_message
+        )
+    except Exception:
+        logger.exception("Erreur inattendue lors du partage")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=SERVER_ERROR_MESSAGE
         )
 
 @router.delete("/notes/{note_id}/share/{user_email}")
-def unshare_note_with_user(
+async def unshare_note_with_user(
     note_id: int,
     user_email: str,
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     try:
-        sharing_service = PartageService(db)
-        result = sharing_service.unshare_note_with_user(note_id, user_email, current_user.id)
+        sharing_service = AsyncPartageService(db)
+        result = await sharing_service.unshare_note_with_user(note_id, user_email, current_user.id)
         return result
     except (NotFoundException, ValidationException) as e:
         error_message = str(e)
         if isinstance(e.args[0], dict) and 'message' in e.args[0]:
             error_message = e.args[0]['message']
 
-        print(f"Error details: {e}")
+        logger.info("Partage refusé : %s", error_message, extra={"event": "sharing.rejected"})
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST if isinstance(e, ValidationException) else status.HTTP_404_NOT_FOUND,
             detail=error_message
         )
-    except Exception as e:
-        print(f"Unexpected error: {e}")  
+    except Exception:
+        logger.exception("Erreur inattendue lors du partage")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=SERVER_ERROR_MESSAGE
         )
 
-@router.get("/notes/{note_id}/shared-with", response_model=List[dict])
-def get_note_shares(
+@router.get("/notes/shared-with", response_model=dict)
+async def get_notes_shares(
+    note_ids: List[int] = Query([], max_length=SHARES_LOOKUP_MAX_NOTES, description="Notes dont lister les partages"),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Partages de plusieurs notes en une requête (?note_ids=1&note_ids=2...)"""
+    try:
+        sharing_service = AsyncPartageService(db)
+        return await sharing_service.get_notes_shares(note_ids, current_user.id)
+    except ValidationException as e:
+        error_message = str(e)
+        if isinstance(e.args[0], dict) and 'message' in e.args[0]:
+            error_message = e.args[0]['message']
+
+        logger.info("Partage refusé : %s", error_message, extra={"event": "sharing.rejected"})
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error_message
+        )
+    except Exception:
+        logger.exception("Erreur inattendue lors du partage")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=SERVER_ERROR_MESSAGE
+        )
+
+@router.get("/notes/{note_id}/shared-with", response_model=dict)
+async def get_note_shares(
     note_id: int,
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     try:
-        sharing_service = PartageService(db)
-        shares = sharing_service.get_note_shares(note_id, current_user.id)
+        sharing_service = AsyncPartageService(db)
+        shares = await sharing_service.get_note_shares(note_id, current_user.id)
         return shares
     except (NotFoundException, ValidationException) as e:
         error_message = str(e)
         if isinstance(e.args[0], dict) and 'message' in e.args[0]:
             error_message = e.args[0]['message']
         
-        print(f"Error details: {e}")  
+        logger.info("Partage refusé : %s", error_message, extra={"event": "sharing.rejected"})
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND if isinstance(e, NotFoundException) else status.HTTP_400_BAD_REQUEST,
             detail=error_message
         )
-    except Exception as e:
-        print(f"Unexpected error: {e}")  
+    except Exception:
+        logger.exception("Erreur inattendue lors du partage")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=SERVER_ERROR_MESSAGE
         )
 
 @router.post("/notes/{note_id}/public-link", response_model=dict)
-def create_public_link(
+async def create_public_link(
     note_id: int,
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Créer un lien public pour une note (authentification requise)"""
     try:
-        sharing_service = PartageService(db)
-        result = sharing_service.create_public_link(note_id, current_user.id)
+        sharing_service = AsyncPartageService(db)
+        result = await sharing_service.create_public_link(note_id, current_user.id)
         return result
     except (NotFoundException, ValidationException) as e:
         error_message = str(e)
         if isinstance(e.args[0], dict) and 'message' in e.args[0]:
             error_message = e.args[0]['message']
         
-        print(f"Error details: {e}")  
+        logger.info("Partage refusé : %s", error_message, extra={"event": "sharing.rejected"})
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND if isinstance(e, NotFoundException) else status.HTTP_400_BAD_REQUEST,
             detail=error_message
         )
-    except Exception as e:
-        print(f"Unexpected error: {e}")  
+    except Exception:
+        logger.exception("Erreur inattendue lors du partage")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=SERVER_ERROR_MESSAGE
         )
 
 @router.delete("/notes/{note_id}/public-link")
-def revoke_public_link(
+async def revoke_public_link(
     note_id: int,
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     try:
-        sharing_service = PartageService(db)
-        result = sharing_service.revoke_public_link(note_id, current_user.id)
+        sharing_service = AsyncPartageService(db)
+        result = await sharing_service.revoke_public_link(note_id, current_user.id)
         return result
     except (NotFoundException, ValidationException) as e:
         error_message = str(e)
         if isinstance(e.args[0], dict) and 'message' in e.args[0]:
             error_message = e.args[0]['message']
         
-        print(f"Error details: {e}") 
+        logger.info("Partage refusé : %s", error_message, extra={"event": "sharing.rejected"})
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND if isinstance(e, NotFoundException) else status.HTTP_400_BAD_REQUEST,
             detail=error_message
         )
-    except Exception as e:
-        print(f"Unexpected error: {e}") 
+    except Exception:
+        logger.exception("Erreur inattendue lors du partage")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=SERVER_ERROR_MESSAGE
         )
 
 @router.get("/public/{token}", response_model=NoteResponse)
-def get_public_note(
+async def get_public_note(
     token: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     try:
-        sharing_service = PartageService(db)
-        note = sharing_service.get_public_note_by_token(token)
-        if not note:
+        sharing_service = AsyncPartageService(db)
+        entry = await public_note_cache.get_or_load(token, lambda: sharing_service.get_public_note_by_token(token))
+        if not entry:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Note publique non trouvée"
             )
-        return note
+        return entry.response(request, NoteResponse)
     except (NotFoundException, ValidationException) as e:
         # Extraction du message
         error_message = str(e)
         if isinstance(e.args[0], dict) and 'message' in e.args[0]:
             error_message = e.args[0]['message']
         
-        print(f"Error details: {e}")  
+        logger.info("Partage refusé : %s", error_message, extra={"event": "sharing.rejected"})
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND if isinstance(e, NotFoundException) else status.HTTP_400_BAD_REQUEST,
             detail=error_message
         )
-    except Exception as e:
-        print(f"Unexpected error: {e}")  
+    except Exception:
+        logger.exception("Erreur inattendue lors du partage")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=SERVER_ERROR_MESSAGE
         )
 
 @router.get("/test-db")
-def test_db_connection(db: Session = Depends(get_db)):
+async def test_db_connection(db: AsyncSession = Depends(get_async_db)):
     """Test de connexion à la base de données"""
     try:
         # Simple test
-        result = db.execute("SELECT 1").fetchone()
+        result = (await db.execute(text("SELECT 1"))).scalar()
         return {"db_status": "OK", "result": result}
     except Exception as e:
         return {"db_status": "ERROR", "error": str(e)}
\ No newline at end of file
@@ -1,67 +1,80 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database.database import get_db
-from models.utilisateurs import Utilisateur
+from database.database import get_async_read_db
+from core.principal_cache import Principal
 from core.auth import get_current_user
-from schemas.note_schema import NoteResponse
-from services.note_service import NoteService
-from repositories.tag_repository import TagRepository
+from schemas.note_schema import NoteResponse, NoteSearchResponse, NotePage, NoteSearchPage
+from services.note_service import AsyncNoteService
+from repositories.tag_repository import AsyncTagRepository
+from search.tag_autocomplete import tag_autocomplete
+from utils.note_fields import NoteFields, get_note_fields, get_search_note_fields
+from utils.note_json import note_list_response
+from utils.pagination import Keyset, get_keyset
 
 router = APIRouter()
 
-@router.get("/notes", response_model=List[NoteResponse])
-def search_notes(
+@router.get("/notes", response_model=Union[List[NoteSearchResponse], NoteSearchPage])
+async def search_notes(
     q: str = Query(..., min_length=1, description="Terme de recherche"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    keyset: Optional[Keyset] = Depends(get_keyset),
+    fields: Optional[NoteFields] = Depends(get_search_note_fields),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Rechercher dans mes notes (authentification requise)"""
-    note_service = NoteService(db)
-    notes = note_service.search_notes(current_user.id, q, skip, limit)
-    return notes
+    """
+    Rechercher dans mes notes (authentification requise).
+    Syntaxe : mots (ET implicite), `OR`, et "phrase exacte" entre guillemets.
+    """
+    note_service = AsyncNoteService(db)
+    notes = await note_service.search_notes_indexed(current_user.id, q, skip, limit, keyset, fields)
+    return note_list_response(notes, keyset, limit, search=True, fields=fields)
 
-@router.get("/notes/filter/visibility/{visibilite}", response_model=List[NoteResponse])
-def filter_notes_by_visibility(
+@router.get("/notes/filter/visibility/{visibilite}", response_model=Union[List[NoteResponse], NotePage])
+async def filter_notes_by_visibility(
     visibilite: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    keyset: Optional[Keyset] = Depends(get_keyset),
+    fields: Optional[NoteFields] = Depends(get_note_fields),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Filtrer mes notes par statut de visibilité (authentification requise)"""
     if visibilite not in ["prive", "partage", "public"]:
         raise HTTPException(status_code=400, detail="Visibilité invalide")
     
-    note_service = NoteService(db)
-    notes = note_service.filter_notes_by_visibility(current_user.id, visibilite, skip, limit)
-    return notes
+    note_service = AsyncNoteService(db)
+    notes = await note_service.filter_notes_by_visibilite(current_user.id, visibilite, skip, limit, keyset, fields)
+    return note_list_response(notes, keyset, limit, fields=fields)
 
-@router.get("/notes/filter/tag/{tag_nom}", response_model=List[NoteResponse])
-def filter_notes_by_tag(
+@router.get("/notes/filter/tag/{tag_nom}", response_model=Union[List[NoteResponse], NotePage])
+async def filter_notes_by_tag(
     tag_nom: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    keyset: Optional[Keyset] = Depends(get_keyset),
+    fields: Optional[NoteFields] = Depends(get_note_fields),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Filtrer mes notes par tag (authentification requise)"""
-    note_service = NoteService(db)
-    notes = note_service.filter_notes_by_tag(current_user.id, tag_nom, skip, limit)
-    return notes
+    note_service = AsyncNoteService(db)
+    notes = await note_service.filter_notes_by_tag(current_user.id, tag_nom, skip, limit, keyset, fields)
+    return note_list_response(notes, keyset, limit, fields=fields)
 
 @router.get("/tags", response_model=List[dict])
-def get_my_popular_tags(
+async def get_my_popular_tags(
     limit: int = Query(20, ge=1, le=50),
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Récupérer mes tags populaires (authentification requise)"""
-    tag_repository = TagRepository(db)
-    tags_with_count = tag_repository.get_popular_tags(current_user.id, limit)
+    tag_repository = AsyncTagRepository(db)
+    tags_with_count = await tag_repository.get_popular_tags(current_user.id, limit)
     
     return [
         {"nom": tag.nom, "count": count}
@@ -69,13 +82,20 @@ def get_my_popular_tags(
     ]
 
 @router.get("/tags/autocomplete")
-def autocomplete_tags(
+async def autocomplete_tags(
     q: str = Query(..., min_length=1, description="Début du nom du tag"),
     limit: int = Query(10, ge=1, le=20),
-    db: Session = Depends(get_db),
-    current_user: Utilisateur = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Auto-complétion des tags (authentification requise)"""
-    tag_repository = TagRepository(db)
-    tags = tag_repository.search_tags(q, limit)
+    """
+    Auto-complétion des tags (authentification requise).
+    Servie depuis l'index en mémoire (mes tags les plus utilisés d'abord), remis à jour
+    depuis la base s'il a changé, ou par une recherche SQL par préfixe tant qu'il n'est pas construit.
+    """
+    if tag_autocomplete.ready:
+        await db.run_sync(lambda session: tag_autocomplete.refresh(session, current_user.id))
+        return [{"nom": nom} for nom in tag_autocomplete.complete(current_user.id, q, limit)]
+    tag_repository = AsyncTagRepository(db)
+    tags = await tag_repository.search_tags(q, limit)
     return [{"nom": tag.nom} for tag in tags]
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -23,6 +23,26 @@ class NoteBase(BaseModel):
 class NoteCreate(NoteBase):
     tags: Optional[List[str]] = Field(default=[], description="Liste des tags (optionnel)")
 
+# Nombre maximal de notes par requête de création groupée
+BULK_CREATE_MAX_ITEMS = 5000
+
+class NoteBulkCreate(BaseModel):
+    # Éléments validés un par un (NoteCreate) par le service : un élément invalide
+    # est signalé dans le résultat sans faire échouer les autres
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=BULK_CREATE_MAX_ITEMS, description="Notes à créer (format NoteCreate)")
+
+class NoteBulkItemResult(BaseModel):
+    index: int = Field(..., description="Position de l'élément dans la requête")
+    status: Literal["created", "invalid"]
+    id: Optional[int] = None
+    token_publique: Optional[str] = None
+    errors: Optional[List[Dict[str, Any]]] = Field(None, description="Erreurs de validation de l'élément")
+
+class NoteBulkResponse(BaseModel):
+    created: int
+    failed: int
+    items: List[NoteBulkItemResult]
+
 class NoteUpdate(BaseModel):
     titre: Optional[str] = Field(None, min_length=1, max_length=255)
     contenu: Optional[str] = Field(None, min_length=1)
@@ -41,6 +61,19 @@ class NoteResponse(NoteBase):
     class Config:
         from_attributes = True
 
+class NoteSearchResponse(NoteResponse):
+    snippet: Optional[str] = Field(None, description="Extrait surligné (recherche plein texte) : texte échappé en HTML, termes trouvés entre <mark>")
+
+class NotePage(BaseModel):
+    items: List[NoteResponse]
+    next_cursor: Optional[str] = Field(None, description="Curseur de la page suivante (absent en fin de liste)")
+    limit: int
+
+class NoteSearchPage(BaseModel):
+    items: List[NoteSearchResponse]
+    next_cursor: Optional[str] = Field(None, description="Curseur de la page suivante (absent en fin de liste)")
+    limit: int
+
 class NoteList(BaseModel):
     notes: List[NoteResponse]
     total: int
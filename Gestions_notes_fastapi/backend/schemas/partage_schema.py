@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+# Bornes d'un partage groupé (au plus 500 x 100 couples note / destinataire)
+BATCH_SHARE_MAX_NOTES = 500
+BATCH_SHARE_MAX_EMAILS = 100
+
+# Nombre maximal de notes par lecture groupée des partages
+SHARES_LOOKUP_MAX_NOTES = 500
+
+class PartageBatchCreate(BaseModel):
+    note_ids: List[int] = Field(..., min_length=1, max_length=BATCH_SHARE_MAX_NOTES, description="Notes à partager (dont je suis propriétaire)")
+    emails: List[str] = Field(..., min_length=1, max_length=BATCH_SHARE_MAX_EMAILS, description="Adresses des destinataires")
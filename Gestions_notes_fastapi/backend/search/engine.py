@@ -0,0 +1,306 @@
+import heapq
+import math
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import settings
+from search.normalizer import tokenize
+
+# Paramètres BM25 classiques
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Bonus appliqué quand un terme de la requête apparaît dans le titre
+TITLE_BOOST = 2.0
+
+_QUERY_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+class _UserIndex:
+    """Index inversé positionnel des notes d'un utilisateur (lu et modifié sous `lock`)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # terme -> note_id -> positions
+        self.postings: Dict[str, Dict[int, List[int]]] = defaultdict(dict)
+        self.doc_terms: Dict[int, Set[str]] = {}
+        self.title_terms: Dict[int, Set[str]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.total_length = 0
+
+    def add(self, note_id: int, titre: str, contenu: Optional[str]) -> None:
+        title_tokens = tokenize(titre)
+        # Le titre et le contenu forment un seul flux de positions ; le saut de position
+        # évite qu'une phrase chevauche la fin du titre et le début du contenu.
+        tokens = title_tokens + [""] + tokenize(contenu or "")
+
+        positions: Dict[str, List[int]] = defaultdict(list)
+        length = 0
+        for position, term in enumerate(tokens):
+            if term:
+                positions[term].append(position)
+                length += 1
+
+        for term, term_positions in positions.items():
+            self.postings[term][note_id] = term_positions
+
+        self.doc_terms[note_id] = set(positions)
+        self.title_terms[note_id] = {term for term in title_tokens if term}
+        self.doc_lengths[note_id] = length
+        self.total_length += length
+
+    def remove(self, note_id: int) -> None:
+        terms = self.doc_terms.pop(note_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            documents = self.postings.get(term)
+            if documents is not None:
+                documents.pop(note_id, None)
+                if not documents:
+                    del self.postings[term]
+        self.title_terms.pop(note_id, None)
+        self.total_length -= self.doc_lengths.pop(note_id, 0)
+
+    def phrase_documents(self, terms: List[str]) -> Set[int]:
+        """Notes contenant les termes consécutifs (les mots vides sont des jokers)"""
+        anchored = [(offset, term) for offset, term in enumerate(terms) if term]
+        if not anchored:
+            return set()
+
+        candidates = self.term_documents(anchored[0][1])
+        for _, term in anchored[1:]:
+            candidates &= self.term_documents(term)
+
+        first_offset, first_term = anchored[0]
+        matches = set()
+        for note_id in candidates:
+            following = [(offset - first_offset, set(self.postings[term][note_id])) for offset, term in anchored[1:]]
+            for start in self.postings[first_term][note_id]:
+                if all(start + delta in positions for delta, positions in following):
+                    matches.add(note_id)
+                    break
+        return matches
+
+    def term_documents(self, term: str) -> Set[int]:
+        return set(self.postings.get(term, ()))
+
+    def idf(self, terms: Set[str]) -> Dict[str, float]:
+        documents_count = len(self.doc_lengths)
+        weights = {}
+        for term in terms:
+            documents = self.postings.get(term)
+            if documents:
+                weights[term] = math.log(1 + (documents_count - len(documents) + 0.5) / (len(documents) + 0.5))
+        return weights
+
+    def score(self, note_id: int, idf: Dict[str, float], average_length: float) -> float:
+        length_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths.get(note_id, 0) / average_length)
+        title_terms = self.title_terms.get(note_id, ())
+
+        score = 0.0
+        for term, weight in idf.items():
+            positions = self.postings[term].get(note_id)
+            if positions is None:
+                continue
+            frequency = len(positions)
+            term_score = weight * frequency * (BM25_K1 + 1) / (frequency + length_norm)
+            if term in title_terms:
+                term_score *= TITLE_BOOST
+            score += term_score
+        return score
+
+
+def parse_query(query: str) -> List[List[Tuple[str, List[str]]]]:
+    """
+    Découpe une requête en clauses OR, chaque clause étant une liste d'éléments ET.
+    Un élément est ("term", [terme]) ou ("phrase", [termes...]).
+
+    Exemples : `budget projet`, `budget OR devis`, `"compte rendu" client`.
+    """
+    clauses: List[List[Tuple[str, List[str]]]] = [[]]
+    for phrase, word in _QUERY_PATTERN.findall(query):
+        if word == "OR":
+            if clauses[-1]:
+                clauses.append([])
+            continue
+        if phrase:
+            terms = tokenize(phrase)
+            if any(terms):
+                clauses[-1].append(("phrase", terms))
+        else:
+            for term in tokenize(word):
+                if term:
+                    clauses[-1].append(("term", [term]))
+    return [clause for clause in clauses if clause]
+
+
+class SearchEngine:
+    """
+    Moteur de recherche en mémoire, utilisé quand FTS5 n'est pas disponible : un index inversé
+    par utilisateur, construit à la première recherche à partir de ses notes et gardé dans un
+    cache LRU borné en nombre total de notes indexées.
+
+    Chaque index porte la révision des notes de l'utilisateur (compteur d'écritures
+    user_note_revisions) lue avant sa construction. Les écritures de ce processus sont appliquées
+    à l'index note par note (apply_changes) ; une recherche dont la révision diffère de celle de
+    l'index (écriture traitée par un autre worker) le reconstruit.
+    """
+
+    def __init__(self, max_notes: int = 50000):
+        self.max_notes = max_notes
+        # utilisateur -> (révision, index) ; index None : trop de notes pour être indexées
+        self._users: "OrderedDict[int, Tuple[int, Optional[_UserIndex]]]" = OrderedDict()
+        self._indexed_notes = 0
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.updates = 0
+        self.evictions = 0
+
+    def search(
+        self,
+        utilisateur_id: int,
+        query: str,
+        skip: int,
+        limit: int,
+        revision: int,
+        load_notes: Callable[[], Iterable[Tuple[int, str, Optional[str]]]],
+    ) -> Optional[List[int]]:
+        """
+        Identifiants des notes correspondantes, triés par pertinence (top-k). `load_notes` fournit
+        (id, titre, contenu) des notes de l'utilisateur si l'index est absent ou périmé.
+        None si l'utilisateur a plus de max_notes notes (recherche à faire en SQL).
+        """
+        clauses = parse_query(query)
+        if not clauses:
+            return []
+
+        index = self._index(utilisateur_id, revision, load_notes)
+        if index is None:
+            return None
+        with index.lock:
+            return self._search(index, clauses, skip, limit)
+
+    def _search(self, index: _UserIndex, clauses, skip: int, limit: int) -> List[int]:
+        matches: Set[int] = set()
+        query_terms: Set[str] = set()
+        for clause in clauses:
+            clause_documents: Optional[Set[int]] = None
+            # Les éléments les plus sélectifs d'abord pour réduire les intersections
+            for kind, terms in sorted(clause, key=lambda item: len(index.postings.get(item[1][0], ()))):
+                documents = index.term_documents(terms[0]) if kind == "term" else index.phrase_documents(terms)
+                clause_documents = documents if clause_documents is None else clause_documents & documents
+                query_terms.update(term for term in terms if term)
+                if not clause_documents:
+                    break
+            matches |= clause_documents or set()
+
+        if not matches:
+            return []
+        idf = index.idf(query_terms)
+        average_length = (index.total_length / len(index.doc_lengths)) or 1.0
+        ranked = heapq.nlargest(
+            skip + limit,
+            matches,
+            key=lambda note_id: (index.score(note_id, idf, average_length), note_id)
+        )
+        return ranked[skip:skip + limit]
+
+    def apply_changes(
+        self,
+        utilisateur_id: int,
+        revision: int,
+        upserted: Iterable[Tuple[int, str, Optional[str]]] = (),
+        removed: Iterable[int] = (),
+    ) -> None:
+        """
+        Écriture commitée par ce processus, qui a porté la révision de l'utilisateur à `revision` :
+        notes (id, titre, contenu) créées ou modifiées et notes supprimées. Appliquée à l'index s'il
+        est à la révision précédente ; sinon (écriture d'un autre worker entre-temps) l'index est
+        oublié et sera reconstruit à la prochaine recherche.
+        """
+        with self._lock:
+            cached = self._users.get(utilisateur_id)
+            if cached is None:
+                return
+            if cached[0] != revision - 1 or cached[1] is None:
+                self._forget(utilisateur_id)
+                return
+            index = cached[1]
+            with index.lock:
+                before = len(index.doc_lengths)
+                for note_id in removed:
+                    index.remove(note_id)
+                for note_id, titre, contenu in upserted:
+                    index.remove(note_id)
+                    index.add(note_id, titre, contenu)
+                self._indexed_notes += len(index.doc_lengths) - before
+            self._users[utilisateur_id] = (revision, index)
+            self.updates += 1
+            if len(index.doc_lengths) > self.max_notes:
+                self._forget(utilisateur_id)
+            self._evict()
+
+    def invalidate(self, utilisateur_id: int) -> None:
+        """Oublie l'index d'un utilisateur (reconstruit à sa prochaine recherche)"""
+        with self._lock:
+            self._forget(utilisateur_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+            self._indexed_notes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Compteurs exposés par /health"""
+        with self._lock:
+            return {
+                "users": len(self._users),
+                "notes": self._indexed_notes,
+                "max_notes": self.max_notes,
+                "builds": self.builds,
+                "updates": self.updates,
+                "evictions": self.evictions,
+            }
+
+    def _index(self, utilisateur_id: int, revision: int, load_notes) -> Optional[_UserIndex]:
+        with self._lock:
+            cached = self._users.get(utilisateur_id)
+            if cached is not None and cached[0] == revision:
+                self._users.move_to_end(utilisateur_id)
+                return cached[1]
+
+        # Construction hors du verrou, abandonnée au-delà de max_notes notes
+        index: Optional[_UserIndex] = _UserIndex()
+        for note_id, titre, contenu in load_notes():
+            if len(index.doc_lengths) >= self.max_notes:
+                index = None
+                break
+            index.add(note_id, titre, contenu)
+
+        with self._lock:
+            self.builds += 1
+            self._forget(utilisateur_id)
+            self._users[utilisateur_id] = (revision, index)
+            if index is not None:
+                self._indexed_notes += len(index.doc_lengths)
+            self._evict()
+        return index
+
+    def _forget(self, utilisateur_id: int) -> None:
+        """Retire l'index d'un utilisateur (appelé sous le verrou)"""
+        cached = self._users.pop(utilisateur_id, None)
+        if cached is not None and cached[1] is not None:
+            self._indexed_notes -= len(cached[1].doc_lengths)
+
+    def _evict(self) -> None:
+        """Index les moins récemment utilisés retirés au-delà de max_notes notes (appelé sous le verrou)"""
+        while self._indexed_notes > self.max_notes:
+            _, (_, evicted) = self._users.popitem(last=False)
+            if evicted is not None:
+                self._indexed_notes -= len(evicted.doc_lengths)
+                self.evictions += 1
+
+
+search_engine = SearchEngine(max_notes=settings.search_index_max_notes)
@@ -0,0 +1,67 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List
+
+_TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# Mots vides français les plus fréquents : ils n'apportent rien au classement
+STOPWORDS = frozenset({
+    "a", "au", "aux", "avec", "ce", "ces", "dans", "de", "des", "du", "elle", "en", "et",
+    "il", "je", "la", "le", "les", "leur", "lui", "ma", "mais", "me", "mes", "mon", "ne",
+    "nous", "on", "ou", "par", "pas", "pour", "qu", "que", "qui", "sa", "se", "ses", "son",
+    "sur", "ta", "te", "tes", "ton", "tu", "un", "une", "vos", "votre", "vous", "l", "d",
+    "j", "m", "n", "s", "t", "c", "y",
+})
+
+
+def fold_accents(text: str) -> str:
+    """Minuscules + suppression des accents ("Évènement" -> "evenement")"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def stem(word: str) -> str:
+    """
+    Racinisation légère du français (inspirée du "light stemmer" de J. Savoy) :
+    pluriels, féminins et terminaisons verbales en -er les plus courantes.
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+
+    if len(word) > 5 and word.endswith("aux"):
+        word = word[:-3] + "al"
+    elif word.endswith("x") or word.endswith("s"):
+        word = word[:-1]
+
+    if len(word) > 5 and word.endswith("euse"):
+        word = word[:-4] + "eu"
+    elif len(word) > 5 and word.endswith("ive"):
+        word = word[:-3] + "if"
+    elif len(word) > 4 and word.endswith("er"):
+        word = word[:-2]
+    elif len(word) > 3 and word.endswith("e"):
+        word = word[:-1]
+
+    # Consonne finale doublée ("bonn" -> "bon")
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in "aeiou":
+        word = word[:-1]
+
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Découpe un texte en termes normalisés.
+    Les mots vides sont remplacés par "" pour conserver les positions (recherche de phrase).
+    """
+    if not text:
+        return []
+    return [_analyze(token) for token in _TOKEN_PATTERN.findall(text)]
+
+
+@lru_cache(maxsize=100_000)
+def _analyze(token: str) -> str:
+    # Normalisation par mot (mise en cache) : bien plus rapide que sur le texte entier
+    token = token.lower() if token.isascii() else fold_accents(token)
+    return "" if token in STOPWORDS else stem(token)
@@ -0,0 +1,191 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from config import settings
+
+
+def normalize_tag(nom: str) -> str:
+    """Forme canonique d'un nom de tag (identique à TagRepository.get_or_create)"""
+    return nom.lower().strip()
+
+
+class _UserTags:
+    """Noms de tags d'un utilisateur, triés pour la recherche par préfixe, avec leur nombre d'utilisations"""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.counts: Dict[str, int] = {}
+
+    def add(self, nom: str, delta: int) -> None:
+        count = self.counts.get(nom, 0) + delta
+        if count > 0:
+            if nom not in self.counts:
+                insort(self.names, nom)
+            self.counts[nom] = count
+        elif nom in self.counts:
+            del self.counts[nom]
+            del self.names[bisect_left(self.names, nom)]
+
+    def complete(self, prefix: str, limit: int) -> List[str]:
+        matches = []
+        for index in range(bisect_left(self.names, prefix), len(self.names)):
+            nom = self.names[index]
+            if not nom.startswith(prefix):
+                break
+            matches.append(nom)
+        # Les plus utilisés d'abord, puis ordre alphabétique
+        return heapq.nsmallest(limit, matches, key=lambda nom: (-self.counts[nom], nom))
+
+
+class TagAutocomplete:
+    """
+    Auto-complétion des tags en mémoire : pour chaque utilisateur, un tableau trié
+    de ses tags pondérés par leur nombre d'utilisations, complété par les autres tags
+    existants (ordre alphabétique) quand ses propres tags ne suffisent pas.
+
+    Comme l'index de recherche, il est propre au processus et versionné par la base :
+    - noms de tags : identifiant maximal déjà chargé, les tags créés depuis (par n'importe
+      quel worker) sont lus par refresh() ;
+    - tags d'un utilisateur : chargés à sa première saisie avec sa révision (compteur
+      d'écritures user_note_revisions, incrémenté avec chaque écriture de notes, donc de
+      user_tag_stats), rechargés par refresh() si elle a changé. NoteService applique ses
+      propres écritures (record_usage) quand elles suivent la révision chargée.
+
+    refresh() ne consulte la base qu'une fois par `refresh_interval` secondes et par utilisateur :
+    une saisie caractère par caractère ne coûte pas une requête par frappe.
+    """
+
+    def __init__(self, refresh_interval: float = 1.0):
+        self.refresh_interval = refresh_interval
+        self._all_names: List[str] = []
+        self._last_tag_id = 0
+        self._users: Dict[int, Tuple[int, _UserTags]] = {}
+        self._checked: Dict[int, float] = {}
+        self._lock = threading.RLock()
+        self.ready = False
+
+    def rebuild(self, db: Session) -> int:
+        """Recharge tous les noms de tags ; les tags de chaque utilisateur seront rechargés à sa prochaine saisie"""
+        from models.tag import Tag
+
+        rows = db.query(Tag.id, Tag.nom).all()
+        with self._lock:
+            self._all_names = sorted({nom for _, nom in rows})
+            self._last_tag_id = max((tag_id for tag_id, _ in rows), default=0)
+            self._users = {}
+            self._checked = {}
+            self.ready = True
+            return len(self._all_names)
+
+    def refresh(self, db: Session, utilisateur_id: int) -> None:
+        """
+        Met l'index à jour avant une saisie : une requête lit la révision de l'utilisateur et
+        l'identifiant de tag maximal ; les nouveaux tags et, si sa révision a changé, les tags
+        de l'utilisateur sont ensuite relus. Sans effet si la dernière vérification de cet
+        utilisateur date de moins de refresh_interval secondes.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if utilisateur_id in self._users and now - self._checked.get(utilisateur_id, 0.0) < self.refresh_interval:
+                return
+            self._checked[utilisateur_id] = now
+
+        from models.tag import Tag
+        from models.user_note_revision import UserNoteRevision
+        from models.user_tag_stats import UserTagStats
+
+        user_revision = (
+            select(UserNoteRevision.revision).where(UserNoteRevision.utilisateur_id == utilisateur_id).scalar_subquery()
+        )
+        revision, last_tag_id = db.execute(select(user_revision, select(func.max(Tag.id)).scalar_subquery())).one()
+        revision = revision or 0
+
+        with self._lock:
+            known_tag_id = self._last_tag_id
+            cached = self._users.get(utilisateur_id)
+        if last_tag_id is not None and last_tag_id > known_tag_id:
+            new_tags = db.query(Tag.id, Tag.nom).filter(Tag.id > known_tag_id).all()
+            with self._lock:
+                for _, nom in new_tags:
+                    self._insert_name(nom)
+                self._last_tag_id = max(self._last_tag_id, max((tag_id for tag_id, _ in new_tags), default=0))
+
+        if cached is None or cached[0] != revision:
+            # Révision relue dans la même requête que les compteurs : les deux viennent du même
+            # instantané, une écriture commitée entre-temps ne sera pas appliquée deux fois
+            user_tags = _UserTags()
+            usages = (
+                db.query(Tag.nom, UserTagStats.count, user_revision)
+                .join(Tag, Tag.id == UserTagStats.tag_id)
+                .filter(UserTagStats.utilisateur_id == utilisateur_id)
+            )
+            for nom, count, usage_revision in usages:
+                user_tags.add(nom, count)
+                revision = usage_revision or 0
+            with self._lock:
+                current = self._users.get(utilisateur_id)
+                # Une écriture locale a pu faire avancer l'entrée pendant la lecture
+                if current is None or current[0] < revision:
+                    self._users[utilisateur_id] = (revision, user_tags)
+
+    def register_tag(self, nom: str) -> None:
+        """Nouveau tag créé en base par ce processus"""
+        with self._lock:
+            self._insert_name(normalize_tag(nom))
+
+    def record_usage(self, utilisateur_id: int, revision: int, added: Iterable[str] = (), removed: Iterable[str] = ()) -> None:
+        """
+        Tags ajoutés à / retirés d'une note de l'utilisateur par une écriture qui a porté sa
+        révision à `revision`. Appliqué seulement si elle suit la révision chargée : une écriture
+        déjà vue par le chargement est ignorée, un écart (écriture d'un autre worker) fait
+        recharger ses tags.
+        """
+        delta = Counter(normalize_tag(nom) for nom in added)
+        delta.subtract(normalize_tag(nom) for nom in removed)
+
+        with self._lock:
+            cached = self._users.get(utilisateur_id)
+            if cached is None or revision <= cached[0]:
+                return
+            if revision != cached[0] + 1:
+                del self._users[utilisateur_id]
+                return
+            user_tags = cached[1]
+            for nom, change in delta.items():
+                if change:
+                    user_tags.add(nom, change)
+            self._users[utilisateur_id] = (revision, user_tags)
+
+    def complete(self, utilisateur_id: int, prefix: str, limit: int = 10) -> List[str]:
+        """Noms de tags commençant par le préfixe : ceux de l'utilisateur d'abord"""
+        prefix = normalize_tag(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            cached = self._users.get(utilisateur_id)
+            suggestions = cached[1].complete(prefix, limit) if cached else []
+            if len(suggestions) < limit:
+                seen = set(suggestions)
+                for index in range(bisect_left(self._all_names, prefix), len(self._all_names)):
+                    nom = self._all_names[index]
+                    if not nom.startswith(prefix) or len(suggestions) >= limit:
+                        break
+                    if nom not in seen:
+                        suggestions.append(nom)
+        return suggestions
+
+    def _insert_name(self, nom: str) -> None:
+        index = bisect_left(self._all_names, nom)
+        if index == len(self._all_names) or self._all_names[index] != nom:
+            self._all_names.insert(index, nom)
+
+
+tag_autocomplete = TagAutocomplete(refresh_interval=settings.tag_autocomplete_refresh_seconds)
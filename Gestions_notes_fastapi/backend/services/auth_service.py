@@ -2,9 +2,11 @@ from datetime import timedelta
 from config import settings
 from models.utilisateurs import Utilisateur
 from database.database import SessionLocal
-from repositories.utilisateur_repository import UserRepository
+from repositories.utilisateur_repository import AsyncUserRepository, UserRepository
 from schemas.auth_schema import LoginRequest
-from utils.security import create_access_token, hash_password, verify_password
+from utils.password_hashing import password_hashing_pool
+from utils.security import create_access_token
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any
 
@@ -53,4 +55,55 @@ class AuthService:
                 "id": utilisateur.id,
                 "email": utilisateur.email
             }
-        }
\ No newline at end of file
+        }
+
+
+class AsyncAuthService:
+    """
+    AuthService pour une AsyncSession. Les accès base sont asynchrones ; le hachage et la
+    vérification bcrypt (CPU, ~100 ms) passent par le pool dédié password_hashing_pool,
+    qui lève ServiceUnavailableException quand il est saturé.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.utilisateur_repository = AsyncUserRepository(db)
+
+    async def signup(self, user_data: dict) -> Dict[str, Any]:
+        """Inscription d'un nouvel utilisateur"""
+        existing_user = await self.utilisateur_repository.get_by_email(user_data.email)
+        if existing_user:
+            raise ValueError("Cet email est déjà utilisé.")
+
+        hashed_password = await password_hashing_pool.hash(user_data.mot_de_passe)
+        utilisateur = await self.utilisateur_repository.create_user(user_data, hashed_password)
+
+        return {
+            "user": {
+                "id": utilisateur.id,
+                "email": utilisateur.email,
+                "created_at": utilisateur.date_creation,
+                "is_active": utilisateur.est_actif
+            }
+        }
+
+    async def login(self, login_data: LoginRequest) -> Dict[str, Any]:
+        """Connexion d'un utilisateur existant"""
+        utilisateur = await self.utilisateur_repository.get_by_email(login_data.email)
+        if not utilisateur or not await password_hashing_pool.verify(login_data.mot_de_passe, utilisateur.mot_de_passe):
+            raise ValueError("Identifiants invalides.")
+        if not utilisateur.est_actif:
+            raise ValueError("Utilisateur inactif.")
+
+        access_token = create_access_token(
+            data={"sub": str(utilisateur.id)}
+        )
+
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "user": {
+                "id": utilisateur.id,
+                "email": utilisateur.email
+            }
+        }
@@ -0,0 +1,137 @@
+import json
+import re
+import zipfile
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.notes import Note
+from models.tag import Tag, note_tags
+
+# Colonnes exportées : lues en tuples, sans objets ORM ni identity map qui grossiraient avec l'export
+_EXPORT_COLUMNS = (Note.id, Note.titre, Note.contenu, Note.visibilite, Note.date_creation, Note.date_modification)
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "notes.ndjson"),
+    "markdown": ("application/zip", "notes.zip"),
+}
+
+
+async def iter_user_notes(db: AsyncSession, utilisateur_id: int, batch_size: int = 500) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Notes de l'utilisateur par lots de `batch_size`, lues par un curseur côté serveur (yield_per) ;
+    les tags de chaque lot sont chargés en une requête. Un seul lot est en mémoire à la fois.
+    """
+    result = await db.stream(
+        select(*_EXPORT_COLUMNS)
+        .where(Note.owner_id == utilisateur_id)
+        # Ordre de l'index (owner_id, date_modification, id) : les lignes sortent de l'index
+        # sans tri préalable de toutes les notes (ORDER BY id passerait par un B-tree temporaire)
+        .order_by(Note.date_modification, Note.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions():
+        notes = [
+            {
+                "id": row.id,
+                "titre": row.titre,
+                "contenu": row.contenu,
+                "visibilite": row.visibilite,
+                "tags": [],
+                "date_creation": _isoformat(row.date_creation),
+                "date_modification": _isoformat(row.date_modification),
+            }
+            for row in rows
+        ]
+        by_id = {note["id"]: note for note in notes}
+        tags = await db.execute(
+            select(note_tags.c.note_id, Tag.nom)
+            .join(Tag, Tag.id == note_tags.c.tag_id)
+            .where(note_tags.c.note_id.in_(list(by_id)))
+            .order_by(note_tags.c.note_id, Tag.nom)
+        )
+        for note_id, nom in tags:
+            by_id[note_id]["tags"].append(nom)
+        yield notes
+
+
+async def export_ndjson(db: AsyncSession, utilisateur_id: int, batch_size: int = 500) -> AsyncIterator[bytes]:
+    """Une note JSON par ligne, envoyées lot par lot"""
+    async for notes in iter_user_notes(db, utilisateur_id, batch_size):
+        yield "".join(json.dumps(note, ensure_ascii=False) + "\n" for note in notes).encode()
+
+
+async def export_markdown_zip(db: AsyncSession, utilisateur_id: int, batch_size: int = 500) -> AsyncIterator[bytes]:
+    """Archive zip (écrite en flux) d'un fichier Markdown par note, tags et métadonnées en front matter"""
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        async for notes in iter_user_notes(db, utilisateur_id, batch_size):
+            for note in notes:
+                archive.writestr(_markdown_filename(note), to_markdown(note))
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def to_markdown(note: Dict[str, Any]) -> str:
+    """Note au format Markdown précédé d'un front matter YAML (valeurs en chaînes JSON, valides en YAML)"""
+    front_matter = [
+        "---",
+        f"titre: {json.dumps(note['titre'], ensure_ascii=False)}",
+        f"visibilite: {note['visibilite']}",
+        f"tags: {json.dumps(note['tags'], ensure_ascii=False)}",
+        f"date_creation: {note['date_creation'] or ''}",
+        f"date_modification: {note['date_modification'] or ''}",
+        "---",
+        "",
+    ]
+    return "\n".join(front_matter) + (note["contenu"] or "")
+
+
+def _markdown_filename(note: Dict[str, Any]) -> str:
+    slug = re.sub(r"[^\w-]+", "-", note["titre"].lower()).strip("-")[:60] or "note"
+    return f"{note['id']:06d}-{slug}.md"
+
+
+def _isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+class _ChunkBuffer:
+    """
+    Flux non positionnable pour zipfile : accumule les octets écrits jusqu'au prochain drain().
+    Sans tell()/seek(), zipfile écrit les tailles après chaque fichier (data descriptor).
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def export_stream(
+    session_factory: Callable[[], AsyncSession], utilisateur_id: int, format: str, batch_size: int = 500
+) -> AsyncIterator[bytes]:
+    """
+    Corps d'une StreamingResponse : la session est ouverte par le générateur lui-même
+    (et non par une dépendance), pour rester valide jusqu'au dernier octet envoyé.
+    """
+    exporter = export_ndjson if format == "ndjson" else export_markdown_zip
+
+    async def stream() -> AsyncIterator[bytes]:
+        async with session_factory() as db:
+            async for chunk in exporter(db, utilisateur_id, batch_size):
+                if chunk:
+                    yield chunk
+
+    return stream()
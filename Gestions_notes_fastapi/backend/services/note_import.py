@@ -0,0 +1,289 @@
+import json
+import struct
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from core.exceptions import ValidationException
+from services.note_service import AsyncNoteService
+from utils.markdown import extract_tags_from_content
+
+IMPORT_FORMATS = ("ndjson", "markdown")
+
+# Nombre maximal d'erreurs détaillées dans le rapport (les suivantes sont seulement comptées)
+MAX_REPORTED_ERRORS = 100
+
+# Enregistrement lu : élément NoteCreate (dict) ou erreur de lecture
+Record = Union[Dict[str, Any], "RecordError"]
+
+
+class RecordError:
+    def __init__(self, type: str, msg: str):
+        self.error = {"type": type, "msg": msg}
+
+
+class _ByteStream:
+    """Lecture à la demande d'un flux d'octets asynchrone (corps de requête), avec tampon de relecture"""
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._buffer = bytearray()
+        self._eof = False
+
+    async def _fill(self) -> bool:
+        if self._eof:
+            return False
+        try:
+            self._buffer += await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            return False
+        return True
+
+    async def read_exactly(self, size: int) -> bytes:
+        while len(self._buffer) < size:
+            if not await self._fill():
+                raise ValidationException("Archive tronquée")
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    async def read_some(self) -> bytes:
+        """Octets disponibles (au moins un), b"" en fin de flux"""
+        if not self._buffer:
+            await self._fill()
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def unread(self, data: bytes) -> None:
+        self._buffer[:0] = data
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[bytes]:
+    """Lignes d'un flux d'octets, sans jamais tenir plus d'une ligne (et d'un bloc) en mémoire"""
+    pending = bytearray()
+    async for chunk in chunks:
+        pending += chunk
+        start = 0
+        while True:
+            end = pending.find(b"\n", start)
+            if end < 0:
+                break
+            yield bytes(pending[start:end])
+            start = end + 1
+        del pending[:start]
+        if len(pending) > max_line_bytes:
+            raise ValidationException(f"Ligne de plus de {max_line_bytes} octets")
+    if pending:
+        yield bytes(pending)
+
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes], max_record_bytes: int) -> AsyncIterator[Record]:
+    async for line in iter_lines(chunks, max_record_bytes):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield RecordError("json_invalid", f"JSON invalide : {exc}")
+            continue
+        if not isinstance(data, dict):
+            yield RecordError("dict_type", "Chaque ligne doit être un objet JSON")
+            continue
+        yield to_item(data.get("titre"), data.get("contenu"), data.get("visibilite"), data.get("tags"))
+
+
+# En-têtes d'une archive zip (APPNOTE 4.3.7 et suivants)
+_LOCAL_FILE_HEADER = struct.Struct("<IHHHHHIIIHH")
+_LOCAL_FILE_SIGNATURE = 0x04034B50
+_CENTRAL_DIRECTORY_SIGNATURES = (0x02014B50, 0x06054B50)
+_DATA_DESCRIPTOR_SIGNATURE = 0x08074B50
+
+
+async def iter_zip_entries(chunks: AsyncIterator[bytes], max_entry_bytes: int) -> AsyncIterator[Tuple[str, bytes]]:
+    """
+    Fichiers d'une archive zip lus dans l'ordre du flux, par leurs en-têtes locaux : le répertoire
+    central (en fin d'archive) n'est pas nécessaire. Gère les entrées stockées ou compressées
+    (deflate), y compris de taille inconnue à l'avance (data descriptor, zip écrit en flux).
+    """
+    stream = _ByteStream(chunks)
+    while True:
+        signature = struct.unpack("<I", await stream.read_exactly(4))[0]
+        if signature in _CENTRAL_DIRECTORY_SIGNATURES:
+            return
+        if signature != _LOCAL_FILE_SIGNATURE:
+            raise ValidationException("Archive zip invalide")
+        header = _LOCAL_FILE_HEADER.unpack(struct.pack("<I", signature) + await stream.read_exactly(_LOCAL_FILE_HEADER.size - 4))
+        _, _, flags, method, _, _, _, compressed_size, size, name_length, extra_length = header
+        name = (await stream.read_exactly(name_length)).decode("utf-8" if flags & 0x800 else "cp437")
+        await stream.read_exactly(extra_length)
+        if flags & 0x1:
+            raise ValidationException(f"Fichier chiffré non pris en charge : {name}")
+        has_descriptor = bool(flags & 0x8)
+
+        if method == 0 and not has_descriptor:
+            if size > max_entry_bytes:
+                raise ValidationException(f"Fichier de plus de {max_entry_bytes} octets : {name}")
+            data = await stream.read_exactly(compressed_size)
+        elif method == 8:
+            data = await _inflate(stream, None if has_descriptor else compressed_size, max_entry_bytes, name)
+        else:
+            raise ValidationException(f"Méthode de compression non prise en charge ({method}) : {name}")
+
+        if has_descriptor:
+            descriptor = await stream.read_exactly(4)
+            if struct.unpack("<I", descriptor)[0] == _DATA_DESCRIPTOR_SIGNATURE:
+                await stream.read_exactly(12)
+            else:
+                await stream.read_exactly(8)
+        if not name.endswith("/"):
+            yield name, data
+
+
+async def _inflate(stream: _ByteStream, compressed_size: Optional[int], max_entry_bytes: int, name: str) -> bytes:
+    """Décompresse une entrée deflate jusqu'à la fin de son flux compressé"""
+    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+    output = bytearray()
+    remaining = compressed_size
+    while not decompressor.eof:
+        data = await stream.read_some() if remaining is None else await stream.read_exactly(min(remaining, 65536))
+        if not data:
+            raise ValidationException(f"Archive tronquée : {name}")
+        if remaining is not None:
+            remaining -= len(data)
+        output += decompressor.decompress(data, max_entry_bytes + 1 - len(output))
+        if len(output) > max_entry_bytes or decompressor.unconsumed_tail:
+            raise ValidationException(f"Fichier de plus de {max_entry_bytes} octets : {name}")
+        if remaining == 0 and not decompressor.eof:
+            raise ValidationException(f"Données compressées invalides : {name}")
+    stream.unread(decompressor.unused_data)
+    return bytes(output)
+
+
+async def iter_markdown_records(chunks: AsyncIterator[bytes], max_record_bytes: int) -> AsyncIterator[Record]:
+    async for name, data in iter_zip_entries(chunks, max_record_bytes):
+        if not name.lower().endswith((".md", ".markdown")):
+            continue
+        try:
+            text = data.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            yield RecordError("unicode_error", f"Fichier non UTF-8 : {name}")
+            continue
+        yield parse_markdown(name, text)
+
+
+def parse_markdown(name: str, text: str) -> Dict[str, Any]:
+    """
+    Note d'un fichier Markdown : front matter optionnel (titre, visibilite, tags, comme à l'export),
+    sinon titre tiré du premier titre Markdown ou du nom du fichier.
+    """
+    meta: Dict[str, str] = {}
+    body = text
+    if text.startswith("---\n"):
+        end = text.find("\n---", 4)
+        if end >= 0:
+            for line in text[4:end].splitlines():
+                key, separator, value = line.partition(":")
+                if separator:
+                    meta[key.strip()] = value.strip()
+            body = text[end + 4:].lstrip("\n")
+
+    titre = _front_matter_value(meta.get("titre"))
+    if not titre:
+        heading = next((line[2:].strip() for line in body.splitlines() if line.startswith("# ")), None)
+        titre = heading or name.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    tags = _front_matter_value(meta.get("tags"))
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.strip("[]").split(",") if tag.strip()]
+    return to_item(titre, body, meta.get("visibilite") or None, tags)
+
+
+def _front_matter_value(value: Optional[str]) -> Any:
+    """Valeur de front matter : JSON (chaîne entre guillemets, liste) ou texte brut"""
+    if not value:
+        return value
+    if value[0] in "\"[":
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    return value
+
+
+def to_item(titre: Any, contenu: Any, visibilite: Any, tags: Any) -> Dict[str, Any]:
+    """Élément NoteCreate : tags fournis complétés par les #tags / @tags du contenu"""
+    item = {"titre": titre, "contenu": contenu, "tags": tags if isinstance(tags, list) else []}
+    if visibilite is not None:
+        item["visibilite"] = visibilite
+    if isinstance(contenu, str) and all(isinstance(tag, str) for tag in item["tags"]):
+        item["tags"] = list(dict.fromkeys(item["tags"] + sorted(extract_tags_from_content(contenu))))
+    return item
+
+
+class ImportReport:
+    """Avancement d'un import : un point par lot validé, erreurs (bornées) par position d'enregistrement"""
+
+    def __init__(self, resume_from: int):
+        self.resume_from = resume_from
+        self.committed = resume_from
+        self.created = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.chunks: List[Dict[str, int]] = []
+
+    def record_error(self, position: int, errors: List[Dict[str, Any]]) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"position": position, "errors": errors})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "resume_from": self.resume_from,
+            "committed": self.committed,
+            "created": self.created,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "errors": self.errors,
+        }
+
+
+async def import_notes(
+    note_service: AsyncNoteService,
+    records: AsyncIterator[Record],
+    utilisateur_id: int,
+    report: ImportReport,
+    chunk_size: int = 500,
+) -> ImportReport:
+    """
+    Crée les notes lues par lots de `chunk_size` (une transaction par lot, via create_notes_bulk).
+    Les `report.resume_from` premiers enregistrements sont lus puis ignorés (reprise) ; en cas d'échec,
+    `report.committed` indique la position à laquelle reprendre.
+    """
+    position = -1
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+
+    async def flush():
+        if chunk:
+            results = await note_service.create_notes_bulk([item for _, item in chunk], utilisateur_id)
+            for (item_position, _), result in zip(chunk, results):
+                if result["status"] == "created":
+                    report.created += 1
+                else:
+                    report.record_error(item_position, result["errors"])
+        report.committed = position + 1
+        report.chunks.append({"chunk": len(report.chunks) + 1, "committed": report.committed, "created": report.created, "failed": report.failed})
+        chunk.clear()
+
+    async for record in records:
+        position += 1
+        if position < report.resume_from:
+            continue
+        if isinstance(record, RecordError):
+            report.record_error(position, [record.error])
+        else:
+            chunk.append((position, record))
+        if len(chunk) >= chunk_size:
+            await flush()
+    if position + 1 > report.committed:
+        await flush()
+    return report
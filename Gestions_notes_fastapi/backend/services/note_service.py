@@ -1,12 +1,20 @@
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from core.exceptions import NotFoundException
 from models.notes import Note
 from repositories.note_repository import NoteRepository
+from repositories.base import ResultType
 from repositories.tag_repository import TagRepository
 from core.permissions import PermissionChecker
 from schemas.note_schema import NoteCreate, NoteUpdate  # Add this import
+from search.engine import search_engine
+from services.public_note_cache import public_note_cache
+from search.tag_autocomplete import normalize_tag, tag_autocomplete
+from utils.note_fields import NoteFields
+from utils.pagination import Keyset
 
 class NoteService:
 
@@ -18,12 +26,12 @@ class NoteService:
 
 
     def create_note(self, note_data: NoteCreate, utilisateur_id: int) -> Note:
-        print(f"DEBUG: utilisateur_id = {utilisateur_id}") 
         note = Note(
             titre= note_data.titre,
             contenu= note_data.contenu,
             owner_id=utilisateur_id,
             visibilite=note_data.visibilite,
+            tags=self.tag_repository.resolve_tags(note_data.tags or []),
         )
         if note_data.visibilite == "public":
             note.generate_public_token()
@@ -31,19 +39,71 @@ class NoteService:
         self.db.add(note)
         self.db.flush()
         
-        if note_data.tags:
-            for tag_nom in note_data.tags:
-                tag = self.tag_repository.get_or_create(tag_nom)
-                note.tags.append(tag)
+        if note.tags:
+            self.tag_repository.record_usage(utilisateur_id, added_tag_ids=[tag.id for tag in note.tags])
+        revision = self.note_repository.bump_revision(utilisateur_id)
                 
         self.db.commit()
         self.db.refresh(note)
+        search_engine.apply_changes(note.owner_id, revision, upserted=[(note.id, note.titre, note.contenu)])
+        self._register_created_tags()
+        tag_autocomplete.record_usage(note.owner_id, revision, added=[tag.nom for tag in note.tags])
         return note
         
 
-    def get_user_notes(self, utilisateur_id: int, skip: int = 0, limit: int = 100) -> List[Note]:
+    def create_notes_bulk(self, items: List[Dict[str, Any]], utilisateur_id: int) -> List[Dict[str, Any]]:
+        """
+        Créer plusieurs notes en une transaction, avec un résultat par élément (dans l'ordre reçu).
+        Les éléments sont validés en une passe ; les invalides sont signalés et ignorés.
+        Tous les tags sont résolus en une fois, puis notes et associations sont insérées
+        par INSERT groupés et les compteurs de tags mis à jour en une requête.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, NoteCreate.model_validate(item)))
+            except ValidationError as exc:
+                results[index] = {
+                    "index": index,
+                    "status": "invalid",
+                    "errors": exc.errors(include_url=False, include_context=False),
+                }
+
+        tags = {tag.nom: tag for tag in self.tag_repository.resolve_tags(
+            nom for _, note_data in valid for nom in note_data.tags or []
+        )}
+        rows, tag_ids, tag_names = [], [], []
+        for _, note_data in valid:
+            item_tags = list(dict.fromkeys(tags[normalize_tag(nom)] for nom in note_data.tags or []))
+            rows.append({
+                "titre": note_data.titre,
+                "contenu": note_data.contenu,
+                "apercu": Note.preview(note_data.contenu),
+                "owner_id": utilisateur_id,
+                "visibilite": note_data.visibilite.value,
+                "token_publique": Note.new_public_token() if note_data.visibilite == "public" else None,
+            })
+            tag_ids.append([tag.id for tag in item_tags])
+            tag_names.extend(tag.nom for tag in item_tags)
+
+        note_ids = self.note_repository.insert_many(rows, tag_ids)
+        self.tag_repository.record_usage(utilisateur_id, added_tag_ids=[tag_id for ids in tag_ids for tag_id in ids])
+        revision = self.note_repository.bump_revision(utilisateur_id)
+        self.db.commit()
+
+        search_engine.apply_changes(
+            utilisateur_id, revision, upserted=[(note_id, row["titre"], row["contenu"]) for note_id, row in zip(note_ids, rows)]
+        )
+        for (index, _), note_id, row in zip(valid, note_ids, rows):
+            results[index] = {"index": index, "status": "created", "id": note_id, "token_publique": row["token_publique"]}
+        self._register_created_tags()
+        tag_autocomplete.record_usage(utilisateur_id, revision, added=tag_names)
+        return results
+
+    def get_user_notes(self, utilisateur_id: int, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
         
-        return self.note_repository.get_user_notes(utilisateur_id, skip, limit)
+        return self.note_repository.get_user_notes(utilisateur_id, skip, limit, keyset, fields)
 
     def get_note_by_id(self, note_id: int, utilisateur_id: int) -> Note:
         
@@ -55,6 +115,7 @@ class NoteService:
     def update_note(self, note_id: int, note_data: NoteUpdate, utilisateur_id: int) -> Note:
         
         note = self.get_note_by_id(note_id, utilisateur_id)
+        previous_token = note.token_publique
         
         if note_data.titre is not None:
             note.titre = note_data.titre
@@ -67,30 +128,123 @@ class NoteService:
             elif note_data.visibilite == "prive":
                 note.token_publique = None
         
+        added_tags, removed_tags = [], []
         if note_data.tags is not None:
-            note.tags.clear()
-            for tag_nom in note_data.tags:
-                tag = self.tag_repository.get_or_create(tag_nom)
-                note.tags.append(tag)
+            # Ne toucher qu'aux associations qui changent
+            new_tags = self.tag_repository.resolve_tags(note_data.tags)
+            added_tags = [tag for tag in new_tags if tag not in note.tags]
+            removed_tags = [tag for tag in note.tags if tag not in new_tags]
+            for tag in removed_tags:
+                note.tags.remove(tag)
+            note.tags.extend(added_tags)
+            self.tag_repository.record_usage(
+                note.owner_id,
+                added_tag_ids=[tag.id for tag in added_tags],
+                removed_tag_ids=[tag.id for tag in removed_tags]
+            )
+        # Noms lus avant le commit, qui expire les objets
+        added_names = [tag.nom for tag in added_tags]
+        removed_names = [tag.nom for tag in removed_tags]
+        revision = self.note_repository.bump_revision(note.owner_id)
         
         self.db.commit()
         self.db.refresh(note)
+        public_note_cache.invalidate([previous_token, note.token_publique])
+        search_engine.apply_changes(note.owner_id, revision, upserted=[(note.id, note.titre, note.contenu)])
+        self._register_created_tags()
+        tag_autocomplete.record_usage(note.owner_id, revision, added=added_names, removed=removed_names)
         return note
 
     def delete_note(self, note_id: int, utilisateur_id: int) -> bool:
         note = self.get_note_by_id(note_id, utilisateur_id)
+        tag_names = [tag.nom for tag in note.tags]
+        token = note.token_publique
+        self.tag_repository.record_usage(utilisateur_id, removed_tag_ids=[tag.id for tag in note.tags])
         self.db.delete(note)
+        revision = self.note_repository.bump_revision(utilisateur_id)
         self.db.commit()
+        public_note_cache.invalidate([token])
+        search_engine.apply_changes(utilisateur_id, revision, removed=[note_id])
+        tag_autocomplete.record_usage(utilisateur_id, revision, removed=tag_names)
         return True
 
+    def _register_created_tags(self) -> None:
+        """Tags créés par la transaction, publiés dans l'auto-complétion une fois commités"""
+        for nom in self.tag_repository.created_tags:
+            tag_autocomplete.register_tag(nom)
+        self.tag_repository.created_tags = []
+
     def get_public_note_by_token(self, token: str) -> Optional[Note]:
         return self.note_repository.get_public_note_by_token(token)
 
-    def search_notes(self, utilisateur_id: int, query: str, skip: int = 0, limit: int = 100) -> List[Note]:
-        return self.note_repository.search_user_notes(utilisateur_id, query, skip, limit)
+    def search_notes(self, utilisateur_id: int, query: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        return self.note_repository.search_user_notes(utilisateur_id, query, skip, limit, keyset, fields)
+
+    def search_notes_indexed(self, utilisateur_id: int, query: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        """
+        Recherche plein texte par FTS5 (classement bm25, extraits surlignés) quand il est disponible,
+        comme la pagination par curseur (tri par date). Sinon, index en mémoire de l'utilisateur
+        (sans extrait), reconstruit si sa révision a changé depuis sa dernière mise à jour ; au-delà
+        de search_index_max_notes notes, recherche SQL par LIKE.
+        """
+        if keyset is not None or self.note_repository.fts_enabled():
+            return self.search_notes(utilisateur_id, query, skip, limit, keyset, fields)
+        note_ids = search_engine.search(
+            utilisateur_id, query, skip, limit, self.note_repository.get_revision(utilisateur_id),
+            lambda: self.note_repository.iter_user_note_texts(utilisateur_id)
+        )
+        if note_ids is None:
+            return self.search_notes(utilisateur_id, query, skip, limit, keyset, fields)
+        return self.note_repository.get_user_notes_by_ids(utilisateur_id, note_ids, fields)
+
+    def filter_notes_by_visibilite(self, utilisateur_id: int, visibilite: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        return self.note_repository.filter_user_notes_by_visibility(utilisateur_id, visibilite, skip, limit, keyset, fields)
+
+    def filter_notes_by_tag(self, utilisateur_id: int, tag_nom: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        return self.note_repository.filter_user_notes_by_tag(utilisateur_id, tag_nom, skip, limit, keyset, fields)
+
+
+class AsyncNoteService:
+    """
+    NoteService pour une AsyncSession : chaque opération (requêtes, commit et mise à jour
+    des index en mémoire) est exécutée d'un bloc via run_sync, sur la connexion asynchrone.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _run(self, operation: Callable[[NoteService], ResultType]) -> ResultType:
+        return await self.db.run_sync(lambda session: operation(NoteService(session)))
+
+    async def create_note(self, note_data: NoteCreate, utilisateur_id: int) -> Note:
+        return await self._run(lambda service: service.create_note(note_data, utilisateur_id))
+
+    async def create_notes_bulk(self, items: List[Dict[str, Any]], utilisateur_id: int) -> List[Dict[str, Any]]:
+        return await self._run(lambda service: service.create_notes_bulk(items, utilisateur_id))
+
+    async def get_user_notes(self, utilisateur_id: int, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        return await self._run(lambda service: service.get_user_notes(utilisateur_id, skip, limit, keyset, fields))
+
+    async def get_note_by_id(self, note_id: int, utilisateur_id: int) -> Note:
+        return await self._run(lambda service: service.get_note_by_id(note_id, utilisateur_id))
+
+    async def update_note(self, note_id: int, note_data: NoteUpdate, utilisateur_id: int) -> Note:
+        return await self._run(lambda service: service.update_note(note_id, note_data, utilisateur_id))
+
+    async def delete_note(self, note_id: int, utilisateur_id: int) -> bool:
+        return await self._run(lambda service: service.delete_note(note_id, utilisateur_id))
+
+    async def get_public_note_by_token(self, token: str) -> Optional[Note]:
+        return await self._run(lambda service: service.get_public_note_by_token(token))
+
+    async def search_notes(self, utilisateur_id: int, query: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        return await self._run(lambda service: service.search_notes(utilisateur_id, query, skip, limit, keyset, fields))
+
+    async def search_notes_indexed(self, utilisateur_id: int, query: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        return await self._run(lambda service: service.search_notes_indexed(utilisateur_id, query, skip, limit, keyset, fields))
 
-    def filter_notes_by_visibilite(self, utilisateur_id: int, visibilite: str, skip: int = 0, limit: int = 100) -> List[Note]:
-        return self.note_repository.filter_user_notes_by_visibility(utilisateur_id, visibilite, skip, limit)
+    async def filter_notes_by_visibilite(self, utilisateur_id: int, visibilite: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        return await self._run(lambda service: service.filter_notes_by_visibilite(utilisateur_id, visibilite, skip, limit, keyset, fields))
 
-    def filter_notes_by_tag(self, utilisateur_id: int, tag_nom: str, skip: int = 0, limit: int = 100) -> List[Note]:
-        return self.note_repository.filter_user_notes_by_tag(utilisateur_id, tag_nom, skip, limit)
+    async def filter_notes_by_tag(self, utilisateur_id: int, tag_nom: str, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None, fields: Optional[NoteFields] = None) -> List[Note]:
+        return await self._run(lambda service: service.filter_notes_by_tag(utilisateur_id, tag_nom, skip, limit, keyset, fields))
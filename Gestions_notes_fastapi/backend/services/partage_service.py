@@ -1,11 +1,17 @@
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 import uuid
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models.partage_note import PartageNote
+from models.utilisateurs import Utilisateur
+from repositories.base import ResultType
 from repositories.note_repository import NoteRepository
 from repositories.utilisateur_repository import UserRepository
 from core.exceptions import NotFoundException, ValidationException, AuthorizationException
 from core.permissions import PermissionChecker
+from services.public_note_cache import public_note_cache
+from utils.pagination import Keyset
 
 class PartageService:
     def __init__(self, db: Session):
@@ -121,6 +127,98 @@ class PartageService:
                 }
             })
 
+    def share_notes_with_users(self, note_ids: List[int], user_emails: List[str], owner_id: int) -> Dict:
+        """
+        Partager plusieurs notes avec plusieurs utilisateurs en une transaction, avec un statut
+        par couple (note, email) : mêmes codes que share_note_with_user pour chaque refus.
+        Notes, destinataires et partages existants sont lus en une requête chacun, puis les
+        partages manquants sont insérés par un INSERT groupé.
+        """
+        note_ids = list(dict.fromkeys(note_ids))
+        user_emails = list(dict.fromkeys(user_emails))
+
+        note_titles = self.note_repo.get_owned_note_titles(owner_id, note_ids)
+        users = {user.email: user for user in self.user_repo.get_by_emails(user_emails)}
+        recipient_ids = [user.id for user in users.values() if user.id != owner_id]
+        existing = set()
+        if note_titles and recipient_ids:
+            existing = set(
+                self.db.query(PartageNote.note_id, PartageNote.partage_avec_utilisateur_id).filter(
+                    PartageNote.note_id.in_(list(note_titles)),
+                    PartageNote.partage_avec_utilisateur_id.in_(recipient_ids)
+                )
+            )
+
+        results, new_shares = [], []
+        for note_id in note_ids:
+            for email in user_emails:
+                user = users.get(email)
+                if note_id not in note_titles:
+                    code = "NOTE_NOT_FOUND"
+                elif user is None:
+                    code = "USER_NOT_FOUND"
+                elif user.id == owner_id:
+                    code = "SELF_SHARING_FORBIDDEN"
+                elif (note_id, user.id) in existing:
+                    code = "ALREADY_SHARED"
+                else:
+                    code = "SHARE_CREATED"
+                    new_shares.append({
+                        "note_id": note_id,
+                        "utilisateur_id": owner_id,
+                        "partage_avec_utilisateur_id": user.id,
+                        "permission": "read"
+                    })
+                results.append({"note_id": note_id, "email": email, "user_id": user.id if user else None, "code": code})
+
+        inserted = set()
+        try:
+            if new_shares:
+                # Un partage créé par une requête concurrente entre la lecture et l'insertion
+                # est ignoré (index unique note / destinataire) au lieu de faire échouer le lot ;
+                # RETURNING donne les couples réellement insérés
+                dialect = postgresql if self.db.get_bind().dialect.name == "postgresql" else sqlite
+                table = PartageNote.__table__
+                inserted = set(self.db.execute(
+                    dialect.insert(table)
+                    .on_conflict_do_nothing(index_elements=[table.c.note_id, table.c.partage_avec_utilisateur_id])
+                    .returning(table.c.note_id, table.c.partage_avec_utilisateur_id),
+                    new_shares
+                ).tuples())
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            raise ValidationException({
+                "status": "error",
+                "code": "SHARE_CREATION_FAILED",
+                "message": "Erreur lors du partage des notes",
+                "data": {
+                    "note_ids": note_ids,
+                    "target_emails": user_emails,
+                    "owner_id": owner_id,
+                    "error_details": str(e),
+                    "action": "share_notes"
+                }
+            })
+
+        counts: Dict[str, int] = {}
+        for result in results:
+            if result["code"] == "SHARE_CREATED" and (result["note_id"], result["user_id"]) not in inserted:
+                # Créé entre-temps par une requête concurrente
+                result["code"] = "ALREADY_SHARED"
+            counts[result["code"]] = counts.get(result["code"], 0) + 1
+        return {
+            "status": "success",
+            "code": "SHARES_CREATED",
+            "message": f"{len(inserted)} partage(s) créé(s) sur {len(results)} demandé(s)",
+            "data": {
+                "total": len(results),
+                "created": len(inserted),
+                "counts": counts,
+                "results": results
+            }
+        }
+
     def unshare_note_with_user(self, note_id: int, user_email: str, owner_id: int) -> Dict:
         # Vérification de la note
         note = self.note_repo.get_user_note_by_id(note_id, owner_id)
@@ -200,9 +298,9 @@ class PartageService:
                 }
             })
 
-    def get_notes_shared_with_user(self, utilisateur_id: int, skip: int = 0, limit: int = 100) -> List:
+    def get_notes_shared_with_user(self, utilisateur_id: int, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None) -> List:
         try:
-            notes = self.note_repo.get_shared_with_user(utilisateur_id, skip, limit)
+            notes = self.note_repo.get_shared_with_user(utilisateur_id, skip, limit, keyset)
             if not notes:
                 return {
                     "status": "success",
@@ -225,10 +323,34 @@ class PartageService:
                 }
             })
 
-    def get_note_shares(self, note_id: int, owner_id: int) -> List[Dict]:
+    def _shares_by_note(self, note_ids: List[int], owner_id: int) -> Dict[int, List[Dict]]:
+        """Partages des notes (et email du destinataire) en une requête jointe, groupés par note"""
+        if not note_ids:
+            return {}
+        rows = (
+            self.db.query(PartageNote, Utilisateur.email)
+            .join(Utilisateur, Utilisateur.id == PartageNote.partage_avec_utilisateur_id)
+            .filter(
+                PartageNote.note_id.in_(note_ids),
+                PartageNote.utilisateur_id == owner_id
+            )
+            .order_by(PartageNote.note_id, PartageNote.id)
+        )
+        shares: Dict[int, List[Dict]] = {note_id: [] for note_id in note_ids}
+        for share, email in rows:
+            shares[share.note_id].append({
+                "email": email,
+                "user_id": share.partage_avec_utilisateur_id,
+                "shared_at": share.date_partage,
+                "permission": share.permission,
+                "status": "active"
+            })
+        return shares
+
+    def get_note_shares(self, note_id: int, owner_id: int) -> Dict:
         # Vérification de la note
-        note = self.note_repo.get_user_note_by_id(note_id, owner_id)
-        if not note:
+        note_titre = self.note_repo.get_owned_note_titles(owner_id, [note_id]).get(note_id)
+        if note_titre is None:
             raise NotFoundException({
                 "status": "error",
                 "code": "NOTE_NOT_FOUND",
@@ -241,30 +363,15 @@ class PartageService:
             })
 
         try:
-            shares = self.db.query(PartageNote).filter(
-                PartageNote.note_id == note_id,
-                PartageNote.utilisateur_id == owner_id
-            ).all()
-
-            result = []
-            for share in shares:
-                user = self.user_repo.get(share.partage_avec_utilisateur_id)
-                if user:
-                    result.append({
-                        "email": user.email,
-                        "user_id": user.id,
-                        "shared_at": share.date_partage,
-                        "permission": share.permission,
-                        "status": "active"
-                    })
+            result = self._shares_by_note([note_id], owner_id)[note_id]
 
             return {
                 "status": "success",
                 "code": "SHARES_RETRIEVED",
-                "message": f"Liste des partages pour la note '{note.titre}'",
+                "message": f"Liste des partages pour la note '{note_titre}'",
                 "data": {
                     "note_id": note_id,
-                    "note_titre": note.titre,
+                    "note_titre": note_titre,
                     "total_shares": len(result),
                     "shares": result
                 }
@@ -282,6 +389,39 @@ class PartageService:
                 }
             })
 
+    def get_notes_shares(self, note_ids: List[int], owner_id: int) -> Dict:
+        """
+        Partages de plusieurs notes en une requête (badges de partage d'une page de notes).
+        Une note absente ou dont l'utilisateur n'est pas propriétaire a une liste vide.
+        """
+        note_ids = list(dict.fromkeys(note_ids))
+        try:
+            shares = self._shares_by_note(note_ids, owner_id)
+        except Exception as e:
+            raise ValidationException({
+                "status": "error",
+                "code": "SHARES_FETCH_FAILED",
+                "message": "Erreur lors de la récupération des partages",
+                "data": {
+                    "note_ids": note_ids,
+                    "owner_id": owner_id,
+                    "error_details": str(e),
+                    "action": "get_notes_shares"
+                }
+            })
+
+        return {
+            "status": "success",
+            "code": "SHARES_RETRIEVED",
+            "message": f"Partages de {len(note_ids)} note(s)",
+            "data": {
+                "notes": [
+                    {"note_id": note_id, "total_shares": len(shares[note_id]), "shares": shares[note_id]}
+                    for note_id in note_ids
+                ]
+            }
+        }
+
     def create_public_link(self, note_id: int, owner_id: int) -> Dict:
         # Vérification de la note
         note = self.note_repo.get_user_note_by_id(note_id, owner_id)
@@ -308,6 +448,7 @@ class PartageService:
             # Change la visibilité en public
             note.visibilite = "public"
             self.db.commit()
+            public_note_cache.invalidate([note.token_publique])
 
             return {
                 "status": "success",
@@ -368,9 +509,11 @@ class PartageService:
 
         try:
             # Rendre la note privée
+            token = note.token_publique
             note.visibilite = "prive"
             note.token_publique = None
             self.db.commit()
+            public_note_cache.invalidate([token])
 
             return {
                 "status": "success",
@@ -436,4 +579,41 @@ class PartageService:
                     "error_details": str(e),
                     "action": "get_public_note"
                 }
-            })
\ No newline at end of file
+            })
+
+
+class AsyncPartageService:
+    """PartageService pour une AsyncSession (chaque opération s'exécute via run_sync)"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def _run(self, operation: Callable[[PartageService], ResultType]) -> ResultType:
+        return await self.db.run_sync(lambda session: operation(PartageService(session)))
+
+    async def share_note_with_user(self, note_id: int, user_email: str, owner_id: int) -> Dict:
+        return await self._run(lambda service: service.share_note_with_user(note_id, user_email, owner_id))
+
+    async def share_notes_with_users(self, note_ids: List[int], user_emails: List[str], owner_id: int) -> Dict:
+        return await self._run(lambda service: service.share_notes_with_users(note_ids, user_emails, owner_id))
+
+    async def unshare_note_with_user(self, note_id: int, user_email: str, owner_id: int) -> Dict:
+        return await self._run(lambda service: service.unshare_note_with_user(note_id, user_email, owner_id))
+
+    async def get_notes_shared_with_user(self, utilisateur_id: int, skip: int = 0, limit: int = 100, keyset: Optional[Keyset] = None) -> List:
+        return await self._run(lambda service: service.get_notes_shared_with_user(utilisateur_id, skip, limit, keyset))
+
+    async def get_note_shares(self, note_id: int, owner_id: int) -> Dict:
+        return await self._run(lambda service: service.get_note_shares(note_id, owner_id))
+
+    async def get_notes_shares(self, note_ids: List[int], owner_id: int) -> Dict:
+        return await self._run(lambda service: service.get_notes_shares(note_ids, owner_id))
+
+    async def create_public_link(self, note_id: int, owner_id: int) -> Dict:
+        return await self._run(lambda service: service.create_public_link(note_id, owner_id))
+
+    async def revoke_public_link(self, note_id: int, owner_id: int) -> Dict:
+        return await self._run(lambda service: service.revoke_public_link(note_id, owner_id))
+
+    async def get_public_note_by_token(self, token: str):
+        return await self._run(lambda service: service.get_public_note_by_token(token))
@@ -0,0 +1,156 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple, Type
+
+from fastapi import Request, Response, status
+from pydantic import BaseModel
+
+from config import settings
+from models.notes import Note
+from schemas.note_schema import NoteResponse
+
+# Les caches intermédiaires peuvent stocker la note mais doivent la revalider (révocation du lien)
+CACHE_CONTROL = "public, no-cache"
+
+
+class PublicNoteEntry:
+    """
+    Note publique détachée de la session, avec ses représentations JSON déjà sérialisées
+    (une par schéma de réponse) et leur ETag fort.
+    """
+
+    def __init__(self, snapshot: NoteResponse):
+        self.snapshot = snapshot
+        modified = snapshot.date_modification or snapshot.date_creation
+        if modified is not None and modified.tzinfo is None:
+            # SQLite renvoie des dates naïves, en UTC (CURRENT_TIMESTAMP)
+            modified = modified.replace(tzinfo=timezone.utc)
+        self.last_modified = modified.replace(microsecond=0) if modified else None
+        self._bodies: Dict[Type[BaseModel], Tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_note(cls, note: Note) -> "PublicNoteEntry":
+        return cls(NoteResponse.model_validate(note))
+
+    def body(self, model: Type[BaseModel]) -> Tuple[bytes, str]:
+        """Corps JSON et ETag pour un schéma de réponse (sérialisé une seule fois)"""
+        with self._lock:
+            cached = self._bodies.get(model)
+            if cached is None:
+                content = model.model_validate(self.snapshot.model_dump()).model_dump_json().encode()
+                cached = (content, '"%s"' % hashlib.sha256(content).hexdigest()[:32])
+                self._bodies[model] = cached
+            return cached
+
+    def response(self, request: Request, model: Type[BaseModel]) -> Response:
+        """Réponse 200 avec le corps en cache, ou 304 si le client a déjà cette version"""
+        content, etag = self.body(model)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        if self._not_modified(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=content, media_type="application/json", headers=headers)
+
+    def _not_modified(self, request: Request, etag: str) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match prime sur If-Modified-Since (RFC 9110, 13.1.3)
+            candidates = {value.strip() for value in if_none_match.split(",")}
+            return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return self.last_modified <= since
+        return False
+
+
+class PublicNoteCache:
+    """
+    Cache LRU borné en taille et en durée (TTL) des notes publiques sérialisées, indexé par token.
+
+    Les routes publiques (/notes/notes/public/{token}, /sharing/public/{token}) le consultent
+    avant toute requête ; NoteService (modification, suppression) et PartageService
+    (création / révocation du lien) invalident le token après leur commit. Le cache est propre
+    au processus : avec plusieurs workers, seul celui qui traite la modification l'invalide, et le
+    TTL borne la durée pendant laquelle les autres servent une note modifiée ou un lien révoqué.
+    """
+
+    def __init__(self, max_size: int = 1000, ttl: float = 10.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[PublicNoteEntry, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[PublicNoteEntry]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    async def get_or_load(self, token: str, loader: Callable[[], Awaitable[Optional[Note]]]) -> Optional[PublicNoteEntry]:
+        """Entrée en cache, ou note chargée par `loader` (None si introuvable, non mis en cache)"""
+        entry = self.get(token)
+        if entry is not None:
+            return entry
+        generation = self._generation
+        note = await loader()
+        if note is None:
+            return None
+        entry = PublicNoteEntry.from_note(note)
+        self.put(token, entry, generation)
+        return entry
+
+    def put(self, token: str, entry: PublicNoteEntry, generation: Optional[int] = None) -> None:
+        """Mémorise l'entrée, sauf si une invalidation a eu lieu depuis `generation`"""
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[token] = (entry, time.monotonic() + self.ttl)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tokens: Iterable[Optional[str]]) -> None:
+        with self._lock:
+            self._generation += 1
+            for token in tokens:
+                if token:
+                    self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size, "ttl_seconds": self.ttl, "hits": self.hits, "misses": self.misses}
+
+
+public_note_cache = PublicNoteCache(
+    max_size=settings.public_note_cache_size,
+    ttl=settings.public_note_cache_ttl_seconds,
+)
@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+
+from core.exceptions import ValidationException
+
+# Champs d'une note dans une liste, dans l'ordre de NoteResponse ; apercu (résumé précalculé du
+# contenu) à la place de contenu en vue résumée, snippet en recherche plein texte uniquement
+NOTE_FIELDS = ("titre", "contenu", "apercu", "visibilite", "id", "owner_id", "date_creation", "date_modification", "token_publique", "tags")
+SEARCH_FIELDS = NOTE_FIELDS + ("snippet",)
+# Champs qui ne sont pas des colonnes de la table notes
+_RELATED_FIELDS = ("tags", "snippet")
+
+SUMMARY_FIELDS = tuple(name for name in NOTE_FIELDS if name != "contenu")
+
+
+@dataclass(frozen=True)
+class NoteFields:
+    """
+    Champs renvoyés pour chaque note d'une liste (`fields=` ou `view=summary`), dans l'ordre des
+    schémas. Les repositories ne chargent que les colonnes correspondantes (le contenu n'est pas lu
+    s'il n'est pas demandé) et ne chargent les tags que s'ils sont demandés.
+    """
+    names: Tuple[str, ...]
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return tuple(name for name in self.names if name not in _RELATED_FIELDS)
+
+    @property
+    def with_tags(self) -> bool:
+        return "tags" in self.names
+
+
+def parse_fields(view: str, fields: Optional[str], search: bool = False) -> Optional[NoteFields]:
+    """
+    Champs demandés : None pour la vue complète sans `fields` (réponse inchangée), sinon les champs
+    de la liste `fields` (séparés par des virgules, `id` toujours inclus) ou ceux de la vue résumée.
+    """
+    allowed = SEARCH_FIELDS if search else NOTE_FIELDS
+    if fields is None:
+        if view != "summary":
+            return None
+        return NoteFields(SUMMARY_FIELDS + (("snippet",) if search else ()))
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested.difference(allowed))
+    if unknown:
+        raise ValidationException(f"Champs inconnus : {', '.join(unknown)} (disponibles : {', '.join(allowed)})")
+    requested.add("id")
+    return NoteFields(tuple(name for name in allowed if name in requested))
+
+
+def _note_fields_dependency(search: bool):
+    def get_note_fields(
+        view: str = Query(
+            "full",
+            pattern="^(full|summary)$",
+            description="summary : apercu (150 caractères) à la place du contenu, qui n'est pas chargé"
+        ),
+        fields: Optional[str] = Query(
+            None,
+            description="Champs à renvoyer, séparés par des virgules (ex. id,titre,apercu) ; id est toujours inclus"
+        )
+    ) -> Optional[NoteFields]:
+        """Dépendance FastAPI : None pour la réponse complète, sinon les champs demandés"""
+        try:
+            return parse_fields(view, fields, search)
+        except ValidationException as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return get_note_fields
+
+
+get_note_fields = _note_fields_dependency(search=False)
+get_search_note_fields = _note_fields_dependency(search=True)
@@ -0,0 +1,92 @@
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+from fastapi import Response
+
+from config import settings
+from models.notes import Note
+from utils.note_fields import NoteFields
+from utils.pagination import Keyset, build_page
+
+# Dates UTC en "Z", comme Pydantic v2 ; dates naïves (SQLite) et décalages identiques
+_ORJSON_OPTIONS = orjson.OPT_UTC_Z
+
+
+class FastJSONResponse(Response):
+    """Réponse JSON encodée par orjson, sans passer par jsonable_encoder ni json.dumps"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+
+
+def note_row(note: Note) -> Dict[str, Any]:
+    """
+    Champs de NoteResponse, dans l'ordre du schéma, lus directement sur une note chargée par un
+    repository (tags compris) : données de confiance, sans validation Pydantic (from_attributes).
+    """
+    return {
+        "titre": note.titre,
+        "contenu": note.contenu,
+        "visibilite": note.visibilite,
+        "id": note.id,
+        "owner_id": note.owner_id,
+        "date_creation": note.date_creation,
+        "date_modification": note.date_modification,
+        "token_publique": note.token_publique,
+        "tags": [{"id": tag.id, "nom": tag.nom} for tag in note.tags],
+    }
+
+
+def search_row(note: Note) -> Dict[str, Any]:
+    """Champs de NoteSearchResponse : ceux de NoteResponse et l'extrait surligné, s'il a été calculé"""
+    row = note_row(note)
+    row["snippet"] = getattr(note, "snippet", None)
+    return row
+
+
+# Lecture de chaque champ de NoteFields : seuls les attributs chargés par le repository sont lus
+_FIELD_VALUES: Dict[str, Callable[[Note], Any]] = {
+    "titre": lambda note: note.titre,
+    "contenu": lambda note: note.contenu,
+    "apercu": lambda note: note.apercu,
+    "visibilite": lambda note: note.visibilite,
+    "id": lambda note: note.id,
+    "owner_id": lambda note: note.owner_id,
+    "date_creation": lambda note: note.date_creation,
+    "date_modification": lambda note: note.date_modification,
+    "token_publique": lambda note: note.token_publique,
+    "tags": lambda note: [{"id": tag.id, "nom": tag.nom} for tag in note.tags],
+    "snippet": lambda note: getattr(note, "snippet", None),
+}
+
+
+def sparse_row(note: Note, fields: NoteFields) -> Dict[str, Any]:
+    """Champs demandés (fields= / view=summary) d'une note chargée avec les mêmes NoteFields"""
+    return {name: _FIELD_VALUES[name](note) for name in fields.names}
+
+
+def note_list_response(notes: List[Note], keyset: Optional[Keyset], limit: int, search: bool = False, fields: Optional[NoteFields] = None) -> Any:
+    """
+    Réponse d'une route de liste : liste simple (skip/limit) ou enveloppe paginée (curseur).
+    Le response_model de la route reste la référence du contrat (OpenAPI) ; renvoyer une Response
+    évite à FastAPI de revalider chaque note. FAST_LIST_RESPONSES=false rend les notes telles quelles
+    (validation par le response_model et encodeur JSON standard). Avec `fields`, les lignes ne
+    comportent que les champs demandés et ne peuvent pas passer par le response_model : elles sont
+    toujours rendues ici.
+    """
+    if fields is not None:
+        row = partial(sparse_row, fields=fields)
+    elif not settings.fast_list_responses:
+        return notes if keyset is None else build_page(notes, limit)
+    else:
+        row = search_row if search else note_row
+    rows = [row(note) for note in notes]
+    if keyset is None:
+        return FastJSONResponse(rows)
+    # Curseur calculé sur les notes (date_modification, id), éléments remplacés par les lignes
+    page = build_page(notes, limit)
+    page["items"] = rows
+    return FastJSONResponse(page)
@@ -0,0 +1,95 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Query, status
+from sqlalchemy import String, and_, bindparam, or_
+
+from core.exceptions import ValidationException
+
+
+@dataclass(frozen=True)
+class Keyset:
+    """
+    Position de pagination par curseur sur (date_modification, id), triés par ordre décroissant.
+    Un Keyset vide correspond à la première page.
+    """
+    after_date: Optional[datetime] = None
+    after_id: Optional[int] = None
+
+    @property
+    def is_first_page(self) -> bool:
+        return self.after_id is None
+
+
+def encode_cursor(date_modification: Optional[datetime], note_id: int) -> str:
+    """Curseur opaque (base64 url-safe) pointant après la note donnée"""
+    payload = [date_modification.isoformat() if date_modification else None, note_id]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Keyset:
+    """Décoder un curseur reçu du client ; une chaîne vide désigne la première page"""
+    if not cursor:
+        return Keyset()
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date_value, note_id = json.loads(raw)
+        if not isinstance(note_id, int):
+            raise ValueError(note_id)
+        after_date = datetime.fromisoformat(date_value) if date_value is not None else None
+    except (binascii.Error, ValueError, TypeError):
+        raise ValidationException("Curseur de pagination invalide")
+    return Keyset(after_date=after_date, after_id=note_id)
+
+
+def keyset_filter(date_column, id_column, keyset: Keyset, dialect_name: str):
+    """Condition "strictement après le curseur" pour un tri (date desc, id desc)"""
+    if keyset.after_date is None:
+        # Lignes sans date : elles sont triées en dernier, on ne départage que par id
+        return and_(date_column.is_(None), id_column < keyset.after_id)
+
+    after_date = _date_bind(keyset.after_date, dialect_name)
+    return or_(
+        date_column < after_date,
+        and_(date_column == after_date, id_column < keyset.after_id),
+        date_column.is_(None),
+    )
+
+
+def _date_bind(value: datetime, dialect_name: str):
+    # SQLite stocke les dates en texte : CURRENT_TIMESTAMP n'a pas de microsecondes,
+    # le paramètre doit avoir exactement le même format pour que l'égalité fonctionne.
+    if dialect_name == "sqlite":
+        text_format = "%Y-%m-%d %H:%M:%S.%f" if value.microsecond else "%Y-%m-%d %H:%M:%S"
+        return bindparam(None, value.strftime(text_format), type_=String)
+    return bindparam(None, value)
+
+
+def build_page(items: List[Any], limit: int) -> Dict[str, Any]:
+    """Enveloppe de réponse paginée : éléments + curseur de la page suivante"""
+    next_cursor = None
+    if len(items) == limit and items:
+        last = items[-1]
+        next_cursor = encode_cursor(last.date_modification, last.id)
+    return {"items": items, "next_cursor": next_cursor, "limit": limit}
+
+
+def get_keyset(
+    cursor: Optional[str] = Query(
+        None,
+        description="Pagination par curseur : vide pour la première page, puis la valeur next_cursor reçue. "
+                    "Si présent, la réponse est une enveloppe {items, next_cursor, limit}."
+    )
+) -> Optional[Keyset]:
+    """Dépendance FastAPI : None en mode skip/limit, sinon la position du curseur"""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValidationException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
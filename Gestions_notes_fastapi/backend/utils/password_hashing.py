@@ -0,0 +1,132 @@
+import asyncio
+import math
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from config import settings
+from core.exceptions import ServiceUnavailableException
+from utils.security import hash_password, verify_password
+
+ResultType = TypeVar("ResultType")
+
+
+class PasswordHashingPool:
+    """
+    Pool de threads dédié au hachage bcrypt (inscription, connexion).
+
+    bcrypt libère le GIL : les hachages tournent en parallèle sur `workers` threads
+    sans occuper le threadpool partagé des requêtes. Au-delà de `workers` calculs en
+    cours et `queue_size` en attente, les nouvelles demandes sont refusées aussitôt
+    (ServiceUnavailableException, 503 + Retry-After) plutôt que d'allonger la file :
+    une rafale de connexions ne peut pas affamer le reste de l'API.
+
+    Les threads sont créés à la première demande et arrêtés par shutdown() (arrêt de
+    l'application) ; une demande ultérieure (nouveau démarrage dans le même processus)
+    recrée le pool.
+    """
+
+    def __init__(self, workers: int = 4, queue_size: int = 32, samples: int = 1000):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self._wait_times = deque(maxlen=samples)
+        self._hash_times = deque(maxlen=samples)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    async def _submit(self, function: Callable[..., ResultType], *args: Any) -> ResultType:
+        with self._lock:
+            if self._submitted >= self.workers + self.queue_size:
+                self.rejected += 1
+                raise ServiceUnavailableException(
+                    "Trop de demandes d'authentification en cours, réessayez plus tard.",
+                    retry_after=self._retry_after(),
+                )
+            self._submitted += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hashing")
+            executor = self._executor
+        # La place est libérée quand le calcul se termine (ou est annulé avant de démarrer),
+        # pas quand la requête abandonne l'attente
+        try:
+            future = executor.submit(self._timed, function, args, time.perf_counter())
+        except BaseException:
+            # Soumission refusée (pool arrêté entre-temps par shutdown()) : la place réservée
+            # ci-dessus serait sinon perdue, jusqu'à refuser toutes les demandes (503)
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self._submitted -= 1
+
+    def _timed(self, function: Callable[..., ResultType], args: tuple, queued_at: float) -> ResultType:
+        started_at = time.perf_counter()
+        with self._lock:
+            self._running += 1
+        try:
+            return function(*args)
+        finally:
+            finished_at = time.perf_counter()
+            with self._lock:
+                self._running -= 1
+                self.completed += 1
+                self._wait_times.append(started_at - queued_at)
+                self._hash_times.append(finished_at - started_at)
+
+    def _retry_after(self) -> int:
+        """Secondes estimées pour écouler la file actuelle (appelé sous le verrou)"""
+        hash_time = statistics.fmean(self._hash_times) if self._hash_times else 0.25
+        return max(1, math.ceil(self._submitted * hash_time / self.workers))
+
+    def stats(self) -> Dict[str, Any]:
+        """Profondeur de file et latences (attente / hachage), exposées par /health"""
+        with self._lock:
+            wait_times = sorted(self._wait_times)
+            hash_times = sorted(self._hash_times)
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "running": self._running,
+                "queue_depth": self._submitted - self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_ms": _percentiles(wait_times),
+                "hash_ms": _percentiles(hash_times),
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _percentiles(timings) -> Dict[str, float]:
+    if not timings:
+        return {"p50": 0.0, "p99": 0.0}
+    return {
+        "p50": round(timings[len(timings) // 2] * 1000, 2),
+        "p99": round(timings[max(0, math.ceil(len(timings) * 0.99) - 1)] * 1000, 2),
+    }
+
+
+password_hashing_pool = PasswordHashingPool(
+    workers=settings.password_hashing_workers,
+    queue_size=settings.password_hashing_queue_size,
+)
@@ -1,21 +1,26 @@
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
+import logging
 import os
 
+from core.structured_logging import sample_event
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+logger = logging.getLogger(__name__)
+
 
 
 if not SECRET_KEY:
     raise ValueError("SECRET_KEY doit être définie dans le fichier .env")
 
 if len(SECRET_KEY) < 32:
-    print(" ATTENTION: SECRET_KEY trop courte pour la production (< 32 caractères)")
+    logger.warning("SECRET_KEY trop courte pour la production (< 32 caractères)")
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -32,15 +37,17 @@ def create_access_token(data: dict) -> str:
     try:
         token = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
         return token
-    except Exception as error:
-        print(f" Erreur lors de la création du token: {error}")
+    except Exception:
+        logger.exception("Erreur lors de la création du token")
         raise
 
 def decode_access_token(token: str):
     try:
-        print(f" Décodage token: {token[:20]}...")
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         return payload
-    except JWTError as e:   
-        print(f" Erreur JWT lors du décodage: {e}")
+    except JWTError as e:
+        # Ni le jeton ni un de ses préfixes : seulement la raison du refus (événement échantillonné)
+        rate = sample_event("auth.invalid_token")
+        if rate is not None:
+            logger.info("Jeton JWT refusé : %s", e, extra={"event": "auth.invalid_token", "sample_rate": rate})
         return None
\ No newline at end of file